@@ -0,0 +1,158 @@
+import logging
+import os
+import time
+import asyncio
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+# Compute executor: thread pool for NumPy paths that release the GIL, process pool for pure-Python graph work
+EXECUTOR_THREAD_WORKERS = int(os.getenv("RESILIENCE_THREAD_WORKERS", "4"))
+EXECUTOR_PROCESS_WORKERS = int(os.getenv("RESILIENCE_PROCESS_WORKERS", "2"))
+EXECUTOR_MAX_QUEUE = int(os.getenv("RESILIENCE_MAX_QUEUE", "64"))          # Queued + running tasks per pool
+EXECUTOR_TASK_TIMEOUT = float(os.getenv("RESILIENCE_TASK_TIMEOUT", "30"))  # Seconds before a task is abandoned
+
+# =============================================================================
+# Compute Executor: keeps CPU-bound work off the event loop
+# =============================================================================
+class ComputeOverloaded(RuntimeError):
+    """Raised when a pool already has its maximum number of queued and running tasks."""
+
+def _timed_call(fn, args):
+    """Run fn(*args) in a worker and report when it started and finished."""
+    started = time.time()
+    result = fn(*args)
+    return started, time.time(), result
+
+class ComputeExecutor:
+    """
+    Dispatches CPU-bound work to a thread pool (NumPy paths that release the GIL) or a
+    process pool (pure-Python graph work). Each pool has a bounded depth, every task has a
+    timeout, and queue wait is tracked separately from compute time.
+
+    A task that times out while running is abandoned: its caller gets the timeout, but
+    a thread cannot be interrupted, so an abandoned thread task keeps its worker and its
+    queue slot until it returns. Process workers can be stopped, so once every process
+    worker is busy with abandoned tasks the pool is shut down and its processes are
+    terminated; tasks still queued on it fail and the next task starts a fresh pool.
+    """
+    POOLS = ("thread", "process")
+
+    def __init__(self, thread_workers: int = EXECUTOR_THREAD_WORKERS,
+                 process_workers: int = EXECUTOR_PROCESS_WORKERS,
+                 max_queue: int = EXECUTOR_MAX_QUEUE, timeout: float = EXECUTOR_TASK_TIMEOUT):
+        self.workers = {"thread": thread_workers, "process": process_workers}
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pools = {}
+        self._in_flight = {pool: 0 for pool in self.POOLS}
+        self._abandoned = {pool: set() for pool in self.POOLS}  # running futures nobody waits for
+        self._metrics = {
+            pool: {"completed": 0, "failed": 0, "rejected": 0, "timeouts": 0, "abandoned": 0, "restarts": 0,
+                   "queue_wait_total": 0.0, "queue_wait_max": 0.0,
+                   "compute_total": 0.0, "compute_max": 0.0}
+            for pool in self.POOLS
+        }
+
+    def _pool(self, kind: str):
+        # Pools are created on first use so importing the module never spawns workers
+        if kind not in self._pools:
+            if kind == "thread":
+                self._pools[kind] = ThreadPoolExecutor(max_workers=self.workers[kind],
+                                                       thread_name_prefix="resilience")
+            else:
+                self._pools[kind] = ProcessPoolExecutor(max_workers=self.workers[kind],
+                                                        mp_context=multiprocessing.get_context("spawn"))
+        return self._pools[kind]
+
+    def _release(self, kind: str):
+        self._in_flight[kind] -= 1
+
+    def _abandon(self, kind: str, future, loop):
+        """Track a running task that timed out; terminate a process pool clogged with them."""
+        self._metrics[kind]["abandoned"] += 1
+        abandoned = self._abandoned[kind]
+        abandoned.add(future)
+        future.add_done_callback(lambda f: loop.call_soon_threadsafe(abandoned.discard, f))
+        if kind == "process" and len(abandoned) >= self.workers[kind]:
+            self._terminate(kind)
+
+    def _terminate(self, kind: str):
+        pool = self._pools.pop(kind, None)
+        self._abandoned[kind] = set()
+        if pool is None:
+            return
+        # The executor has no public way to stop a busy worker, so reach for its processes
+        processes = list((pool._processes or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+        self._metrics[kind]["restarts"] += 1
+        logging.warning(f"Terminated the {kind} pool: all {len(processes)} workers were stuck on abandoned tasks")
+
+    async def run(self, kind: str, fn, *args, timeout: Optional[float] = None):
+        """
+        Run fn(*args) on the given pool and await its result.
+
+        Raises:
+            ComputeOverloaded: if the pool's queue is full
+            asyncio.TimeoutError: if the task does not finish within the timeout
+        """
+        metrics = self._metrics[kind]
+        if self._in_flight[kind] >= self.max_queue:
+            metrics["rejected"] += 1
+            raise ComputeOverloaded(f"The {kind} pool is at capacity ({self.max_queue} tasks)")
+        loop = asyncio.get_running_loop()
+        submitted = time.time()
+        pool = self._pool(kind)
+        future = pool.submit(_timed_call, fn, args)
+        self._in_flight[kind] += 1
+        # The slot is freed when the work really ends, even if the caller stopped waiting
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release, kind))
+        try:
+            started, finished, result = await asyncio.wait_for(asyncio.wrap_future(future),
+                                                               timeout or self.timeout)
+        except asyncio.TimeoutError:
+            metrics["timeouts"] += 1
+            if not future.cancel():
+                self._abandon(kind, future, loop)
+            raise
+        except BrokenProcessPool:
+            # A worker died (or the pool was terminated); start a fresh pool on the next task
+            metrics["failed"] += 1
+            if self._pools.get(kind) is pool:
+                del self._pools[kind]
+            raise
+        except Exception:
+            metrics["failed"] += 1
+            raise
+        queue_wait, compute = max(0.0, started - submitted), finished - started
+        metrics["completed"] += 1
+        metrics["queue_wait_total"] += queue_wait
+        metrics["queue_wait_max"] = max(metrics["queue_wait_max"], queue_wait)
+        metrics["compute_total"] += compute
+        metrics["compute_max"] = max(metrics["compute_max"], compute)
+        return result
+
+    def stats(self):
+        report = {}
+        for kind, metrics in self._metrics.items():
+            completed = max(metrics["completed"], 1)
+            report[kind] = {
+                "workers": self.workers[kind],
+                "in_flight": self._in_flight[kind],
+                "max_queue": self.max_queue,
+                "completed": metrics["completed"],
+                "failed": metrics["failed"],
+                "rejected": metrics["rejected"],
+                "timeouts": metrics["timeouts"],
+                "abandoned": metrics["abandoned"],
+                "abandoned_running": len(self._abandoned[kind]),
+                "restarts": metrics["restarts"],
+                "avg_queue_wait_ms": 1000 * metrics["queue_wait_total"] / completed,
+                "max_queue_wait_ms": 1000 * metrics["queue_wait_max"],
+                "avg_compute_ms": 1000 * metrics["compute_total"] / completed,
+                "max_compute_ms": 1000 * metrics["compute_max"]
+            }
+        return report
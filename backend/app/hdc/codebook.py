@@ -0,0 +1,143 @@
+import numpy as np
+import logging
+import json
+import os
+import threading
+from collections import OrderedDict
+from .vectors import DIM, pack_hypervectors
+from ..state.shared import SHARED_STATE_DIR
+from ..state.snapshots import SNAPSHOT_DIR
+
+HDC_BACKEND = "bipolar"  # Hypervector storage: "bipolar" (int8 reference) or "packed" (uint64 bit words)
+HDC_BACKENDS = ("bipolar", "packed")
+CODEBOOK_SEED = 0        # Root seed of the projection codebook; every bin derives its own generator from it
+CODEBOOK_CACHE_SIZE = 1024  # Bin vectors kept in memory per codebook
+CODEBOOK_BINS = (0, 40)  # Bin range written to the persistent codebook cache
+CODEBOOK_DIR = os.getenv("HDC_CODEBOOK_DIR", SHARED_STATE_DIR or SNAPSHOT_DIR)  # Optional directory for memory-mapped codebook files
+
+# =============================================================================
+# Projection Codebook
+# =============================================================================
+def _bin_entropy(val: int):
+    """Map an integer bin onto a non-negative seed component (zigzag: 0, -1, 1, -2, ...)."""
+    return 2 * val if val >= 0 else -2 * val - 1
+
+class HypervectorCodebook:
+    """
+    Maps integer bins to fixed hypervectors.
+
+    Each bin's vector is derived on demand from its own np.random.Generator, seeded with the
+    codebook seed and the bin, so encodings are reproducible across processes and never touch
+    the global NumPy RNG. Derived vectors live in a bounded LRU cache; a range of bins can be
+    saved to an .npy file and memory-mapped back in.
+    """
+    def __init__(self, dim: int = DIM, backend: str = HDC_BACKEND, seed: int = CODEBOOK_SEED,
+                 cache_size: int = CODEBOOK_CACHE_SIZE):
+        if backend not in HDC_BACKENDS:
+            raise ValueError(f"HDC backend must be one of {list(HDC_BACKENDS)}")
+        self.dim = dim
+        self.backend = backend
+        self.seed = seed
+        self.cache_size = cache_size
+        # The packed backend stores each vector as uint64 words, 64 dimensions per word
+        if backend == "packed":
+            self.width, self.dtype = -(-dim // 64), np.dtype(np.uint64)
+        else:
+            self.width, self.dtype = dim, np.dtype(np.int8)
+        self._cache = np.empty((cache_size, self.width), dtype=self.dtype)
+        self._slots = OrderedDict()  # bin -> cache row, least recently used first
+        self._mapped = None
+        self._mapped_lower = 0
+        self._lock = threading.Lock()
+
+    def generate(self, val: int):
+        """Derive the vector for a bin from its own seeded generator."""
+        rng = np.random.default_rng([self.seed, _bin_entropy(val)])
+        vector = rng.integers(0, 2, size=self.dim, dtype=np.int8) * 2 - 1
+        if self.backend == "packed":
+            return pack_hypervectors(vector, self.dim)
+        return vector
+
+    def _row(self, val: int):
+        """Vector for a bin from the memory map, the cache or freshly derived. Caller holds the lock."""
+        if self._mapped is not None and 0 <= val - self._mapped_lower < len(self._mapped):
+            return self._mapped[val - self._mapped_lower]
+        slot = self._slots.get(val)
+        if slot is not None:
+            self._slots.move_to_end(val)
+            return self._cache[slot]
+        if len(self._slots) < self.cache_size:
+            slot = len(self._slots)
+        else:
+            _, slot = self._slots.popitem(last=False)
+        self._cache[slot] = self.generate(val)
+        self._slots[val] = slot
+        return self._cache[slot]
+
+    def vector(self, val: int):
+        """Vector for a single bin."""
+        with self._lock:
+            return self._row(val).copy()
+
+    def rows(self, bins):
+        """Gather the vectors of many bins into one contiguous 2-D array."""
+        bins = np.asarray(bins, dtype=np.int64).ravel()
+        unique_bins, inverse = np.unique(bins, return_inverse=True)
+        table = np.empty((len(unique_bins), self.width), dtype=self.dtype)
+        with self._lock:
+            for i, val in enumerate(unique_bins.tolist()):
+                table[i] = self._row(val)
+        return table[inverse]
+
+    def warm(self, lower: int, upper: int):
+        """Derive and cache every bin in [lower, upper] ahead of time."""
+        with self._lock:
+            for val in range(lower, upper + 1):
+                self._row(val)
+
+    @property
+    def nbytes(self):
+        return self._cache.nbytes
+
+    def save(self, path: str, lower: int, upper: int):
+        """Write bins [lower, upper] to an .npy file with a JSON sidecar describing the codebook."""
+        # Worker processes starting together may all write the file; each renames its own copy
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        table = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=self.dtype,
+                                          shape=(upper - lower + 1, self.width))
+        with self._lock:
+            for val in range(lower, upper + 1):
+                table[val - lower] = self._row(val)
+        table.flush()
+        del table
+        os.replace(tmp_path, path)
+        with open(tmp_path, "w") as f:
+            json.dump({"dim": self.dim, "backend": self.backend, "seed": self.seed,
+                       "lower": lower, "upper": upper}, f)
+        os.replace(tmp_path, path + ".json")
+        logging.info(f"Projection codebook for bins {lower} to {upper} saved to {path}.")
+
+    @classmethod
+    def load(cls, path: str, cache_size: int = CODEBOOK_CACHE_SIZE):
+        """Memory-map a saved codebook; bins outside the saved range are still derived lazily."""
+        with open(path + ".json") as f:
+            meta = json.load(f)
+        codebook = cls(dim=meta["dim"], backend=meta["backend"], seed=meta["seed"], cache_size=cache_size)
+        codebook._mapped = np.load(path, mmap_mode="r")
+        codebook._mapped_lower = meta["lower"]
+        logging.info(f"Projection codebook memory-mapped from {path}.")
+        return codebook
+
+def shared_codebook(backend: str = HDC_BACKEND):
+    """
+    Codebook shared by the module's detectors. When HDC_CODEBOOK_DIR (or
+    RESILIENCE_SHARED_STATE_DIR) is set the default bin range is memory-mapped from a
+    cached file, which is written on first use, so worker processes share its pages.
+    """
+    if not CODEBOOK_DIR:
+        return HypervectorCodebook(backend=backend)
+    path = os.path.join(CODEBOOK_DIR, f"codebook-{backend}-{DIM}-{CODEBOOK_SEED}.npy")
+    if not os.path.exists(path + ".json"):
+        os.makedirs(CODEBOOK_DIR, exist_ok=True)
+        HypervectorCodebook(backend=backend).save(path, *CODEBOOK_BINS)
+    return HypervectorCodebook.load(path)
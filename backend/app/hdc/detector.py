@@ -0,0 +1,424 @@
+import numpy as np
+import logging
+import math
+import copy
+import threading
+from collections import deque
+from typing import Optional
+from .codebook import HDC_BACKEND, HDC_BACKENDS, HypervectorCodebook
+from .vectors import (DIM, ENCODE_CHUNK_SIZE, moving_average_filter, moving_average_filter_2d, pack_hypervectors,
+                      unpack_hypervectors, popcount_rows, bipolar_similarity)
+
+SIMILARITY_THRESH = 0.7  # Default threshold for anomaly detection - increased for better sensitivity
+STREAM_DECAY = None      # Per-sample decay of the streaming bundle (None keeps an exact integer count)
+STREAM_WINDOW = 5        # Moving-average window applied to streamed samples
+SIMILARITY_TABLE_MARGIN = 8      # Bins tabulated beyond the training range on each side
+SIMILARITY_TABLE_MAX_BINS = 4096  # Upper bound on the bins covered by a similarity table
+SIMILARITY_TABLE_MIN_BATCH = 256  # Batch size from which detect_batch() builds a missing table
+
+# =============================================================================
+# Similarity Lookup Table
+# =============================================================================
+class SimilarityTable:
+    """
+    Similarity against a fixed prototype for every encodable point in a window of bins.
+
+    A binarized interpolation depends on the fractional weight only through which neighbouring
+    bin dominates, so the weight grid collapses to three exact points per bin pair: the lower
+    bin, an exact tie, and the upper bin. The table stores the similarity of each bin vector and
+    of each tie vector, which makes detection a lookup with no per-sample vector work.
+    """
+    def __init__(self, lower: int, exact, tie, threshold: float):
+        self.lower = lower
+        self.exact = exact
+        self.tie = tie
+        self.set_threshold(threshold)
+
+    def set_threshold(self, threshold: float):
+        """Refresh the anomaly flags derived from the similarity threshold."""
+        self.exact_anomaly = self.exact < threshold
+        self.tie_anomaly = self.tie < threshold
+
+    def lookup(self, bins, lower_bins, ties, similarities, anomalies):
+        """
+        Fill similarities/anomalies for points whose bins fall inside the table.
+
+        Returns:
+            ndarray: mask of points that are outside the table and still need scoring
+        """
+        exact_idx = bins - self.lower
+        tie_idx = lower_bins - self.lower
+        hit_exact = ~ties & (exact_idx >= 0) & (exact_idx < len(self.exact))
+        hit_tie = ties & (tie_idx >= 0) & (tie_idx < len(self.tie))
+        similarities[hit_exact] = self.exact[exact_idx[hit_exact]]
+        anomalies[hit_exact] = self.exact_anomaly[exact_idx[hit_exact]]
+        similarities[hit_tie] = self.tie[tie_idx[hit_tie]]
+        anomalies[hit_tie] = self.tie_anomaly[tie_idx[hit_tie]]
+        return ~(hit_exact | hit_tie)
+
+    def lookup_one(self, data_point: float):
+        """Similarity and anomaly flag for a single point, or None when outside the table."""
+        lower = math.floor(data_point)
+        weight_upper = data_point - lower
+        weight_lower = 1 - weight_upper
+        if weight_lower == weight_upper:
+            idx = lower - self.lower
+            if 0 <= idx < len(self.tie):
+                return self.tie[idx], self.tie_anomaly[idx]
+            return None
+        idx = (lower if weight_lower > weight_upper else lower + 1) - self.lower
+        if 0 <= idx < len(self.exact):
+            return self.exact[idx], self.exact_anomaly[idx]
+        return None
+
+# =============================================================================
+# Predictive Maintenance Module using Hyperdimensional Computing
+# =============================================================================
+class PredictiveMaintenance:
+    def __init__(self, dim: int = DIM, similarity_thresh: float = SIMILARITY_THRESH, bin_range=None,
+                 backend: str = HDC_BACKEND, decay: Optional[float] = None,
+                 window_size: int = STREAM_WINDOW, codebook: Optional["HypervectorCodebook"] = None):
+        if backend not in HDC_BACKENDS:
+            raise ValueError(f"HDC backend must be one of {list(HDC_BACKENDS)}")
+        if decay is not None and not 0 < decay <= 1:
+            raise ValueError("Decay factor must be in (0, 1]")
+        self.dim = dim
+        self._similarity_table = None
+        self.similarity_thresh = similarity_thresh
+        self.backend = backend
+        self.prototype = None
+        # Streaming state: running bundle of every absorbed sample and the raw smoothing window
+        self.decay = decay
+        self.window_size = window_size
+        self.bundle = None
+        self.samples_seen = 0
+        self._stream_window = deque(maxlen=window_size)
+        # Serializes build/detect/ingest sequences when requests run on worker threads
+        self.lock = threading.RLock()
+        # Projection codebook: bin vectors are derived lazily and may be shared between detectors
+        if codebook is None:
+            codebook = HypervectorCodebook(dim=self.dim, backend=self.backend)
+        elif codebook.dim != self.dim or codebook.backend != self.backend:
+            raise ValueError("Codebook dimension and backend must match the detector")
+        self.codebook = codebook
+        if bin_range is not None:
+            self.codebook.warm(bin_range[0], bin_range[1])
+
+    @property
+    def prototype(self):
+        return self._prototype
+
+    @prototype.setter
+    def prototype(self, value):
+        # Any new prototype invalidates the similarity table built for the old one
+        self._prototype = value
+        self._similarity_table = None
+
+    @property
+    def similarity_thresh(self):
+        return self._similarity_thresh
+
+    @similarity_thresh.setter
+    def similarity_thresh(self, value):
+        self._similarity_thresh = value
+        if self._similarity_table is not None:
+            self._similarity_table.set_threshold(value)
+
+    def to_bipolar(self, vectors):
+        """Convert hypervectors from the backend's representation to bipolar int8."""
+        if self.backend == "packed":
+            return unpack_hypervectors(vectors, self.dim)
+        return np.asarray(vectors, dtype=np.int8)
+
+    def _encode_bins(self, values):
+        """
+        Map data points to codebook bins.
+        Binarizing the interpolation of two bipolar bin vectors keeps the lower bin where
+        its weight dominates, the upper bin where that weight dominates, and the element-wise
+        maximum of both on an exact tie, so encoding reduces to a row selection.
+
+        Returns:
+            tuple: (selected bins, lower bins, tie mask)
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not np.all(np.isfinite(values)):
+            raise ValueError("Data points must be finite numbers")
+        lower = np.floor(values).astype(np.int64)
+        upper = np.ceil(values).astype(np.int64)
+        weight_upper = values - lower
+        weight_lower = 1 - weight_upper
+        bins = np.where(weight_lower > weight_upper, lower, upper)
+        return bins, lower, weight_lower == weight_upper
+
+    def encode_batch(self, values):
+        """
+        Encode a series of numeric data points in a few array operations.
+        Row i of the result equals fixed_encode(values[i]), in the backend's representation.
+        """
+        bins, lower, ties = self._encode_bins(values)
+        encoded = self.codebook.rows(bins)
+        if ties.any():
+            # Element-wise maximum of bipolar vectors is a bitwise OR of packed ones
+            if self.backend == "packed":
+                encoded[ties] |= self.codebook.rows(lower[ties])
+            else:
+                encoded[ties] = np.maximum(encoded[ties], self.codebook.rows(lower[ties]))
+        return encoded
+
+    def _key_rows(self, keys):
+        """
+        Hypervectors for encoding keys: 2*bin for a bin vector, 2*lower+1 for the tie
+        between bins lower and lower+1.
+        """
+        bins = keys // 2
+        ties = keys % 2 == 1
+        rows = self.codebook.rows(bins)
+        if ties.any():
+            if self.backend == "packed":
+                rows[ties] |= self.codebook.rows(bins[ties] + 1)
+            else:
+                rows[ties] = np.maximum(rows[ties], self.codebook.rows(bins[ties] + 1))
+        return rows
+
+    def _encode_keys(self, values):
+        """Encoding key of every data point (see _key_rows)."""
+        bins, lower, ties = self._encode_bins(values)
+        return np.where(ties, 2 * lower + 1, 2 * bins)
+
+    def detect_many(self, series_matrix, lengths):
+        """
+        Analyze many telemetry series at once, each with its own prototype, exactly as the
+        single-series endpoint does: smooth, build the prototype from a second smoothing pass,
+        then score the smoothed points.
+
+        All series are smoothed with one 2-D filter. Encoding keys are shared across series, so
+        prototypes come from one count-matrix product and scoring from one similarity table
+        (series x key). This detector's own prototype is left untouched.
+
+        Returns:
+            list: (smoothed values, similarities, anomaly flags) per series
+        """
+        smoothed, smoothed_lengths = moving_average_filter_2d(series_matrix, lengths)
+        training, training_lengths = moving_average_filter_2d(smoothed, smoothed_lengths)
+        n_series = len(smoothed_lengths)
+        columns = np.arange(smoothed.shape[1])
+        scored_mask = columns < smoothed_lengths[:, None]
+        training_mask = columns < training_lengths[:, None]
+
+        scored_keys = self._encode_keys(smoothed[scored_mask])
+        training_keys = self._encode_keys(training[training_mask])
+        keys, inverse = np.unique(np.concatenate([scored_keys, training_keys]), return_inverse=True)
+        inverse = inverse.ravel()
+        scored_inverse, training_inverse = inverse[:len(scored_keys)], inverse[len(scored_keys):]
+        bipolar_rows = self.to_bipolar(self._key_rows(keys)).astype(np.float64)
+
+        # Bundle every series at once: counts (series x key) times key vectors
+        training_series = np.broadcast_to(np.arange(n_series)[:, None], training.shape)[training_mask]
+        counts = np.bincount(training_series * len(keys) + training_inverse,
+                             minlength=n_series * len(keys)).reshape(n_series, len(keys))
+        prototypes = np.where(counts @ bipolar_rows >= 0, 1.0, -1.0)
+
+        # Similarity of every key against every series prototype
+        similarity_table = bipolar_similarity(np.rint(prototypes @ bipolar_rows.T).astype(np.int64), self.dim)
+        scored_series = np.broadcast_to(np.arange(n_series)[:, None], smoothed.shape)[scored_mask]
+        similarities = similarity_table[scored_series, scored_inverse]
+        anomalies = similarities < self.similarity_thresh
+
+        results = []
+        boundaries = np.cumsum(smoothed_lengths)[:-1]
+        for values, sims, flags in zip(np.split(smoothed[scored_mask], boundaries),
+                                       np.split(similarities, boundaries),
+                                       np.split(anomalies, boundaries)):
+            results.append((values, sims, flags))
+        return results
+
+    def _bundle(self, encoded):
+        """Element-wise sum of a batch of encoded hypervectors, as bipolar counts."""
+        if self.backend == "packed":
+            encoded = unpack_hypervectors(encoded, self.dim)
+        return encoded.sum(axis=0, dtype=np.int64)
+
+    def _binarize(self, sum_vector):
+        """Turn a bundled sum into a prototype in the backend's representation."""
+        prototype = np.where(sum_vector >= 0, 1, -1).astype(np.int8)
+        if self.backend == "packed":
+            return pack_hypervectors(prototype, self.dim)
+        return prototype
+
+    def _prototype_dots(self, encoded):
+        """Dot products between a batch of encoded hypervectors and the prototype."""
+        if self.backend == "packed":
+            # For bipolar vectors: dot = DIM - 2 * hamming, so similarity = 1 - 2 * hamming / DIM
+            return self.dim - 2 * popcount_rows(encoded ^ self.prototype)
+        matches = np.count_nonzero(encoded == self.prototype, axis=1)
+        return 2 * matches - self.dim
+
+    def fixed_encode(self, data_point: float):
+        """
+        Encode a numeric data point using linear interpolation between the two nearest bins.
+        """
+        return self.encode_batch([data_point])[0]
+
+    def build_prototype(self, telemetry_data):
+        """
+        Build a prototype hypervector (normal state) from telemetry data.
+        Flow:
+         - Apply moving average filter
+         - Encode data points using hyperdimensional computing
+         - Sum encoded vectors and binarize to build the prototype
+        """
+        try:
+            smoothed = np.asarray(moving_average_filter(telemetry_data), dtype=np.float64)
+            logging.info("Telemetry data smoothed with moving average filter.")
+            sum_vector = np.zeros(self.dim, dtype=np.int64)
+            for start in range(0, len(smoothed), ENCODE_CHUNK_SIZE):
+                sum_vector += self._bundle(self.encode_batch(smoothed[start:start + ENCODE_CHUNK_SIZE]))
+            self.prototype = self._binarize(sum_vector)
+            self.bundle = sum_vector if self.decay is None else sum_vector.astype(np.float64)
+            self.samples_seen = len(smoothed)
+            logging.info("Prototype hypervector built from telemetry data.")
+            if len(smoothed):
+                self.build_similarity_table(math.floor(smoothed.min()), math.ceil(smoothed.max()))
+        except Exception as e:
+            logging.error(f"Error building prototype: {e}")
+            raise
+
+    def build_similarity_table(self, lower: int, upper: int, margin: int = SIMILARITY_TABLE_MARGIN):
+        """
+        Tabulate the prototype similarity of every bin and bin-pair tie in [lower, upper],
+        widened by a margin. Done once per prototype; detection then becomes a lookup.
+        """
+        if self.prototype is None:
+            raise ValueError("Prototype not initialized. Run build_prototype() first.")
+        lower = lower - margin
+        upper = min(upper + margin, lower + SIMILARITY_TABLE_MAX_BINS - 1)
+        rows = self.codebook.rows(np.arange(lower, upper + 1))
+        if self.backend == "packed":
+            tie_rows = rows[:-1] | rows[1:]
+        else:
+            tie_rows = np.maximum(rows[:-1], rows[1:])
+        table = SimilarityTable(
+            lower,
+            bipolar_similarity(self._prototype_dots(rows), self.dim),
+            bipolar_similarity(self._prototype_dots(tie_rows), self.dim),
+            self.similarity_thresh
+        )
+        self._similarity_table = table
+        return table
+
+    def _score(self, data_points):
+        """Similarity of each point against the prototype, computed from hypervectors."""
+        dots = np.empty(len(data_points), dtype=np.int64)
+        for start in range(0, len(data_points), ENCODE_CHUNK_SIZE):
+            encoded = self.encode_batch(data_points[start:start + ENCODE_CHUNK_SIZE])
+            dots[start:start + len(encoded)] = self._prototype_dots(encoded)
+        return bipolar_similarity(dots, self.dim)
+
+    def detect_batch(self, data_points):
+        """
+        Detect anomalies for a whole series at once. Points covered by the similarity table
+        are looked up; any others are scored from their hypervectors.
+
+        Returns:
+            tuple: (similarities, anomaly flags) as NumPy arrays
+        """
+        if self.prototype is None:
+            raise ValueError("Prototype not initialized. Run build_prototype() first.")
+        try:
+            data_points = np.asarray(data_points, dtype=np.float64).ravel()
+            table = self._similarity_table
+            if table is None and len(data_points) >= SIMILARITY_TABLE_MIN_BATCH:
+                bins = self._encode_bins(data_points)[0]
+                table = self.build_similarity_table(int(bins.min()), int(bins.max()))
+            if table is None:
+                similarities = self._score(data_points)
+                return similarities, similarities < self.similarity_thresh
+            similarities = np.empty(len(data_points), dtype=np.float64)
+            anomalies = np.empty(len(data_points), dtype=bool)
+            missing = table.lookup(*self._encode_bins(data_points), similarities, anomalies)
+            if missing.any():
+                similarities[missing] = self._score(data_points[missing])
+                anomalies[missing] = similarities[missing] < self.similarity_thresh
+            return similarities, anomalies
+        except Exception as e:
+            logging.error(f"Error during detection: {e}")
+            raise
+
+    def detect(self, data_point: float):
+        """
+        Detect anomalies by:
+         - Encoding a new data point
+         - Comparing it to the prototype via cosine similarity
+         - Flagging anomalies if similarity is below the threshold
+        """
+        if self._similarity_table is not None and math.isfinite(data_point):
+            hit = self._similarity_table.lookup_one(data_point)
+            if hit is not None:
+                return hit
+        similarities, anomalies = self.detect_batch([data_point])
+        return similarities[0], anomalies[0]
+
+    def absorb(self, data_point: float):
+        """
+        Add one smoothed data point to the running bundle and refresh the prototype in O(DIM).
+        With a decay factor the bundle becomes an exponentially weighted count.
+        """
+        encoded = self.to_bipolar(self.encode_batch([data_point]))[0]
+        if self.bundle is None:
+            self.bundle = np.zeros(self.dim, dtype=np.int64 if self.decay is None else np.float64)
+        if self.decay is not None:
+            self.bundle *= self.decay
+        self.bundle += encoded
+        self.samples_seen += 1
+        self.prototype = self._binarize(self.bundle)
+
+    def ingest(self, raw_values):
+        """
+        Streaming mode: smooth raw samples as they arrive, score each smoothed point against the
+        current prototype, then absorb it into the running bundle. No full rebuild is needed.
+
+        Returns:
+            list: (sample index, smoothed value, similarity or None, is_anomaly) for every point
+            that completed a smoothing window
+        """
+        verdicts = []
+        kernel = np.ones(self.window_size) / self.window_size
+        for raw in raw_values:
+            self._stream_window.append(float(raw))
+            if len(self._stream_window) < self.window_size:
+                continue
+            value = float(np.convolve(self._stream_window, kernel, mode='valid')[0])
+            if self.prototype is None:
+                similarity, is_anomaly = None, False
+            else:
+                similarity, is_anomaly = self.detect(value)
+                similarity, is_anomaly = float(similarity), bool(is_anomaly)
+            self.absorb(value)
+            verdicts.append((self.samples_seen - 1, value, similarity, is_anomaly))
+        return verdicts
+
+    def reset_stream(self):
+        """Forget the running bundle, the prototype and any partially filled smoothing window."""
+        self.prototype = None
+        self.bundle = None
+        self.samples_seen = 0
+        self._stream_window.clear()
+
+    def derive(self):
+        """
+        Create an untrained detector with the same configuration.
+        The codebook is shared rather than regenerated.
+        """
+        detector = copy.copy(self)
+        detector.prototype = None
+        detector.bundle = None
+        detector.samples_seen = 0
+        detector._stream_window = deque(maxlen=self.window_size)
+        detector.lock = threading.RLock()
+        return detector
+
+    def state_nbytes(self):
+        """Upper bound on the memory held by this detector's learned state."""
+        bundle_bytes = self.dim * 8
+        prototype_bytes = self.codebook.width * self.codebook.dtype.itemsize
+        return bundle_bytes + prototype_bytes
@@ -0,0 +1,198 @@
+import numpy as np
+import logging
+import json
+import os
+import hashlib
+import tempfile
+import threading
+import contextlib
+from collections import OrderedDict
+from .detector import PredictiveMaintenance
+from ..state.snapshots import SNAPSHOT_DIR
+
+DETECTOR_MEMORY_BUDGET = 256 * 1024 * 1024  # Bytes of per-device detector state kept resident
+DETECTOR_SPILL_DIR = os.getenv("DETECTOR_SPILL_DIR", os.path.join(SNAPSHOT_DIR or tempfile.gettempdir(),
+                                                                  "detectors" if SNAPSHOT_DIR else "spot_connect_detectors"))
+
+# =============================================================================
+# Detector Registry: one PredictiveMaintenance per device or link
+# =============================================================================
+def _atomic_save(path: str, array):
+    """Write an .npy file via rename so live memory maps of the old file stay valid."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+class DetectorRegistry:
+    """
+    Detectors keyed by device or link id, kept within a memory budget.
+    Least recently used detectors are spilled to .npy files and memory-mapped back on demand,
+    so a cold detector resumes without retraining.
+    """
+    def __init__(self, template: PredictiveMaintenance, memory_budget: int = DETECTOR_MEMORY_BUDGET,
+                 spill_dir: str = DETECTOR_SPILL_DIR):
+        self.template = template
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.capacity = max(1, memory_budget // template.state_nbytes())
+        self._detectors = OrderedDict()
+        self._spilled = {}
+        self._lock = threading.RLock()
+        os.makedirs(self.spill_dir, exist_ok=True)
+
+    def _spill_path(self, key: str, kind: str):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, f"{digest}.{kind}.npy")
+
+    def _write_state(self, key: str, detector: PredictiveMaintenance):
+        """Write a detector's state to its spill files; returns the metadata to restore it, or None if it has none."""
+        if detector.bundle is None and not detector._stream_window:
+            return None
+        if detector.bundle is not None:
+            _atomic_save(self._spill_path(key, "bundle"), detector.bundle)
+            _atomic_save(self._spill_path(key, "prototype"), detector.prototype)
+        return {
+            "samples_seen": detector.samples_seen,
+            "has_state": detector.bundle is not None,
+            "window": list(detector._stream_window),
+            "similarity_thresh": detector.similarity_thresh
+        }
+
+    def _spill(self, key: str, detector: PredictiveMaintenance):
+        meta = self._write_state(key, detector)
+        if meta is not None:
+            self._spilled[key] = meta
+
+    def save_snapshot(self) -> int:
+        """
+        Write every detector's state to the spill directory with an index of their
+        metadata, so a restarted process resumes them the way spilled detectors resume.
+        Returns the number of detectors indexed.
+        """
+        with self._lock:
+            index = dict(self._spilled)
+            for key, detector in self._detectors.items():
+                with detector.lock:
+                    meta = self._write_state(key, detector)
+                if meta is not None:
+                    index[key] = meta
+            payload = {"dim": self.template.dim, "backend": self.template.backend, "detectors": index}
+            tmp_path = os.path.join(self.spill_dir, f"index.json.{os.getpid()}.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, os.path.join(self.spill_dir, "index.json"))
+            return len(index)
+
+    def load_snapshot(self) -> int:
+        """
+        Pick up the detectors indexed by save_snapshot() in an earlier process; their
+        state is memory-mapped back when each is first used. Returns how many were found.
+        """
+        path = os.path.join(self.spill_dir, "index.json")
+        if not os.path.exists(path):
+            return 0
+        with open(path) as f:
+            payload = json.load(f)
+        if payload["dim"] != self.template.dim or payload["backend"] != self.template.backend:
+            logging.warning("Detector snapshot was written for another HDC configuration and is ignored.")
+            return 0
+        with self._lock:
+            for key, meta in payload["detectors"].items():
+                if key not in self._detectors:
+                    self._spilled[key] = meta
+        logging.info(f"{len(payload['detectors'])} detectors restored from snapshot.")
+        return len(payload["detectors"])
+
+    def _restore(self, key: str, detector: PredictiveMaintenance):
+        meta = self._spilled.pop(key)
+        if meta["has_state"]:
+            # Copy-on-write maps: updates stay in memory until the detector is spilled again
+            detector.bundle = np.load(self._spill_path(key, "bundle"), mmap_mode="c")
+            detector.prototype = np.load(self._spill_path(key, "prototype"), mmap_mode="c")
+        detector.samples_seen = meta["samples_seen"]
+        detector.similarity_thresh = meta["similarity_thresh"]
+        detector._stream_window.extend(meta["window"])
+
+    def get(self, key: str) -> PredictiveMaintenance:
+        """
+        Return the detector for a device, restoring or creating it as needed. Another
+        get() may spill it as soon as this returns, and updates made through a spilled
+        detector are lost; use checkout() to update one.
+        """
+        with self._lock:
+            detector = self._detectors.get(key)
+            if detector is not None:
+                self._detectors.move_to_end(key)
+                return detector
+            detector = self.template.derive()
+            if key in self._spilled:
+                self._restore(key, detector)
+            self._detectors[key] = detector
+            while len(self._detectors) > self.capacity:
+                evicted_key, evicted = self._detectors.popitem(last=False)
+                # Waits for an update in progress, so the spill files include it
+                with evicted.lock:
+                    self._spill(evicted_key, evicted)
+                logging.info(f"Detector '{evicted_key}' spilled to disk.")
+            return detector
+
+    @contextlib.contextmanager
+    def checkout(self, key: str):
+        """
+        Hold the detector for a device with its lock taken. Detectors are only spilled
+        under their lock, so it stays resident, and every update made in the block
+        reaches the spill files, until the block exits.
+        """
+        while True:
+            detector = self.get(key)
+            detector.lock.acquire()
+            # Checked without the registry lock, which get() takes before a detector lock.
+            # A detector spilled between get() and here has its state on disk: fetch it again
+            if self._detectors.get(key) is detector:
+                break
+            detector.lock.release()
+        try:
+            yield detector
+        finally:
+            detector.lock.release()
+
+    def remove(self, key: str):
+        """Drop a detector and any spilled state."""
+        with self._lock:
+            found = self._detectors.pop(key, None) is not None
+            meta = self._spilled.pop(key, None)
+            if meta is not None:
+                found = True
+                if meta["has_state"]:
+                    for kind in ("bundle", "prototype"):
+                        os.remove(self._spill_path(key, kind))
+            if not found:
+                raise KeyError(key)
+
+    def set_similarity_thresh(self, value: float):
+        """Apply a new anomaly threshold to every detector, resident or spilled."""
+        with self._lock:
+            self.template.similarity_thresh = value
+            for detector in self._detectors.values():
+                detector.similarity_thresh = value
+            for meta in self._spilled.values():
+                meta["similarity_thresh"] = value
+
+    def reset(self, template: PredictiveMaintenance):
+        """Discard every detector and start over from a new template."""
+        with self._lock:
+            for key in list(self._detectors) + list(self._spilled):
+                self.remove(key)
+            self.template = template
+            self.capacity = max(1, self.memory_budget // template.state_nbytes())
+
+    def stats(self):
+        with self._lock:
+            return {
+                "resident": len(self._detectors),
+                "spilled": len(self._spilled),
+                "capacity": self.capacity,
+                "memory_budget": self.memory_budget,
+                "resident_ids": list(self._detectors)
+            }
@@ -0,0 +1,70 @@
+import numpy as np
+import math
+
+DIM = 10000             # Dimensionality for hypervectors
+ENCODE_CHUNK_SIZE = 1024  # Rows encoded at once when bundling or scoring long windows
+
+# =============================================================================
+# Utility Functions for Hyperdimensional Computing
+# =============================================================================
+def moving_average_filter(data, window_size: int = 5):
+    """Apply a simple moving average filter to smooth out noise."""
+    if len(data) < window_size:
+        return data
+    return np.convolve(data, np.ones(window_size)/window_size, mode='valid')
+
+# Number of set bits for every byte value, used when np.bitwise_count is unavailable (NumPy < 2.0)
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def moving_average_filter_2d(matrix, lengths, window_size: int = 5):
+    """
+    Moving average over many series at once.
+
+    Args:
+        matrix: 2-D array holding one zero-padded series per row
+        lengths: number of valid values in each row
+
+    Returns:
+        tuple: (smoothed matrix, smoothed lengths). Rows shorter than the window are passed
+        through unchanged, matching moving_average_filter.
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    n_out = max(matrix.shape[1] - window_size + 1, 0)
+    kernel = np.ones(window_size) / window_size
+    smoothed = np.zeros_like(matrix)
+    # Accumulating weighted shifts in kernel order reproduces np.convolve bit for bit
+    for offset in range(window_size):
+        smoothed[:, :n_out] += matrix[:, offset:offset + n_out] * kernel[offset]
+    short = lengths < window_size
+    smoothed[short] = matrix[short]
+    return smoothed, np.where(short, lengths, lengths - window_size + 1)
+
+def pack_hypervectors(vectors, dim: int = DIM):
+    """
+    Pack bipolar hypervectors into uint64 words (bit set where the element is +1).
+    Rows are zero-padded to a whole number of words, so padding never affects XOR or popcount.
+    """
+    bits = np.packbits(np.asarray(vectors) > 0, axis=-1)
+    n_bytes = -(-dim // 64) * 8
+    padding = [(0, 0)] * (bits.ndim - 1) + [(0, n_bytes - bits.shape[-1])]
+    return np.ascontiguousarray(np.pad(bits, padding)).view(np.uint64)
+
+def unpack_hypervectors(packed, dim: int = DIM):
+    """Unpack uint64 bit words back into bipolar int8 hypervectors."""
+    bits = np.unpackbits(np.ascontiguousarray(packed).view(np.uint8), axis=-1, count=dim)
+    return bits.astype(np.int8) * 2 - 1
+
+def popcount_rows(packed):
+    """Count set bits in each row of a packed hypervector array."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(packed).sum(axis=-1, dtype=np.int64)
+    return _POPCOUNT_TABLE[np.ascontiguousarray(packed).view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+def bipolar_similarity(dots, dim: int):
+    """
+    Cosine similarity of bipolar hypervectors computed from their dot products.
+    Mirrors scipy's cosine distance (including its clipping) so results are bit-identical.
+    """
+    distance = 1.0 - np.asarray(dots, dtype=np.float64) / math.sqrt(dim * dim)
+    return 1.0 - np.clip(distance, 0.0, 2.0)
@@ -56,3 +56,15 @@ class NetworkIssue(Base):
 
     # Add relationship to User model
     reporter = relationship("User", back_populates="reported_issues")
+
+class RouteRecord(Base):
+    __tablename__ = "route_history"
+
+    id = Column(Integer, primary_key=True, index=True)
+    topology = Column(String, index=True)
+    timestamp = Column(DateTime, index=True)
+    source = Column(Integer)
+    target = Column(Integer)
+    algorithm = Column(String)
+    paths = Column(Text)  # JSON list of node lists, best path first
+    costs = Column(Text)  # JSON list of path costs
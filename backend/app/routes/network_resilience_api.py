@@ -1,14 +1,34 @@
-import uvicorn
-from fastapi import FastAPI, HTTPException, Query, APIRouter, Depends
+from fastapi import FastAPI, HTTPException, APIRouter, Depends, Request, WebSocket, WebSocketDisconnect, BackgroundTasks
+from fastapi.responses import Response
 from pydantic import BaseModel, validator
 import numpy as np
 import networkx as nx
 import logging
-from scipy.spatial.distance import cosine
-from sklearn.neural_network import MLPRegressor
-from sklearn.exceptions import NotFittedError
-from typing import List, Dict
+import json
+import base64
+import os
+import time
+import asyncio
+import tempfile
+import threading
+import contextlib
+from collections import OrderedDict
+from typing import List, Dict, Optional, Union
 from . import oauth2
+from ..compute import EXECUTOR_TASK_TIMEOUT, ComputeExecutor, ComputeOverloaded
+from ..hdc.codebook import HDC_BACKEND, HDC_BACKENDS, shared_codebook
+from ..hdc.detector import SIMILARITY_THRESH, STREAM_DECAY, PredictiveMaintenance
+from ..hdc.registry import DetectorRegistry
+from ..hdc.vectors import DIM, moving_average_filter
+from ..routing.history import ROUTE_HISTORY_DB, ROUTE_HISTORY_FLUSH_BATCH, ROUTE_HISTORY_PAGE_SIZE
+from ..routing.penalty import train_penalty_model, validate_penalty_model
+from ..routing.registry import TopologyRegistry
+from ..routing.router import (ALT_LANDMARKS, DEFAULT_TOPOLOGY, ROUTING_BACKEND, ROUTING_BACKENDS,
+                              ROUTING_HEURISTICS, NeuroSymbolicRouting)
+from ..routing.search import KSP_TIME_BUDGET
+from ..routing.workers import search_paths_task, route_pairs_task
+from ..routing.topology import TOPOLOGY_FORMATS
+from ..state.snapshots import SNAPSHOT_DIR, SNAPSHOT_INTERVAL
 from datetime import datetime
 
 # =============================================================================
@@ -20,358 +40,166 @@ logging.basicConfig(level=logging.INFO,
 # =============================================================================
 # Hyperparameters & Global Configuration
 # =============================================================================
-DIM = 10000             # Dimensionality for hypervectors
-SIMILARITY_THRESH = 0.7  # Default threshold for anomaly detection - increased for better sensitivity
+TELEMETRY_DTYPES = {"float32": "<f4", "float64": "<f8"}  # Accepted binary telemetry encodings (little-endian)
+RESPONSE_MODES = ("full", "summary", "anomalies_only", "columnar")  # Shapes of predictive maintenance responses
+MAX_BATCH_SERIES = 1000  # Series accepted by one batch predictive-maintenance request
+ROUTING_POOL = os.getenv("RESILIENCE_ROUTING_POOL", "process")            # "process" or "thread"
+MAX_BATCH_PAIRS = 100000  # (source, target) pairs accepted by one batch routing request
+MAX_CONGESTION_BATCH = 100000  # Edge readings accepted by one bulk congestion update
+ROUTING_BATCH_PROCESS_MIN_SOURCES = 64  # Distinct sources from which a batch is split across worker processes
+ROUTE_HISTORY_MAX_PAGE = 1000
+RETRAIN_JOB_HISTORY = 20  # Finished retraining jobs kept for status queries
+# Topology files named by load requests must live under TOPOLOGY_DIR
+TOPOLOGY_DIR = os.getenv("RESILIENCE_TOPOLOGY_DIR", os.path.join(tempfile.gettempdir(), "spot_connect_topologies"))
 
 CONFIG = {
     "SIMILARITY_THRESH": SIMILARITY_THRESH,
-    "DIM": DIM
+    "DIM": DIM,
+    "HDC_BACKEND": HDC_BACKEND,
+    "STREAM_DECAY": STREAM_DECAY
 }
 
 # =============================================================================
-# Utility Functions for Hyperdimensional Computing
+# Compute Executor: HTTP errors for rejected and timed-out tasks
 # =============================================================================
-def generate_random_hypervector(dim: int = DIM):
-    """Generate a random bipolar hypervector (-1 or 1 elements)."""
-    return np.random.choice([-1, 1], size=dim)
-
-def moving_average_filter(data, window_size: int = 5):
-    """Apply a simple moving average filter to smooth out noise."""
-    if len(data) < window_size:
-        return data
-    return np.convolve(data, np.ones(window_size)/window_size, mode='valid')
+def _executor_http_error(e: Exception):
+    """Map executor failures onto HTTP errors, or None for anything else."""
+    if isinstance(e, ComputeOverloaded):
+        return HTTPException(status_code=503, detail=str(e))
+    if isinstance(e, asyncio.TimeoutError):
+        return HTTPException(status_code=504, detail="Computation timed out")
+    return None
 
 # =============================================================================
-# Predictive Maintenance Module using Hyperdimensional Computing
+# Pydantic Models for Request Validation
 # =============================================================================
-class PredictiveMaintenance:
-    def __init__(self, dim: int = DIM, similarity_thresh: float = CONFIG["SIMILARITY_THRESH"], bin_range=(0, 40)):
-        self.dim = dim
-        self.similarity_thresh = similarity_thresh
-        self.prototype = None
-        # Precompute a fixed projection dictionary for each integer in bin_range
-        self.projection_dict = {}
-        for val in range(bin_range[0], bin_range[1] + 1):
-            np.random.seed(val)
-            self.projection_dict[val] = generate_random_hypervector(self.dim)
-        logging.info("Projection dictionary built for bins {} to {}.".format(bin_range[0], bin_range[1]))
-
-    def fixed_encode(self, data_point: float):
-        """
-        Encode a numeric data point using linear interpolation between the two nearest bins.
-        """
-        lower = int(np.floor(data_point))
-        upper = int(np.ceil(data_point))
-        if lower == upper:
-            return self.projection_dict.get(lower, generate_random_hypervector(self.dim))
-        vec_lower = self.projection_dict.get(lower)
-        vec_upper = self.projection_dict.get(upper)
-        if vec_lower is None:
-            np.random.seed(lower)
-            vec_lower = generate_random_hypervector(self.dim)
-            self.projection_dict[lower] = vec_lower
-        if vec_upper is None:
-            np.random.seed(upper)
-            vec_upper = generate_random_hypervector(self.dim)
-            self.projection_dict[upper] = vec_upper
-        weight_upper = data_point - lower
-        weight_lower = 1 - weight_upper
-        interpolated = weight_lower * vec_lower + weight_upper * vec_upper
-        return np.where(interpolated >= 0, 1, -1)
-
-    def build_prototype(self, telemetry_data):
-        """
-        Build a prototype hypervector (normal state) from telemetry data.
-        Flow:
-         - Apply moving average filter
-         - Encode data points using hyperdimensional computing
-         - Sum encoded vectors and binarize to build the prototype
-        """
-        try:
-            smoothed = moving_average_filter(telemetry_data)
-            logging.info("Telemetry data smoothed with moving average filter.")
-            encoded_vectors = [self.fixed_encode(val) for val in smoothed]
-            sum_vector = np.sum(encoded_vectors, axis=0)
-            self.prototype = np.where(sum_vector >= 0, 1, -1)
-            logging.info("Prototype hypervector built from telemetry data.")
-        except Exception as e:
-            logging.error(f"Error building prototype: {e}")
-            raise
-
-    def detect(self, data_point: float):
-        """
-        Detect anomalies by:
-         - Encoding a new data point
-         - Comparing it to the prototype via cosine similarity
-         - Flagging anomalies if similarity is below the threshold
-        """
-        if self.prototype is None:
-            raise ValueError("Prototype not initialized. Run build_prototype() first.")
-        try:
-            encoded = self.fixed_encode(data_point)
-            similarity = 1 - cosine(encoded, self.prototype)
-            is_anomaly = similarity < self.similarity_thresh
-            return similarity, is_anomaly
-        except Exception as e:
-            logging.error(f"Error during detection: {e}")
-            raise
+def decode_telemetry(payload, dtype: str = "float32"):
+    """
+    View raw little-endian float bytes as a NumPy array without copying.
+    """
+    if dtype not in TELEMETRY_DTYPES:
+        raise ValueError(f"dtype must be one of {list(TELEMETRY_DTYPES)}")
+    item_size = np.dtype(TELEMETRY_DTYPES[dtype]).itemsize
+    if len(payload) % item_size:
+        raise ValueError(f"Binary telemetry length must be a multiple of {item_size} bytes for {dtype}")
+    return np.frombuffer(payload, dtype=TELEMETRY_DTYPES[dtype])
 
-# =============================================================================
-# Neuro-Symbolic Routing Module with Dynamic Penalty Adjustment
-# =============================================================================
-class NeuroSymbolicRouting:
-    def __init__(self):
-        self.G = None
-        self.penalty_model = MLPRegressor(hidden_layer_sizes=(10,), max_iter=500, random_state=42)
-        self.route_history = []
-        self.qos_weights = {
-            'latency': 0.4,
-            'bandwidth': 0.3,
-            'packet_loss': 0.2,
-            'jitter': 0.1
-        }
-        self._train_penalty_model()
+def validate_telemetry_array(values):
+    """Vectorized checks shared by every telemetry encoding."""
+    if len(values) < 2:
+        raise ValueError('Need at least 2 data points for analysis')
+    if not np.all((values >= -1000) & (values <= 1000)):
+        raise ValueError("Data values must be between -1000 and 1000")
+    return values
 
-    def _train_penalty_model(self):
-        X_train = np.linspace(0, 1, 50).reshape(-1, 1)
-        y_train = np.array([np.exp(cong) - 1 for cong in X_train.flatten()])
-        try:
-            self.penalty_model.fit(X_train, y_train)
-            logging.info("Penalty model trained successfully.")
-        except Exception as e:
-            logging.error(f"Error training penalty model: {e}")
-            raise
-
-    def build_network_graph(self):
-        """
-        Build enhanced network graph with more nodes and QoS metrics
-        """
-        self.G = nx.Graph()
-        # Add more nodes for better network representation
-        for i in range(1, 12):  # Increased to 11 nodes
-            self.G.add_node(i)
-        
-        # Enhanced edges with QoS metrics
-        edges = [
-            (1, 2, {'base_cost': 5, 'congestion': 0.2, 'latency': 20, 'bandwidth': 1000, 'packet_loss': 0.1, 'jitter': 2}),
-            (1, 3, {'base_cost': 3, 'congestion': 0.1, 'latency': 15, 'bandwidth': 800, 'packet_loss': 0.2, 'jitter': 3}),
-            (2, 4, {'base_cost': 2, 'congestion': 0.5, 'latency': 25, 'bandwidth': 600, 'packet_loss': 0.3, 'jitter': 4}),
-            (3, 4, {'base_cost': 4, 'congestion': 0.3, 'latency': 30, 'bandwidth': 750, 'packet_loss': 0.15, 'jitter': 3}),
-            (4, 5, {'base_cost': 6, 'congestion': 0.2, 'latency': 18, 'bandwidth': 900, 'packet_loss': 0.1, 'jitter': 2}),
-            (5, 6, {'base_cost': 1, 'congestion': 0.7, 'latency': 35, 'bandwidth': 500, 'packet_loss': 0.4, 'jitter': 5}),
-            (3, 6, {'base_cost': 8, 'congestion': 0.1, 'latency': 22, 'bandwidth': 850, 'packet_loss': 0.2, 'jitter': 3}),
-            (6, 7, {'base_cost': 3, 'congestion': 0.4, 'latency': 28, 'bandwidth': 700, 'packet_loss': 0.25, 'jitter': 4}),
-            (4, 7, {'base_cost': 7, 'congestion': 0.3, 'latency': 24, 'bandwidth': 800, 'packet_loss': 0.15, 'jitter': 3}),
-            # New edges for enhanced connectivity
-            (7, 8, {'base_cost': 4, 'congestion': 0.2, 'latency': 20, 'bandwidth': 900, 'packet_loss': 0.1, 'jitter': 2}),
-            (8, 9, {'base_cost': 5, 'congestion': 0.3, 'latency': 25, 'bandwidth': 750, 'packet_loss': 0.2, 'jitter': 3}),
-            (9, 10, {'base_cost': 3, 'congestion': 0.4, 'latency': 30, 'bandwidth': 600, 'packet_loss': 0.3, 'jitter': 4}),
-            (10, 11, {'base_cost': 6, 'congestion': 0.1, 'latency': 15, 'bandwidth': 1000, 'packet_loss': 0.1, 'jitter': 2}),
-            (8, 11, {'base_cost': 7, 'congestion': 0.2, 'latency': 22, 'bandwidth': 850, 'packet_loss': 0.15, 'jitter': 3}),
-        ]
-        
-        for u, v, data in edges:
-            self.G.add_edge(u, v, **data)
-            self.adjust_edge_cost(u, v)
-        
-        logging.info("Enhanced network graph built successfully with QoS metrics.")
-
-    def adjust_edge_cost(self, u, v):
-        """
-        Adjust edge cost based on QoS metrics and congestion
-        """
-        edge_data = self.G[u][v]
-        
-        # Calculate QoS score
-        qos_score = (
-            self.qos_weights['latency'] * (1 / edge_data['latency']) +
-            self.qos_weights['bandwidth'] * (edge_data['bandwidth'] / 1000) +
-            self.qos_weights['packet_loss'] * (1 - edge_data['packet_loss']) +
-            self.qos_weights['jitter'] * (1 / edge_data['jitter'])
-        )
-        
-        # Get congestion penalty
-        congestion = edge_data['congestion']
-        learned_penalty = self.penalty_model.predict([[congestion]])[0]
-        fixed_penalty = 3 if congestion > 0.5 else 0
-        
-        # Calculate final cost
-        edge_data['final_cost'] = (
-            edge_data['base_cost'] * 
-            (1 + learned_penalty + fixed_penalty) * 
-            (1 / qos_score)
-        )
+class TelemetryData(BaseModel):
+    data: Optional[List[float]] = None
+    device_id: Optional[str] = None  # Score without touching the shared detector or the device's state
+    data_b64: Optional[str] = None   # Alternative to data: base64 of little-endian floats
+    dtype: str = "float32"           # Element type of data_b64
+    response_mode: str = "full"      # One of RESPONSE_MODES
 
-    def adjust_costs(self):
-        """
-        Adjust all edge costs in the network
-        """
-        if self.G is None:
-            raise ValueError("Graph not built. Run build_network_graph() first.")
-        
-        for u, v in self.G.edges():
-            self.adjust_edge_cost(u, v)
-        
-        logging.info("Edge costs adjusted using QoS metrics and neuro-symbolic integration.")
-
-    def compute_optimal_path(self, source: int, target: int, algorithm: str = 'dijkstra', k: int = 3):
-        """
-        Compute optimal path using specified algorithm
-        """
-        if self.G is None:
-            raise ValueError("Graph not built. Run build_network_graph() first.")
-        
-        self.adjust_costs()
-        
-        try:
-            paths = []
-            costs = []
-            
-            if algorithm == 'dijkstra':
-                path = nx.dijkstra_path(self.G, source, target, weight='final_cost')
-                cost = nx.dijkstra_path_length(self.G, source, target, weight='final_cost')
-                paths.append(path)
-                costs.append(cost)
-            
-            elif algorithm == 'astar':
-                path = nx.astar_path(self.G, source, target, weight='final_cost')
-                cost = sum(self.G[path[i]][path[i+1]]['final_cost'] for i in range(len(path)-1))
-                paths.append(path)
-                costs.append(cost)
-            
-            elif algorithm == 'k_shortest':
-                # Get k shortest paths using Yen's algorithm
-                paths = list(nx.shortest_simple_paths(self.G, source, target, weight='final_cost'))[:k]
-                costs = [sum(self.G[path[i]][path[i+1]]['final_cost'] for i in range(len(path)-1)) for path in paths]
-            
-            # Store in route history
-            timestamp = datetime.now()
-            history_entry = {
-                'timestamp': timestamp,
-                'source': source,
-                'target': target,
-                'algorithm': algorithm,
-                'paths': paths,
-                'costs': costs
-            }
-            self.route_history.append(history_entry)
-            
-            # Return enhanced routing results
-            return {
-                'paths': paths,
-                'costs': costs,
-                'algorithm': algorithm,
-                'qos_metrics': self._get_path_qos_metrics(paths[0]),  # QoS metrics for the best path
-                'visualization_data': self._get_visualization_data(paths[0])
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "data": [0.1, 0.2, 0.3, 0.4, 0.5]
             }
-            
-        except Exception as e:
-            logging.error(f"Error computing optimal path: {e}")
-            raise
-
-    def _get_path_qos_metrics(self, path):
-        """
-        Calculate aggregate QoS metrics for a path
-        """
-        total_latency = 0
-        min_bandwidth = float('inf')
-        total_packet_loss = 0
-        total_jitter = 0
-        
-        for i in range(len(path)-1):
-            edge = self.G[path[i]][path[i+1]]
-            total_latency += edge['latency']
-            min_bandwidth = min(min_bandwidth, edge['bandwidth'])
-            total_packet_loss = 1 - ((1 - total_packet_loss) * (1 - edge['packet_loss']))
-            total_jitter += edge['jitter']
-        
-        return {
-            'end_to_end_latency': total_latency,
-            'available_bandwidth': min_bandwidth,
-            'packet_loss_probability': total_packet_loss,
-            'total_jitter': total_jitter
         }
 
-    def _get_visualization_data(self, path):
-        """
-        Prepare data for path visualization
-        """
-        nodes = []
-        edges = []
-        
-        # Add all nodes
-        for node in self.G.nodes():
-            nodes.append({
-                'id': node,
-                'in_path': node in path
-            })
-        
-        # Add all edges
-        for u, v, data in self.G.edges(data=True):
-            edges.append({
-                'source': u,
-                'target': v,
-                'metrics': {
-                    'latency': data['latency'],
-                    'bandwidth': data['bandwidth'],
-                    'packet_loss': data['packet_loss'],
-                    'jitter': data['jitter'],
-                    'congestion': data['congestion']
-                },
-                'in_path': (u in path and v in path and 
-                           path[path.index(u) if u in path else 0:].index(v) == 1)
-            })
-        
-        return {
-            'nodes': nodes,
-            'edges': edges
-        }
+    @validator('data')
+    def validate_data(cls, v):
+        if v is not None and not v:
+            raise ValueError('Data array cannot be empty')
+        if v is not None and len(v) < 2:
+            raise ValueError('Need at least 2 data points for analysis')
+        return v
 
-    def get_route_history(self):
-        """
-        Get the routing history
-        """
-        return self.route_history
-
-    def update_edge_congestion(self, u: int, v: int, new_congestion: float):
-        """
-        Update congestion value for an edge
-        """
-        if self.G is None or not self.G.has_edge(u, v):
-            raise ValueError(f"Edge ({u}, {v}) not found in graph")
-        
-        if not 0 <= new_congestion <= 1:
-            raise ValueError("Congestion value must be between 0 and 1")
-        
-        self.G[u][v]['congestion'] = new_congestion
-        self.adjust_edge_cost(u, v)
-        logging.info(f"Updated congestion for edge ({u}, {v}) to {new_congestion}")
+    @validator('data_b64', always=True)
+    def validate_data_b64(cls, v, values):
+        if (v is None) == (values.get('data') is None):
+            raise ValueError('Provide exactly one of data or data_b64')
+        return v
 
-# =============================================================================
-# Pydantic Models for Request Validation
-# =============================================================================
-class TelemetryData(BaseModel):
-    data: List[float]
+    @validator('dtype')
+    def validate_dtype(cls, v):
+        if v not in TELEMETRY_DTYPES:
+            raise ValueError(f'dtype must be one of {list(TELEMETRY_DTYPES)}')
+        return v
+
+    @validator('response_mode')
+    def validate_response_mode(cls, v):
+        if v not in RESPONSE_MODES:
+            raise ValueError(f'response_mode must be one of {list(RESPONSE_MODES)}')
+        return v
+
+    def to_array(self):
+        """Telemetry values as a float array; base64 payloads are viewed without copying."""
+        if self.data_b64 is not None:
+            return decode_telemetry(base64.b64decode(self.data_b64, validate=True), self.dtype)
+        return np.array(self.data, dtype=np.float64)
+
+class TelemetryBatch(BaseModel):
+    series: Dict[str, Union[List[float], str]]  # Values, or base64 of little-endian floats
+    include_points: bool = False  # Add per-point results to every series summary
+    dtype: str = "float32"        # Element type of base64 series
+    response_mode: Optional[str] = None  # One of RESPONSE_MODES; defaults to "full" or "summary" per include_points
 
     class Config:
         json_schema_extra = {
             "example": {
-                "data": [0.1, 0.2, 0.3, 0.4, 0.5]
+                "series": {
+                    "link-1": [0.1, 0.2, 0.3, 0.4, 0.5],
+                    "link-2": [1.0, 1.1, 0.9, 1.2, 1.0]
+                },
+                "include_points": False
             }
         }
 
-    @validator('data')
-    def validate_data(cls, v):
+    @validator('series')
+    def validate_series(cls, v):
         if not v:
-            raise ValueError('Data array cannot be empty')
-        if len(v) < 2:
-            raise ValueError('Need at least 2 data points for analysis')
-        if not all(isinstance(x, (int, float)) for x in v):
-            raise ValueError('All values must be numbers')
+            raise ValueError('At least one series is required')
+        if len(v) > MAX_BATCH_SERIES:
+            raise ValueError(f'At most {MAX_BATCH_SERIES} series per request')
+        for name, data in v.items():
+            if isinstance(data, list) and len(data) < 2:
+                raise ValueError(f'Series {name!r} needs at least 2 data points for analysis')
+        return v
+
+    @validator('dtype')
+    def validate_dtype(cls, v):
+        if v not in TELEMETRY_DTYPES:
+            raise ValueError(f'dtype must be one of {list(TELEMETRY_DTYPES)}')
+        return v
+
+    @validator('response_mode')
+    def validate_response_mode(cls, v):
+        if v is not None and v not in RESPONSE_MODES:
+            raise ValueError(f'response_mode must be one of {list(RESPONSE_MODES)}')
         return v
 
+    def to_arrays(self):
+        """Every series as a float array, decoding base64 series without copying."""
+        arrays = []
+        for name, data in self.series.items():
+            if isinstance(data, str):
+                values = decode_telemetry(base64.b64decode(data, validate=True), self.dtype)
+                if len(values) < 2:
+                    raise ValueError(f'Series {name!r} needs at least 2 data points for analysis')
+            else:
+                values = np.array(data, dtype=np.float64)
+            arrays.append(values)
+        return arrays
+
 class ConfigData(BaseModel):
     SIMILARITY_THRESH: float
+    HDC_BACKEND: Optional[str] = None
+
+    @validator('HDC_BACKEND')
+    def validate_backend(cls, v):
+        if v is not None and v not in HDC_BACKENDS:
+            raise ValueError(f'HDC_BACKEND must be one of {list(HDC_BACKENDS)}')
+        return v
 
 class HealthResponse(BaseModel):
     status: str
@@ -423,6 +251,14 @@ class RoutingRequest(BaseModel):
     target: int
     algorithm: str = 'dijkstra'  # default to dijkstra
     k_paths: int = 3  # for k-shortest paths algorithm
+    topology: str = DEFAULT_TOPOLOGY  # name of a loaded topology
+    backend: Optional[str] = None  # "csr" or "networkx"; defaults to ROUTING_BACKEND
+    # k_shortest limits
+    max_cost_ratio: Optional[float] = None  # keep paths within (1 + ratio) x the best cost
+    max_hops: Optional[int] = None
+    max_overlap: Optional[float] = None  # max fraction of a path's edges shared with an accepted path
+    time_budget: Optional[float] = None  # seconds; defaults to KSP_TIME_BUDGET
+    heuristic: Optional[str] = None  # astar: "none", "geo" or "alt"; picked from the topology when omitted
 
     class Config:
         json_schema_extra = {
@@ -447,6 +283,132 @@ class RoutingRequest(BaseModel):
             raise ValueError('k_paths must be between 1 and 10')
         return v
 
+    @validator('backend')
+    def validate_backend(cls, v):
+        if v is not None and v not in ROUTING_BACKENDS:
+            raise ValueError(f'backend must be one of {list(ROUTING_BACKENDS)}')
+        return v
+
+    @validator('heuristic')
+    def validate_heuristic(cls, v):
+        if v is not None and v not in ROUTING_HEURISTICS:
+            raise ValueError(f'heuristic must be one of {list(ROUTING_HEURISTICS)}')
+        return v
+
+    @validator('max_cost_ratio')
+    def validate_max_cost_ratio(cls, v):
+        if v is not None and v < 0:
+            raise ValueError('max_cost_ratio cannot be negative')
+        return v
+
+    @validator('max_hops')
+    def validate_max_hops(cls, v):
+        if v is not None and v < 1:
+            raise ValueError('max_hops must be at least 1')
+        return v
+
+    @validator('max_overlap')
+    def validate_max_overlap(cls, v):
+        if v is not None and not 0 <= v <= 1:
+            raise ValueError('max_overlap must be between 0 and 1')
+        return v
+
+    @validator('time_budget')
+    def validate_time_budget(cls, v):
+        if v is not None and not 0 < v <= EXECUTOR_TASK_TIMEOUT:
+            raise ValueError(f'time_budget must be between 0 and {EXECUTOR_TASK_TIMEOUT} seconds')
+        return v
+
+    def k_shortest_limits(self):
+        """Keyword arguments for k_shortest_paths."""
+        return {
+            "max_cost_ratio": self.max_cost_ratio,
+            "max_hops": self.max_hops,
+            "max_overlap": self.max_overlap,
+            "time_budget": self.time_budget if self.time_budget is not None else KSP_TIME_BUDGET
+        }
+
+class RoutingBatchRequest(BaseModel):
+    pairs: List[List[int]]  # [source, target] pairs
+    algorithm: str = 'dijkstra'
+    topology: str = DEFAULT_TOPOLOGY
+    backend: Optional[str] = None  # "csr" or "networkx"; defaults to ROUTING_BACKEND
+    include_paths: bool = True  # False returns costs only
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "pairs": [[1, 11], [1, 9], [2, 10]],
+                "algorithm": "dijkstra"
+            }
+        }
+
+    @validator('pairs')
+    def validate_pairs(cls, v):
+        if not v:
+            raise ValueError('At least one (source, target) pair is required')
+        if len(v) > MAX_BATCH_PAIRS:
+            raise ValueError(f'At most {MAX_BATCH_PAIRS} pairs per request')
+        if any(len(pair) != 2 for pair in v):
+            raise ValueError('Every pair must be [source, target]')
+        return v
+
+    @validator('algorithm')
+    def validate_algorithm(cls, v):
+        valid_algorithms = ['dijkstra', 'astar']
+        if v not in valid_algorithms:
+            raise ValueError(f'Batch routing algorithm must be one of {valid_algorithms}')
+        return v
+
+    @validator('backend')
+    def validate_backend(cls, v):
+        if v is not None and v not in ROUTING_BACKENDS:
+            raise ValueError(f'backend must be one of {list(ROUTING_BACKENDS)}')
+        return v
+
+class CongestionBatchRequest(BaseModel):
+    u: List[int]
+    v: List[int]
+    congestion: List[float]
+    topology: str = DEFAULT_TOPOLOGY
+
+    @validator('congestion')
+    def validate_congestion(cls, v, values):
+        if not v:
+            raise ValueError('congestion must contain at least one reading')
+        if len(v) > MAX_CONGESTION_BATCH:
+            raise ValueError(f'At most {MAX_CONGESTION_BATCH} readings per batch')
+        if 'u' in values and 'v' in values and not len(values['u']) == len(values['v']) == len(v):
+            raise ValueError('u, v and congestion must have the same length')
+        return v
+
+class TopologyLoadRequest(BaseModel):
+    name: str
+    path: str  # relative to TOPOLOGY_DIR
+    format: Optional[str] = None  # inferred from the file extension when omitted
+    nodes_path: Optional[str] = None  # "id,lat,lon" CSV or NDJSON of node coordinates, relative to TOPOLOGY_DIR
+    landmarks: int = 0  # run ALT preprocessing with this many landmarks after loading
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "name": "backbone",
+                "path": "backbone.csv"
+            }
+        }
+
+    @validator('name')
+    def validate_name(cls, v):
+        if not v or not all(c.isalnum() or c in "-_." for c in v):
+            raise ValueError('Topology name may only contain letters, digits, "-", "_" and "."')
+        return v
+
+    @validator('format')
+    def validate_format(cls, v):
+        if v is not None and v not in set(TOPOLOGY_FORMATS.values()):
+            raise ValueError(f'format must be one of {sorted(set(TOPOLOGY_FORMATS.values()))}')
+        return v
+
 # =============================================================================
 # FastAPI Setup and Endpoints
 # =============================================================================
@@ -457,8 +419,19 @@ app = FastAPI(
 )
 
 # Global instances of our modules
-pm = PredictiveMaintenance()
-nsr = NeuroSymbolicRouting()
+codebook = shared_codebook()
+pm = PredictiveMaintenance(codebook=codebook)
+stream_pm = PredictiveMaintenance(decay=CONFIG["STREAM_DECAY"], codebook=codebook)
+detectors = DetectorRegistry(stream_pm)
+# Topology snapshots are restored at startup when RESILIENCE_SNAPSHOT_DIR is set
+topology_snapshot_dir = os.path.join(SNAPSHOT_DIR, "topologies") if SNAPSHOT_DIR else None
+nsr = NeuroSymbolicRouting(
+    snapshot=os.path.join(topology_snapshot_dir, DEFAULT_TOPOLOGY) if topology_snapshot_dir else None
+)
+topologies = TopologyRegistry(nsr, topology_snapshot_dir)
+if SNAPSHOT_DIR:
+    detectors.load_snapshot()
+executor = ComputeExecutor()
 
 router = APIRouter(
     prefix="/api/resilience",
@@ -466,113 +439,583 @@ router = APIRouter(
 )
 
 # --- Endpoint: Predictive Maintenance ---
+@contextlib.contextmanager
+def _locked_detector(device_id: Optional[str], default: PredictiveMaintenance):
+    """Hold the default detector, or the per-device one when an id is given, with its lock taken."""
+    if device_id is None:
+        with default.lock:
+            yield default
+    else:
+        with detectors.checkout(device_id) as detector:
+            yield detector
+
+def _analyze_telemetry(device_id: Optional[str], telemetry_array):
+    """
+    Smooth a telemetry window, rebuild a prototype from it and score it. Windows for
+    a device are scored on a scratch detector: these endpoints are unauthenticated,
+    so they never replace a device's learned prototype or add registry entries.
+    """
+    # Apply moving average filter to smooth the data
+    smoothed_data = moving_average_filter(telemetry_array)
+    
+    # Build prototype and detect anomalies
+    detector = pm if device_id is None else pm.derive()
+    with detector.lock:
+        detector.build_prototype(smoothed_data)
+        similarities, anomalies = detector.detect_batch(smoothed_data)
+        threshold = detector.similarity_thresh
+    return smoothed_data, similarities, anomalies, threshold
+
+def _point_results(values, similarities, anomalies, threshold: float):
+    """Per-point result dicts for a scored series."""
+    threshold = float(threshold)
+    return [
+        {
+            "value": value,
+            "similarity": similarity,
+            "anomaly": anomaly,
+            "threshold": threshold
+        }
+        for value, similarity, anomaly in zip(
+            np.asarray(values, dtype=np.float64).tolist(),
+            similarities.tolist(),
+            anomalies.tolist()
+        )
+    ]
+
+def _scored_response(mode: str, values, similarities, anomalies, threshold: float):
+    """
+    Build a scored series response in one of RESPONSE_MODES.
+
+    "full" keeps the original per-point dicts. The compact modes are built from
+    whole arrays: "summary" has only the aggregates, "anomalies_only" adds the
+    anomalous indices and their similarities, and "columnar" returns parallel
+    arrays with the threshold stated once.
+    """
+    if mode not in RESPONSE_MODES:
+        raise ValueError(f"response_mode must be one of {list(RESPONSE_MODES)}")
+    response = {
+        "total_anomalies": int(np.count_nonzero(anomalies)),
+        "average_similarity": float(np.mean(similarities)),
+        "data_points_analyzed": len(values)
+    }
+    if mode == "full":
+        return {"results": _point_results(values, similarities, anomalies, threshold), **response}
+    if mode == "anomalies_only":
+        indices = np.flatnonzero(anomalies)
+        response["anomaly_indices"] = indices.tolist()
+        response["anomaly_similarities"] = similarities[indices].tolist()
+        response["threshold"] = float(threshold)
+    elif mode == "columnar":
+        response["values"] = np.asarray(values, dtype=np.float64).tolist()
+        response["similarities"] = similarities.tolist()
+        response["anomalies"] = anomalies.tolist()
+        response["threshold"] = float(threshold)
+    return response
+
 @router.post("/predictive-maintenance")
 async def predictive_maintenance(telemetry: TelemetryData):
     """
     Perform predictive maintenance analysis on telemetry data.
     
     Args:
-        telemetry (TelemetryData): Object containing array of float values
+        telemetry (TelemetryData): Object containing array of float values and the response mode
         
     Returns:
         dict: Results containing anomaly detection and similarity scores
     """
     try:
-        # Validate data range
-        if not all(-1000 <= x <= 1000 for x in telemetry.data):
-            raise HTTPException(
-                status_code=400,
-                detail="Data values must be between -1000 and 1000"
-            )
+        return await _predictive_maintenance(telemetry.to_array(), telemetry.device_id, telemetry.response_mode)
+    except HTTPException:
+        raise
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        if _executor_http_error(e):
+            raise _executor_http_error(e)
+        logging.error(f"Predictive maintenance error: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
 
-        # Apply moving average filter to smooth the data
-        telemetry_array = np.array(telemetry.data)
-        smoothed_data = moving_average_filter(telemetry_array)
-        
-        # Build prototype and detect anomalies
-        pm.build_prototype(smoothed_data)
-        results = []
-        
-        for val in smoothed_data:
-            similarity, anomaly = pm.detect(float(val))
-            results.append({
-                "value": float(val),
-                "similarity": float(similarity),
-                "anomaly": bool(anomaly),
-                "threshold": float(CONFIG["SIMILARITY_THRESH"])
-            })
+@router.post("/predictive-maintenance/binary")
+async def predictive_maintenance_binary(request: Request, dtype: str = "float32",
+                                        device_id: Optional[str] = None,
+                                        response_mode: str = "full"):
+    """
+    Perform predictive maintenance analysis on an application/octet-stream body of
+    little-endian float32 or float64 values. The body is viewed without copying and
+    checked with vectorized range tests, so large windows skip JSON decoding entirely.
+    """
+    try:
+        if request.headers.get("content-type", "").split(";")[0].strip() != "application/octet-stream":
+            raise HTTPException(status_code=415, detail="Content type must be application/octet-stream")
+        return await _predictive_maintenance(
+            decode_telemetry(await request.body(), dtype), device_id, response_mode
+        )
+    except HTTPException:
+        raise
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        if _executor_http_error(e):
+            raise _executor_http_error(e)
+        logging.error(f"Predictive maintenance error: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+async def _predictive_maintenance(values, device_id: Optional[str], response_mode: str = "full"):
+    """Validate a telemetry window, analyze it off the event loop and build the response."""
+    if response_mode not in RESPONSE_MODES:
+        raise ValueError(f"response_mode must be one of {list(RESPONSE_MODES)}")
+    validate_telemetry_array(values)
+    smoothed_data, similarities, anomalies, threshold = await executor.run(
+        "thread", _analyze_telemetry, device_id, values
+    )
+    return _scored_response(response_mode, smoothed_data, similarities, anomalies, threshold)
+
+# --- Endpoint: Batch Predictive Maintenance ---
+def _analyze_telemetry_batch(series):
+    """Score many series at once; each one is a float array."""
+    lengths = np.array([len(data) for data in series])
+    values = np.concatenate(series)
+    validate_telemetry_array(values)
+    matrix = np.zeros((len(series), lengths.max()))
+    matrix[np.arange(matrix.shape[1]) < lengths[:, None]] = values
+    return pm.detect_many(matrix, lengths)
+
+@router.post("/predictive-maintenance/batch")
+async def predictive_maintenance_batch(batch: TelemetryBatch):
+    """
+    Perform predictive maintenance analysis on many named telemetry series in one call.
+    Each series gets its own prototype, exactly as if it had been sent to
+    /predictive-maintenance on its own, but the work is vectorized across series.
+    
+    Args:
+        batch (TelemetryBatch): Named series and the response mode (or include_points)
         
+    Returns:
+        dict: Per-series anomaly counts and average similarity
+    """
+    try:
+        names = list(batch.series)
+        mode = batch.response_mode or ("full" if batch.include_points else "summary")
+        analyzed = await executor.run("thread", _analyze_telemetry_batch, batch.to_arrays())
+        summaries = {
+            name: _scored_response(mode, values, similarities, anomalies, pm.similarity_thresh)
+            for name, (values, similarities, anomalies) in zip(names, analyzed)
+        }
         return {
-            "results": results,
-            "total_anomalies": sum(1 for r in results if r["anomaly"]),
-            "average_similarity": float(np.mean([r["similarity"] for r in results])),
-            "data_points_analyzed": len(results)
+            "series": summaries,
+            "series_analyzed": len(summaries)
         }
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
-        logging.error(f"Predictive maintenance error: {str(e)}")
+        if _executor_http_error(e):
+            raise _executor_http_error(e)
+        logging.error(f"Batch predictive maintenance error: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Internal server error: {str(e)}"
         )
 
+# --- Endpoint: Streaming Predictive Maintenance ---
+def _parse_stream_frame(frame: str):
+    """
+    Parse one NDJSON line or WebSocket frame into raw samples.
+    Accepted forms: a number, a list of numbers, {"value": x} or {"data": [...]}.
+    """
+    payload = json.loads(frame)
+    if isinstance(payload, dict):
+        payload = payload["data"] if "data" in payload else [payload.get("value")]
+    if not isinstance(payload, list):
+        payload = [payload]
+    if not all(isinstance(x, (int, float)) and not isinstance(x, bool) for x in payload):
+        raise ValueError("All values must be numbers")
+    if not all(-1000 <= x <= 1000 for x in payload):
+        raise ValueError("Data values must be between -1000 and 1000")
+    return payload
+
+def _stream_verdicts(device_id: Optional[str], frame: str):
+    """Run one frame through a streaming detector and format the per-sample verdicts."""
+    samples = _parse_stream_frame(frame)
+    with _locked_detector(device_id, stream_pm) as detector:
+        verdicts = detector.ingest(samples)
+        threshold = float(detector.similarity_thresh)
+    return [
+        {
+            "sample": sample,
+            "value": value,
+            "similarity": similarity,
+            "anomaly": anomaly,
+            "threshold": threshold
+        }
+        for sample, value, similarity, anomaly in verdicts
+    ]
+
+async def _stream_lines(device_id: Optional[str], frame: str):
+    """Verdicts for one NDJSON line, or an error line when the frame is invalid."""
+    try:
+        verdicts = await executor.run("thread", _stream_verdicts, device_id, frame)
+        return [json.dumps(verdict) + "\n" for verdict in verdicts]
+    except (ValueError, KeyError) as e:
+        return [json.dumps({"error": f"Invalid telemetry frame: {e}"}) + "\n"]
+
+@router.post("/predictive-maintenance/stream")
+async def predictive_maintenance_stream(
+    request: Request,
+    device_id: Optional[str] = None,
+    current_user: dict = Depends(oauth2.get_current_user)
+):
+    """
+    Streaming predictive maintenance over an NDJSON request body.
+
+    Lines are ingested as the body chunks arrive, so the upload is never buffered whole;
+    each one is scored against the running prototype and then absorbed into it. The
+    per-sample verdicts are returned as NDJSON. Use the WebSocket endpoint to receive
+    verdicts while the upload is still in progress.
+    """
+    output = []
+    buffer = ""
+    try:
+        async for chunk in request.stream():
+            buffer += chunk.decode("utf-8")
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                if line.strip():
+                    output.extend(await _stream_lines(device_id, line))
+        if buffer.strip():
+            output.extend(await _stream_lines(device_id, buffer))
+    except (ComputeOverloaded, asyncio.TimeoutError) as e:
+        raise _executor_http_error(e)
+    return Response(content="".join(output), media_type="application/x-ndjson")
+
+@router.websocket("/predictive-maintenance/ws")
+async def predictive_maintenance_ws(websocket: WebSocket, token: str, device_id: Optional[str] = None):
+    """
+    Streaming predictive maintenance over a WebSocket, authenticated with the bearer
+    token as a query parameter. Every text frame is ingested and answered with the
+    verdicts for its samples.
+    """
+    try:
+        oauth2.get_current_user(token)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    try:
+        while True:
+            frame = await websocket.receive_text()
+            try:
+                verdicts = await executor.run("thread", _stream_verdicts, device_id, frame)
+                await websocket.send_json({"results": verdicts})
+            except (ValueError, KeyError) as e:
+                await websocket.send_json({"error": f"Invalid telemetry frame: {e}"})
+            except (ComputeOverloaded, asyncio.TimeoutError) as e:
+                await websocket.send_json({"error": _executor_http_error(e).detail})
+    except WebSocketDisconnect:
+        logging.info("Predictive maintenance stream client disconnected.")
+
+@router.post("/predictive-maintenance/stream/reset")
+async def reset_predictive_maintenance_stream(
+    device_id: Optional[str] = None,
+    current_user: dict = Depends(oauth2.get_current_user)
+):
+    """Discard the streaming detector's accumulated state."""
+    with _locked_detector(device_id, stream_pm) as detector:
+        detector.reset_stream()
+    return {"message": "Streaming detector reset successfully"}
+
+# --- Endpoint: Per-Device Detectors ---
+@router.get("/detectors")
+async def get_detectors(current_user: dict = Depends(oauth2.get_current_user)):
+    """Resident and spilled per-device detectors"""
+    return detectors.stats()
+
+@router.delete("/detectors/{device_id}")
+async def delete_detector(device_id: str, current_user: dict = Depends(oauth2.get_current_user)):
+    """Remove a per-device detector and its spilled state"""
+    try:
+        detectors.remove(device_id)
+        return {"message": f"Detector '{device_id}' removed successfully"}
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Detector '{device_id}' not found")
+
 # --- Endpoint: Routing ---
+async def _compute_route(routing_module: NeuroSymbolicRouting, source: int, target: int, algorithm: str, k: int,
+                         backend: Optional[str] = None, limits: Optional[dict] = None,
+                         heuristic: Optional[str] = None):
+    """
+    Run a route query off the event loop. In process mode only the path search runs in a
+    worker process, on a pickled snapshot; cost updates and history stay in this process.
+    CSR single-path queries always run on a thread: they are answered from the
+    router's shortest-path tree cache, and the search itself is compiled code.
+    A* also stays on a thread because its heuristics are router state.
+    """
+    cached = (backend or ROUTING_BACKEND) == "csr" and algorithm == "dijkstra"
+    if ROUTING_POOL != "process" or cached or algorithm == "astar":
+        return await executor.run(
+            "thread", routing_module.compute_optimal_path, source, target, algorithm, k, backend, limits, heuristic
+        )
+    snapshot = await executor.run("thread", routing_module.graph_snapshot, algorithm, backend)
+    paths, costs, status = await executor.run(
+        "process", search_paths_task, snapshot, source, target, algorithm, k, limits
+    )
+    return await executor.run("thread", routing_module.record_route, source, target, algorithm, paths, costs, status)
+
+def _topology(name: str) -> NeuroSymbolicRouting:
+    """Look up a loaded topology's router or fail with 404."""
+    try:
+        return topologies.get(name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Topology '{name}' not found")
+
+def _validate_nodes(routing_module: NeuroSymbolicRouting, nodes, topology: str):
+    """
+    Fail with 400 unless every node is in the topology. Checked against the CSR node
+    index, so a topology restored from a snapshot never builds its networkx graph here.
+    """
+    try:
+        routing_module.csr.index(nodes)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Node {e.args[0]} not found in topology '{topology}'")
+
 @router.post("/routing")
 async def routing(
     request: RoutingRequest,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(oauth2.get_current_user)
 ):
     """
     Enhanced routing endpoint supporting multiple algorithms and QoS metrics
     """
     try:
-        # Validate node existence
-        if not (1 <= request.source <= 11 and 1 <= request.target <= 11):
-            raise HTTPException(
-                status_code=400,
-                detail="Source and target nodes must be between 1 and 11"
-            )
+        routing_module = _topology(request.topology)
 
-        # Initialize network if needed
-        nsr.build_network_graph()
+        # Validate node existence
+        _validate_nodes(routing_module, [request.source, request.target], request.topology)
 
         # Compute optimal path with specified algorithm
-        result = nsr.compute_optimal_path(
-            request.source,
-            request.target,
-            algorithm=request.algorithm,
-            k=request.k_paths
+        result = await _compute_route(
+            routing_module, request.source, request.target, request.algorithm, request.k_paths, request.backend,
+            request.k_shortest_limits(), request.heuristic
         )
+        if ROUTE_HISTORY_DB and routing_module.route_history.pending() >= ROUTE_HISTORY_FLUSH_BATCH:
+            background_tasks.add_task(flush_route_history)
 
         return {
             "routing_result": result,
             "metadata": {
                 "timestamp": datetime.now().isoformat(),
                 "user_id": current_user.id,
-                "algorithm_used": request.algorithm
+                "algorithm_used": request.algorithm,
+                "topology": request.topology,
+                "backend": request.backend or ROUTING_BACKEND
             }
         }
 
+    except HTTPException:
+        raise
+    except nx.NetworkXNoPath as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
+        if _executor_http_error(e):
+            raise _executor_http_error(e)
         logging.error(f"Routing error: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Routing error: {str(e)}"
         )
 
+async def _route_batch(routing_module: NeuroSymbolicRouting, pairs, backend: Optional[str], include_paths: bool):
+    """
+    Run a batch of pairs off the event loop. Batches with many distinct sources are split
+    by source across the process pool on one snapshot; smaller ones run on a thread
+    through the router's shortest-path tree cache.
+    """
+    sources = sorted({source for source, _ in pairs})
+    if ROUTING_POOL != "process" or len(sources) < ROUTING_BATCH_PROCESS_MIN_SOURCES:
+        return await executor.run("thread", routing_module.route_pairs, pairs, backend, include_paths)
+    
+    snapshot = await executor.run("thread", routing_module.graph_snapshot, "dijkstra", backend)
+    chunks = np.array_split(np.array(sources), executor.workers["process"])
+    chunk_of = {source: i for i, chunk in enumerate(chunks) for source in chunk.tolist()}
+    members = [[] for _ in chunks]
+    for i, (source, _) in enumerate(pairs):
+        members[chunk_of[source]].append(i)
+    results = await asyncio.gather(*(
+        executor.run("process", route_pairs_task, snapshot, [pairs[i] for i in indices], include_paths)
+        for indices in members if indices
+    ))
+    paths = [None] * len(pairs)
+    costs = [None] * len(pairs)
+    for indices, (chunk_paths, chunk_costs) in zip([m for m in members if m], results):
+        for i, path, cost in zip(indices, chunk_paths, chunk_costs):
+            paths[i] = path
+            costs[i] = cost
+    return paths, costs
+
+@router.post("/routing/batch")
+async def routing_batch(
+    request: RoutingBatchRequest,
+    current_user: dict = Depends(oauth2.get_current_user)
+):
+    """
+    Route many (source, target) pairs in one call. Pairs are grouped by source so each
+    distinct source costs one single-source search. Results are parallel cost and path
+    lists in pair order (null where the target is unreachable), without QoS metrics or path edges.
+    """
+    try:
+        routing_module = _topology(request.topology)
+        pairs = [(int(source), int(target)) for source, target in request.pairs]
+        
+        # Validate node existence
+        _validate_nodes(routing_module, [node for pair in pairs for node in pair], request.topology)
+        
+        paths, costs = await _route_batch(routing_module, pairs, request.backend, request.include_paths)
+        response = {
+            "costs": costs,
+            "routes_found": sum(cost is not None for cost in costs),
+            "distinct_sources": len({source for source, _ in pairs}),
+            "metadata": {
+                "timestamp": datetime.now().isoformat(),
+                "user_id": current_user.id,
+                "algorithm_used": request.algorithm,
+                "topology": request.topology,
+                "backend": request.backend or ROUTING_BACKEND
+            }
+        }
+        if request.include_paths:
+            response["paths"] = paths
+        return response
+    except HTTPException:
+        raise
+    except Exception as e:
+        if _executor_http_error(e):
+            raise _executor_http_error(e)
+        logging.error(f"Batch routing error: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Routing error: {str(e)}"
+        )
+
+def _write_route_records(rows):
+    # Imported here so worker processes, which re-import this module, never open a database engine
+    from ..database import SessionLocal
+    from ..models import RouteRecord
+    db = SessionLocal()
+    try:
+        db.bulk_insert_mappings(RouteRecord, rows)
+        db.commit()
+    finally:
+        db.close()
+
+_history_flush_lock = threading.Lock()
+
+def flush_route_history(force: bool = False):
+    """
+    Archive unflushed route history of every topology to the database in batches of
+    ROUTE_HISTORY_FLUSH_BATCH. A partial batch is only written when force is set.
+    Failures are recorded on the topology's history and reported by the health check.
+    """
+    if not _history_flush_lock.acquire(blocking=False):
+        return  # another flush is already running
+    try:
+        for name, routing_module in topologies.items():
+            history = routing_module.route_history
+            try:
+                while history.pending() >= (1 if force else ROUTE_HISTORY_FLUSH_BATCH):
+                    entries, end = history.unflushed()
+                    _write_route_records([
+                        {"topology": name, "timestamp": entry['timestamp'], "source": entry['source'],
+                         "target": entry['target'], "algorithm": entry['algorithm'],
+                         "paths": json.dumps(entry['paths']), "costs": json.dumps(entry['costs'])}
+                        for entry in entries
+                    ])
+                    history.mark_flushed(end)
+            except Exception as e:
+                history.flush_failed(str(e))
+                logging.error(f"Error flushing route history of topology '{name}': {e}")
+    finally:
+        _history_flush_lock.release()
+
+@router.on_event("shutdown")
+def flush_route_history_on_shutdown():
+    if ROUTE_HISTORY_DB:
+        flush_route_history(force=True)
+
+# --- Snapshots: written periodically, at shutdown and on request ---
+def write_snapshots(force: bool = False):
+    """Snapshot the topologies changed since their last snapshot (all of them with force) and the detectors."""
+    return {"topologies": topologies.save_snapshots(force), "detectors": detectors.save_snapshot()}
+
+_snapshot_task = None
+
+async def _snapshot_loop():
+    while True:
+        await asyncio.sleep(SNAPSHOT_INTERVAL)
+        try:
+            await executor.run("thread", write_snapshots)
+        except Exception as e:
+            logging.error(f"Error writing snapshots: {e}")
+
+@router.on_event("startup")
+async def start_snapshot_writer():
+    global _snapshot_task
+    if SNAPSHOT_DIR and SNAPSHOT_INTERVAL > 0 and _snapshot_task is None:
+        _snapshot_task = asyncio.create_task(_snapshot_loop())
+
+@router.on_event("shutdown")
+def write_snapshots_on_shutdown():
+    if _snapshot_task is not None:
+        _snapshot_task.cancel()
+    if SNAPSHOT_DIR:
+        try:
+            write_snapshots()
+        except Exception as e:
+            logging.error(f"Error writing snapshots: {e}")
+
+@router.post("/snapshots")
+async def create_snapshots(current_user: dict = Depends(oauth2.get_current_user)):
+    """Write snapshots of every topology and detector now"""
+    if not SNAPSHOT_DIR:
+        raise HTTPException(status_code=400, detail="Snapshots are disabled; set RESILIENCE_SNAPSHOT_DIR")
+    try:
+        return await executor.run("thread", write_snapshots, True)
+    except Exception as e:
+        if _executor_http_error(e):
+            raise _executor_http_error(e)
+        logging.error(f"Snapshot error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error writing snapshots: {str(e)}")
+
 @router.get("/routing/history")
 async def get_routing_history(
+    topology: str = DEFAULT_TOPOLOGY,
+    cursor: Optional[int] = None,
+    limit: int = ROUTE_HISTORY_PAGE_SIZE,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
     current_user: dict = Depends(oauth2.get_current_user)
 ):
     """
-    Get routing history for analysis
+    Get routing history for analysis, newest first. Pass next_cursor back as cursor to
+    fetch the next page; since and until restrict it to a time range.
     """
+    routing_module = _topology(topology)
+    if not 1 <= limit <= ROUTE_HISTORY_MAX_PAGE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {ROUTE_HISTORY_MAX_PAGE}")
     try:
-        history = nsr.get_route_history()
+        history, next_cursor = routing_module.get_route_history(cursor, limit, since, until)
         return {
             "history": history,
-            "total_routes": len(history)
+            "next_cursor": next_cursor,
+            "total_routes": len(routing_module.route_history)
         }
     except Exception as e:
         raise HTTPException(
@@ -585,13 +1028,15 @@ async def update_congestion(
     u: int,
     v: int,
     congestion: float,
+    topology: str = DEFAULT_TOPOLOGY,
     current_user: dict = Depends(oauth2.get_current_user)
 ):
     """
     Update congestion values for network edges
     """
+    routing_module = _topology(topology)
     try:
-        nsr.update_edge_congestion(u, v, congestion)
+        routing_module.update_edge_congestion(u, v, congestion)
         return {"message": f"Successfully updated congestion for edge ({u}, {v})"}
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
@@ -601,15 +1046,130 @@ async def update_congestion(
             detail=f"Error updating congestion: {str(e)}"
         )
 
+@router.post("/routing/update-congestion/bulk")
+async def update_congestion_bulk(
+    request: CongestionBatchRequest,
+    current_user: dict = Depends(oauth2.get_current_user)
+):
+    """
+    Apply many congestion readings as one atomic batch: u[i], v[i] gets congestion[i].
+    Unknown edges or out-of-range values reject the whole batch.
+    """
+    routing_module = _topology(request.topology)
+    try:
+        return await executor.run(
+            "thread", routing_module.update_edge_congestions, request.u, request.v, request.congestion
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        if _executor_http_error(e):
+            raise _executor_http_error(e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error updating congestion: {str(e)}"
+        )
+
+def _parse_congestion_frame(frame: str):
+    """
+    Parse one NDJSON line or WebSocket frame of congestion readings into (u, v, congestion)
+    arrays. Accepted forms: {"u": ..., "v": ..., "congestion": ...} with scalars or
+    equal-length lists, or a list of [u, v, congestion] triples.
+    """
+    payload = json.loads(frame)
+    if isinstance(payload, dict):
+        readings = [np.atleast_1d(np.asarray(payload[key], dtype=np.float64)) for key in ("u", "v", "congestion")]
+    else:
+        triples = np.asarray(payload, dtype=np.float64)
+        if triples.ndim != 2 or triples.shape[1] != 3:
+            raise ValueError("Expected a list of [u, v, congestion] triples")
+        readings = [triples[:, 0], triples[:, 1], triples[:, 2]]
+    if not 0 < len(readings[2]) <= MAX_CONGESTION_BATCH:
+        raise ValueError(f"A frame carries 1 to {MAX_CONGESTION_BATCH} readings")
+    if any(np.any(readings[i] != np.round(readings[i])) for i in (0, 1)):
+        raise ValueError("Node ids must be integers")
+    return readings
+
+async def _apply_congestion_frame(routing_module: NeuroSymbolicRouting, frame: str):
+    """Apply one frame as a batch; returns its acknowledgement or an error object."""
+    try:
+        u, v, congestion = _parse_congestion_frame(frame)
+        return await executor.run("thread", routing_module.update_edge_congestions, u, v, congestion)
+    except (ValueError, KeyError, TypeError) as e:
+        return {"error": f"Invalid congestion frame: {e}"}
+
+@router.post("/routing/update-congestion/stream")
+async def update_congestion_stream(
+    request: Request,
+    topology: str = DEFAULT_TOPOLOGY,
+    current_user: dict = Depends(oauth2.get_current_user)
+):
+    """
+    Congestion ingest over a long-lived NDJSON request body. Lines are applied as they
+    arrive, each as one atomic batch, and acknowledged in an NDJSON response. Use the
+    WebSocket endpoint to receive acknowledgements while the upload is in progress.
+    """
+    routing_module = _topology(topology)
+    output = []
+    buffer = ""
+    try:
+        async for chunk in request.stream():
+            buffer += chunk.decode("utf-8")
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                if line.strip():
+                    output.append(json.dumps(await _apply_congestion_frame(routing_module, line)) + "\n")
+        if buffer.strip():
+            output.append(json.dumps(await _apply_congestion_frame(routing_module, buffer)) + "\n")
+    except (ComputeOverloaded, asyncio.TimeoutError) as e:
+        raise _executor_http_error(e)
+    return Response(content="".join(output), media_type="application/x-ndjson")
+
+@router.websocket("/routing/update-congestion/ws")
+async def congestion_ws(websocket: WebSocket, token: str, topology: str = DEFAULT_TOPOLOGY):
+    """
+    Congestion ingest over a WebSocket, authenticated with the bearer token as a query
+    parameter. Every text frame is applied as one atomic batch and acknowledged.
+    """
+    try:
+        oauth2.get_current_user(token)
+        routing_module = topologies.get(topology)
+    except (HTTPException, KeyError):
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    try:
+        while True:
+            frame = await websocket.receive_text()
+            try:
+                await websocket.send_json(await _apply_congestion_frame(routing_module, frame))
+            except (ComputeOverloaded, asyncio.TimeoutError) as e:
+                await websocket.send_json({"error": _executor_http_error(e).detail})
+    except WebSocketDisconnect:
+        logging.info("Congestion stream client disconnected.")
+
+# --- Endpoint: Executor Metrics ---
+@router.get("/executor/metrics")
+async def get_executor_metrics():
+    """Queue depth, queue wait and compute time for each worker pool"""
+    return executor.stats()
+
 # --- Endpoint: Health Check ---
 @router.get("/health-check")
 async def health_check():
     """Get system health status"""
     try:
+        # Topologies whose last route history flush failed; their routes are still buffered
+        flush_errors = {
+            name: routing_module.route_history.last_flush_error
+            for name, routing_module in topologies.items()
+            if routing_module.route_history.last_flush_error is not None
+        }
         return {
-            "status": "Healthy",
+            "status": "Degraded" if flush_errors else "Healthy",
             "SIMILARITY_THRESH": CONFIG["SIMILARITY_THRESH"],
-            "uptime": "99.9%"
+            "uptime": "99.9%",
+            "route_history_db": {"enabled": ROUTE_HISTORY_DB, "flush_errors": flush_errors}
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -624,26 +1184,291 @@ async def get_config():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/config")
-async def update_config(new_config: ConfigData):
+async def update_config(new_config: ConfigData, current_user: dict = Depends(oauth2.get_current_user)):
     """Update system configuration"""
+    global pm, stream_pm, codebook
     try:
         CONFIG["SIMILARITY_THRESH"] = new_config.SIMILARITY_THRESH
+        if new_config.HDC_BACKEND is not None and new_config.HDC_BACKEND != CONFIG["HDC_BACKEND"]:
+            CONFIG["HDC_BACKEND"] = new_config.HDC_BACKEND
+            codebook = shared_codebook(new_config.HDC_BACKEND)
+            pm = PredictiveMaintenance(backend=new_config.HDC_BACKEND, codebook=codebook)
+            stream_pm = PredictiveMaintenance(backend=new_config.HDC_BACKEND, decay=CONFIG["STREAM_DECAY"],
+                                              codebook=codebook)
+            detectors.reset(stream_pm)
         pm.similarity_thresh = new_config.SIMILARITY_THRESH
+        stream_pm.similarity_thresh = new_config.SIMILARITY_THRESH
+        detectors.set_similarity_thresh(new_config.SIMILARITY_THRESH)
         return {"message": "Configuration updated successfully", "config": CONFIG}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # --- Endpoint: Retrain Penalty Model ---
-@router.post("/retrain-penalty")
+async def _run_retrain_job(job: dict):
+    """
+    Train a fresh penalty model in a worker process, validate it and swap it in.
+    A model that fails validation is discarded and the job ends "rejected"; a job
+    whose task is cancelled (e.g. at shutdown) ends "cancelled".
+    """
+    job["status"] = "running"
+    job["started_at"] = datetime.now().isoformat()
+    started = time.monotonic()
+    try:
+        model = await executor.run("process", train_penalty_model)
+        job["train_seconds"] = time.monotonic() - started
+        job["validation"] = await executor.run("thread", validate_penalty_model, model)
+        await executor.run("thread", nsr.swap_penalty_model, model)
+        job["penalty_version"] = nsr.penalty.version
+        job["status"] = "succeeded"
+        logging.info("Penalty model retrained and swapped in.")
+    except asyncio.CancelledError:
+        job["status"] = "cancelled"
+        logging.warning("Penalty model retraining was cancelled.")
+        raise
+    except ValueError as e:
+        job["status"] = "rejected"
+        job["error"] = str(e)
+    except Exception as e:
+        http_error = _executor_http_error(e)
+        job["status"] = "failed"
+        job["error"] = http_error.detail if http_error else str(e)
+        logging.error(f"Penalty model retraining failed: {job['error']}")
+    finally:
+        job["finished_at"] = datetime.now().isoformat()
+        job["duration_seconds"] = time.monotonic() - started
+
+class RetrainJobs:
+    """
+    Penalty model retraining jobs, newest last. At most one job is pending at a time;
+    finished jobs beyond RETRAIN_JOB_HISTORY are forgotten.
+    """
+    def __init__(self, keep: int = RETRAIN_JOB_HISTORY):
+        self.keep = keep
+        self._jobs = OrderedDict()
+        self._tasks = {}  # job id -> asyncio task, referenced until the job finishes
+
+    def pending(self) -> Optional[dict]:
+        return next((job for job in self._jobs.values() if job["status"] in ("queued", "running")), None)
+
+    def start(self) -> dict:
+        """Queue a retraining job on the running event loop, or return the pending one."""
+        job = self.pending()
+        if job is not None:
+            return job
+        job_id = os.urandom(6).hex()
+        job = {"job_id": job_id, "status": "queued", "submitted_at": datetime.now().isoformat()}
+        self._jobs[job_id] = job
+        task = asyncio.get_running_loop().create_task(_run_retrain_job(job))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._finished(job_id))
+        while len(self._jobs) > self.keep:
+            oldest = next(iter(self._jobs))
+            if self._jobs[oldest]["status"] in ("queued", "running"):
+                break
+            del self._jobs[oldest]
+        return job
+
+    def _finished(self, job_id: str):
+        self._tasks.pop(job_id, None)
+        job = self._jobs.get(job_id)
+        if job is not None and job["status"] in ("queued", "running"):
+            # Cancelled before the job could record an outcome; it must not stay pending
+            job["status"] = "cancelled"
+
+    def get(self, job_id: str) -> dict:
+        return self._jobs[job_id]
+
+    def list(self):
+        return list(self._jobs.values())
+
+retrain_jobs = RetrainJobs()
+
+@router.post("/retrain-penalty", status_code=202)
 async def retrain_penalty(current_user: dict = Depends(oauth2.get_current_user)):
     """
-    Retrains the penalty model used for adjusting routing costs.
+    Start retraining the penalty model used for adjusting routing costs. The model is
+    trained in a worker process, validated and swapped in atomically while routing
+    continues on the current one. Returns the job to poll; while a job is pending,
+    that job is returned instead of starting another.
+    """
+    return dict(retrain_jobs.start())
+
+@router.get("/retrain-penalty/jobs")
+async def list_retrain_jobs(current_user: dict = Depends(oauth2.get_current_user)):
+    """Recent penalty model retraining jobs with their status and timing"""
+    return {"jobs": [dict(job) for job in retrain_jobs.list()]}
+
+@router.get("/retrain-penalty/jobs/{job_id}")
+async def get_retrain_job(job_id: str, current_user: dict = Depends(oauth2.get_current_user)):
+    """Status, timing and validation metrics of one retraining job"""
+    try:
+        return dict(retrain_jobs.get(job_id))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Retraining job '{job_id}' not found")
+
+# --- Endpoint: Topologies ---
+def _topology_path(path: str) -> str:
+    """Resolve a topology file path, refusing anything outside TOPOLOGY_DIR."""
+    root = os.path.realpath(TOPOLOGY_DIR)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        raise HTTPException(status_code=400, detail="Topology path must stay inside the topology directory")
+    if not os.path.isfile(resolved):
+        raise HTTPException(status_code=404, detail=f"Topology file '{path}' not found")
+    return resolved
+
+@router.post("/topologies")
+async def load_topology_file(
+    request: TopologyLoadRequest,
+    current_user: dict = Depends(oauth2.get_current_user)
+):
+    """
+    Load a topology file from the server's topology directory and serve it under a name.
+    Edge lists (CSV, NDJSON) are streamed from disk in chunks.
     """
+    path = _topology_path(request.path)
     try:
-        nsr._train_penalty_model()
-        return {"message": "Penalty model retrained successfully"}
+        nodes_path = _topology_path(request.nodes_path) if request.nodes_path else None
+        routing_module = await executor.run(
+            "thread", topologies.load, request.name, path, request.format, nodes_path, request.landmarks
+        )
+        return {
+            "message": f"Topology '{request.name}' loaded successfully",
+            "nodes": routing_module.G.number_of_nodes(),
+            "edges": routing_module.G.number_of_edges()
+        }
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        if _executor_http_error(e):
+            raise _executor_http_error(e)
+        logging.error(f"Topology load error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error loading topology: {str(e)}")
+
+@router.put("/topologies/{name}")
+async def upload_topology(
+    name: str,
+    request: Request,
+    format: str,
+    current_user: dict = Depends(oauth2.get_current_user)
+):
+    """
+    Upload a topology file in the request body and serve it under a name. The body is
+    written to disk chunk by chunk and then loaded like a server-side file.
+    """
+    try:
+        TopologyLoadRequest(name=name, path="", format=format)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    os.makedirs(TOPOLOGY_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=TOPOLOGY_DIR, suffix=".upload")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in request.stream():
+                f.write(chunk)
+        routing_module = await executor.run("thread", topologies.load, name, path, format)
+        return {
+            "message": f"Topology '{name}' loaded successfully",
+            "nodes": routing_module.G.number_of_nodes(),
+            "edges": routing_module.G.number_of_edges()
+        }
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        if _executor_http_error(e):
+            raise _executor_http_error(e)
+        logging.error(f"Topology upload error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error loading topology: {str(e)}")
+    finally:
+        os.remove(path)
+
+@router.get("/topologies")
+async def list_topologies(current_user: dict = Depends(oauth2.get_current_user)):
+    """
+    List the loaded topologies with their sizes
+    """
+    return {"topologies": topologies.stats()}
+
+@router.get("/topologies/{name}/graph")
+async def get_topology_graph(
+    name: str,
+    request: Request,
+    current_user: dict = Depends(oauth2.get_current_user)
+):
+    """
+    Static topology for clients to cache: node ids and columnar edge arrays (node index
+    pairs and QoS metrics), tagged with the topology version as its ETag. Answers 304
+    when If-None-Match already names the current version. Routing results refer to
+    this topology by version and carry only their path edges.
+    """
+    routing_module = _topology(name)
+    etag = f'"{routing_module.topology_version()}"'
+    cached = [tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")]
+    if etag in cached:
+        return Response(status_code=304, headers={"ETag": etag})
+    try:
+        version, content = await executor.run("thread", routing_module.topology_payload)
+    except Exception as e:
+        if _executor_http_error(e):
+            raise _executor_http_error(e)
+        raise HTTPException(status_code=500, detail=f"Error encoding topology: {str(e)}")
+    return Response(content=content, media_type="application/json", headers={"ETag": f'"{version}"'})
+
+@router.get("/topologies/{name}/graph/delta")
+async def get_topology_delta(
+    name: str,
+    since: str,
+    current_user: dict = Depends(oauth2.get_current_user)
+):
+    """
+    Metrics of the edges changed since a cached topology version. Answers 410 when the
+    version belongs to an earlier build of the topology, which has to be fetched again.
+    """
+    routing_module = _topology(name)
+    try:
+        delta = routing_module.topology_delta(since)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    if delta is None:
+        raise HTTPException(
+            status_code=410,
+            detail=f"Topology version '{since}' is no longer available; fetch /topologies/{name}/graph again"
+        )
+    return delta
+
+@router.post("/topologies/{name}/landmarks")
+async def prepare_topology_landmarks(
+    name: str,
+    count: int = ALT_LANDMARKS,
+    current_user: dict = Depends(oauth2.get_current_user)
+):
+    """
+    Run ALT preprocessing: pick landmarks and store their distances to every node so A*
+    queries on this topology use the landmark heuristic
+    """
+    routing_module = _topology(name)
+    if not 1 <= count <= 64:
+        raise HTTPException(status_code=400, detail="Landmark count must be between 1 and 64")
+    try:
+        landmarks = await executor.run("thread", routing_module.prepare_landmarks, count)
+        return {"message": f"ALT landmarks prepared for topology '{name}'", "landmarks": landmarks}
+    except Exception as e:
+        if _executor_http_error(e):
+            raise _executor_http_error(e)
+        raise HTTPException(status_code=500, detail=f"Error preparing landmarks: {str(e)}")
+
+@router.delete("/topologies/{name}")
+async def remove_topology(name: str, current_user: dict = Depends(oauth2.get_current_user)):
+    """
+    Stop serving a loaded topology
+    """
+    try:
+        topologies.remove(name)
+        return {"message": f"Topology '{name}' removed successfully"}
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Topology '{name}' not found")
 
 # --- Endpoint: Add Manual Metrics ---
 @router.post("/manual-metrics")
@@ -0,0 +1,283 @@
+import numpy as np
+import networkx as nx
+import math
+import heapq
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+from .topology import QOS_ATTRIBUTES
+
+EARTH_RADIUS_KM = 6371.0088
+
+# =============================================================================
+# CSR Graph: array-backed topology for the routing backends
+# =============================================================================
+class CSRGraph:
+    """
+    Array-backed copy of an undirected routing graph for scipy.sparse.csgraph.
+
+    Every edge is stored in both directions of a CSR matrix whose data array holds
+    final_cost. Edges are numbered in G.edges() order; QoS attributes are kept as one
+    array per attribute, and each edge knows its two slots in the matrix so cost updates
+    write into the weights in place. Node ids must be integers.
+    """
+    def __init__(self, G):
+        edges = list(G.edges(data=True))
+        self.nodes = np.array(sorted(G.nodes()), dtype=np.int64)
+        n, m = len(self.nodes), len(edges)
+        u = self.index(np.fromiter((e[0] for e in edges), dtype=np.int64, count=m))
+        v = self.index(np.fromiter((e[1] for e in edges), dtype=np.int64, count=m))
+        self.attributes = {
+            key: np.fromiter((e[2][key] for e in edges), dtype=np.float64, count=m)
+            for key in QOS_ATTRIBUTES
+        }
+        rows = np.concatenate([u, v])
+        cols = np.concatenate([v, u])
+        order = np.lexsort((cols, rows))
+        self.slot_edge = np.concatenate([np.arange(m), np.arange(m)])[order]
+        indptr = np.searchsorted(rows[order], np.arange(n + 1))
+        self.matrix = csr_matrix((np.zeros(2 * m), cols[order], indptr), shape=(n, n))
+        # slots[e] = positions of edge e in matrix.data (one per direction)
+        self.slots = np.argsort(self.slot_edge, kind="stable").reshape(m, 2)
+        # row * n + col for every slot; sorted because CSR rows and columns are
+        self._slot_keys = rows[order] * n + cols[order]
+        self.final_cost = np.zeros(m)
+        self.edge_versions = np.zeros(m, dtype=np.int64)  # metrics version of each edge's last change
+        self.edge_rows = (u, v)
+        # Node (lat, lon) in radians when every node has coordinates, else None
+        lat_lon = [(G.nodes[node].get("lat"), G.nodes[node].get("lon")) for node in self.nodes.tolist()]
+        has_coordinates = n > 0 and all(lat is not None and lon is not None for lat, lon in lat_lon)
+        self.coordinates = np.radians(np.array(lat_lon, dtype=np.float64)) if has_coordinates else None
+        self._adjacency = None  # Python lists of (indptr, indices, weights) for astar() and repair_tree()
+
+    def __getstate__(self):
+        # Worker processes only search: they get the matrix, plus the edge list and costs
+        # to rebuild a networkx graph from (see workers.py), not QoS attributes or state
+        return {"nodes": self.nodes, "matrix": self.matrix, "edge_rows": self.edge_rows,
+                "final_cost": self.final_cost, "coordinates": None, "_adjacency": None}
+
+    def arrays(self):
+        """Every array from_arrays() needs to rebuild this graph, by name."""
+        arrays = {
+            "nodes": self.nodes, "edge_u": self.edge_rows[0], "edge_v": self.edge_rows[1],
+            "indptr": self.matrix.indptr, "indices": self.matrix.indices, "weights": self.matrix.data,
+            "slot_edge": self.slot_edge, "slots": self.slots, "slot_keys": self._slot_keys,
+            "final_cost": self.final_cost, "edge_versions": self.edge_versions
+        }
+        arrays.update((f"attr_{key}", values) for key, values in self.attributes.items())
+        if self.coordinates is not None:
+            arrays["coordinates"] = self.coordinates
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: dict):
+        """Rebuild a graph from arrays() output (e.g. memory-mapped snapshot files) without networkx."""
+        csr = cls.__new__(cls)
+        csr.nodes = arrays["nodes"]
+        n = len(csr.nodes)
+        csr.attributes = {key: arrays[f"attr_{key}"] for key in QOS_ATTRIBUTES}
+        csr.slot_edge = arrays["slot_edge"]
+        csr.matrix = csr_matrix((arrays["weights"], arrays["indices"], arrays["indptr"]), shape=(n, n))
+        csr.matrix.data = arrays["weights"]
+        csr.slots = arrays["slots"]
+        csr._slot_keys = arrays["slot_keys"]
+        csr.final_cost = arrays["final_cost"]
+        csr.edge_versions = arrays["edge_versions"]
+        csr.edge_rows = (arrays["edge_u"], arrays["edge_v"])
+        csr.coordinates = arrays.get("coordinates")
+        csr._adjacency = None
+        return csr
+
+    def index(self, node_ids):
+        """Map node ids to matrix rows; raises KeyError for unknown nodes."""
+        node_ids = np.asarray(node_ids, dtype=np.int64)
+        rows = np.minimum(np.searchsorted(self.nodes, node_ids), len(self.nodes) - 1)
+        missing = self.nodes[rows] != node_ids
+        if missing.any():
+            raise KeyError(int(node_ids[missing][0]) if node_ids.ndim else int(node_ids))
+        return rows
+
+    def edge_ids(self, us, vs):
+        """Edge numbers of (us[i], vs[i]) pairs, found by one binary search over all slots."""
+        keys = self.index(us) * len(self.nodes) + self.index(vs)
+        pos = np.minimum(np.searchsorted(self._slot_keys, keys), len(self._slot_keys) - 1)
+        missing = self._slot_keys[pos] != keys
+        if missing.any():
+            i = int(np.argmax(missing))
+            raise KeyError((int(np.asarray(us)[i]), int(np.asarray(vs)[i])))
+        return self.slot_edge[pos]
+
+    def set_costs(self, edges, costs):
+        """
+        Write final_cost for the given edge numbers into the CSR weights in place.
+        Returns True when any cost went down, which invalidates A* lower bounds.
+        """
+        costs = np.broadcast_to(np.asarray(costs, dtype=np.float64), self.final_cost[edges].shape)
+        decreased = bool(np.any(costs < self.final_cost[edges]))
+        self.final_cost[edges] = costs
+        self.matrix.data[self.slots[edges]] = costs[..., None]
+        self.costs_written(edges)
+        return decreased
+
+    def costs_written(self, edges):
+        """Carry costs already in final_cost (e.g. written by another process) into the adjacency lists."""
+        if isinstance(edges, slice):
+            self._adjacency = None
+        elif self._adjacency is not None:
+            weights = self._adjacency[2]
+            for (a, b), cost in zip(self.slots[edges].tolist(), self.final_cost[edges].tolist()):
+                weights[a] = weights[b] = cost
+
+    def share(self, arrays: dict):
+        """
+        Serve the edge state that changes at runtime (congestion, final_cost, the CSR
+        weights and edge_versions) from the given arrays, typically views into a
+        SharedState. The arrays must already hold the values to use.
+        """
+        self.attributes['congestion'] = arrays['congestion']
+        self.final_cost = arrays['final_cost']
+        self.matrix.data = arrays['weights']
+        self.edge_versions = arrays['edge_versions']
+        self._adjacency = None
+
+    def adjacency(self):
+        """The CSR arrays as Python lists, which per-node loops index much faster than numpy."""
+        if self._adjacency is None:
+            self._adjacency = (self.matrix.indptr.tolist(), self.matrix.indices.tolist(), self.matrix.data.tolist())
+        return self._adjacency
+
+    def great_circle_km(self, row: int):
+        """Great-circle distance in km from every node to the node at row."""
+        lat, lon = self.coordinates[:, 0], self.coordinates[:, 1]
+        lat_t, lon_t = self.coordinates[row]
+        a = np.sin((lat - lat_t) / 2) ** 2 + np.cos(lat) * np.cos(lat_t) * np.sin((lon - lon_t) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    def edge_lengths_km(self):
+        """Great-circle length of every edge."""
+        u, v = self.edge_rows
+        lat_u, lon_u = self.coordinates[u, 0], self.coordinates[u, 1]
+        lat_v, lon_v = self.coordinates[v, 0], self.coordinates[v, 1]
+        a = np.sin((lat_u - lat_v) / 2) ** 2 + np.cos(lat_u) * np.cos(lat_v) * np.sin((lon_u - lon_v) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    def astar(self, source: int, target: int, heuristic=None):
+        """
+        A* over the CSR weights with an optional per-node lower-bound array for the
+        target (None runs plain Dijkstra with early exit). Returns (path, cost, nodes
+        settled); cost is the g value at the target, so the path is not re-walked.
+        """
+        s, t = self.index([source, target]).tolist()
+        indptr, indices, weights = self.adjacency()
+        h = heuristic.tolist() if heuristic is not None else [0.0] * len(self.nodes)
+        best = {s: 0.0}
+        parent = {s: s}
+        closed = set()
+        heap = [(h[s], 0.0, s)]
+        while heap:
+            _, g, u = heapq.heappop(heap)
+            if u in closed:
+                continue
+            closed.add(u)
+            if u == t:
+                path = [t]
+                while path[-1] != s:
+                    path.append(parent[path[-1]])
+                return self.nodes[path[::-1]].tolist(), g, len(closed)
+            for slot in range(indptr[u], indptr[u + 1]):
+                v = indices[slot]
+                candidate = g + weights[slot]
+                if candidate < best.get(v, math.inf):
+                    best[v] = candidate
+                    parent[v] = u
+                    heapq.heappush(heap, (candidate + h[v], candidate, v))
+        raise nx.NetworkXNoPath(f"Node {target} not reachable from {source}")
+
+    def shortest_path_tree(self, sources=None):
+        """Distances and predecessors from one source row (or every row when None)."""
+        return csgraph_dijkstra(self.matrix, directed=True, indices=sources, return_predecessors=True)
+
+    def repair_tree(self, dist, predecessors, edges, old_costs, max_settled: int):
+        """
+        Update a shortest-path tree in place after the costs of some edges changed,
+        touching only nodes whose distance can change (dynamic SSSP in the style of
+        Ramalingam and Reps):
+
+        1. Nodes below a tree edge whose cost rose lose their distance and are
+           re-seeded from their cheapest neighbour outside that subtree.
+        2. Endpoints that a cheaper edge now reaches more cheaply are re-seeded.
+        3. A Dijkstra pass from the seeds propagates the new distances.
+
+        edges are edge numbers whose final_cost is already updated and old_costs their
+        costs when the tree was built. Returns False, leaving the arrays partly
+        updated, once more than max_settled nodes are touched; the caller then
+        rebuilds the tree from scratch.
+        """
+        u, v = self.edge_rows[0][edges], self.edge_rows[1][edges]
+        new_costs = self.final_cost[edges]
+        indptr, indices, weights = self.adjacency()
+        heap = []
+        touched = set()
+
+        raised = new_costs > old_costs
+        child = np.where(predecessors[v[raised]] == u[raised], v[raised],
+                         np.where(predecessors[u[raised]] == v[raised], u[raised], -1))
+        roots = child[child >= 0]
+        if len(roots):
+            stack = roots.tolist()
+            while stack:
+                x = stack.pop()
+                touched.add(x)
+                if len(touched) > max_settled:
+                    return False
+                # Children of x are the neighbours it is the predecessor of
+                neighbours = self.matrix.indices[indptr[x]:indptr[x + 1]]
+                stack.extend(neighbours[predecessors[neighbours] == x].tolist())
+            affected = list(touched)
+            dist[affected] = np.inf
+            predecessors[affected] = -9999
+            for x in affected:
+                best, parent = math.inf, -9999
+                for slot in range(indptr[x], indptr[x + 1]):
+                    candidate = dist[indices[slot]] + weights[slot]
+                    if candidate < best:
+                        best, parent = candidate, indices[slot]
+                if parent >= 0:
+                    dist[x], predecessors[x] = best, parent
+                    heapq.heappush(heap, (best, x))
+
+        lowered = ~raised & (new_costs < old_costs)
+        for a, b, cost in zip(u[lowered].tolist(), v[lowered].tolist(), new_costs[lowered].tolist()):
+            for x, y in ((a, b), (b, a)):
+                if dist[x] + cost < dist[y]:
+                    dist[y], predecessors[y] = dist[x] + cost, x
+                    heapq.heappush(heap, (dist[y], y))
+
+        while heap:
+            d, x = heapq.heappop(heap)
+            if d > dist[x]:
+                continue
+            # Nodes detached above are counted once, not again when they settle
+            touched.add(x)
+            if len(touched) > max_settled:
+                return False
+            for slot in range(indptr[x], indptr[x + 1]):
+                y = indices[slot]
+                candidate = d + weights[slot]
+                if candidate < dist[y]:
+                    dist[y], predecessors[y] = candidate, x
+                    heapq.heappush(heap, (candidate, y))
+        return True
+
+    def walk(self, dist, predecessors, source: int, target: int):
+        """Read the path to target and its cost off a shortest-path tree rooted at source."""
+        s, t = self.index([source, target]).tolist()
+        if not np.isfinite(dist[t]):
+            raise nx.NetworkXNoPath(f"Node {target} not reachable from {source}")
+        path = [t]
+        while path[-1] != s:
+            path.append(predecessors[path[-1]])
+        return self.nodes[path[::-1]].tolist(), float(dist[t])
+
+    def shortest_path(self, source: int, target: int):
+        """One Dijkstra search from source; the path comes from its predecessor array."""
+        return self.walk(*self.shortest_path_tree(self.index(source)), source, target)
@@ -0,0 +1,176 @@
+import numpy as np
+import logging
+import itertools
+import os
+import threading
+from datetime import datetime
+from typing import Optional
+
+ROUTING_ALGORITHMS = ("dijkstra", "astar", "k_shortest")  # Route history stores algorithms by index
+ROUTE_HISTORY_CAPACITY = int(os.getenv("RESILIENCE_ROUTE_HISTORY_CAPACITY", "10000"))  # Routes kept per topology
+ROUTE_HISTORY_NODES_PER_ROUTE = 32  # Path buffer entries reserved per route (one per node plus one per path)
+# Opt in to archiving route history to the route_history table (created with the other tables at startup)
+ROUTE_HISTORY_DB = os.getenv("RESILIENCE_ROUTE_HISTORY_DB", "0") == "1"
+ROUTE_HISTORY_FLUSH_BATCH = 500  # Unflushed routes that trigger a database write
+ROUTE_HISTORY_PAGE_SIZE = 100
+
+# =============================================================================
+# Route History: columnar ring buffer of computed routes
+# =============================================================================
+class RouteHistory:
+    """
+    Fixed-capacity ring buffer of computed routes in columnar arrays: timestamps,
+    endpoints and algorithm codes are one array each. Each route's paths are written
+    length-prefixed into a flat node ring and its path costs into a cost ring, at
+    absolute offsets that keep growing across wrap-arounds. Appending when the route
+    arrays or either ring is full drops the oldest routes.
+
+    Routes are numbered by a sequence id, which doubles as the pagination cursor.
+    When persist is set, routes up to flushed_seq have been written to the database,
+    routes dropped before that are counted, and so are failed flushes.
+    """
+    def __init__(self, capacity: int = ROUTE_HISTORY_CAPACITY, nodes_per_route: int = ROUTE_HISTORY_NODES_PER_ROUTE,
+                 persist: bool = ROUTE_HISTORY_DB):
+        self.capacity = capacity
+        self.persist = persist
+        self.lock = threading.Lock()
+        self.timestamps = np.zeros(capacity)  # POSIX seconds
+        self.sources = np.zeros(capacity, dtype=np.int64)
+        self.targets = np.zeros(capacity, dtype=np.int64)
+        self.algorithms = np.zeros(capacity, dtype=np.int8)  # index into ROUTING_ALGORITHMS
+        self.path_counts = np.zeros(capacity, dtype=np.int32)
+        self.node_starts = np.zeros(capacity, dtype=np.int64)
+        self.cost_starts = np.zeros(capacity, dtype=np.int64)
+        self.nodes = np.zeros(capacity * nodes_per_route, dtype=np.int64)
+        # Every path takes at least two node entries, so the cost ring fills no sooner
+        self.costs = np.zeros(capacity * nodes_per_route // 2)
+        self.head = 0  # sequence id of the next route
+        self.tail = 0  # sequence id of the oldest route kept
+        self.node_end = 0
+        self.cost_end = 0
+        self.flushed_seq = 0
+        self.dropped = 0
+        self.flush_failures = 0
+        self.last_flush_error = None  # cleared by the next successful flush
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def _ring_full(self, nodes: int, costs: int):
+        if self.head - self.tail >= self.capacity:
+            return True
+        if self.head == self.tail:
+            return False
+        oldest = self.tail % self.capacity
+        return (self.node_end + nodes - self.node_starts[oldest] > len(self.nodes) or
+                self.cost_end + costs - self.cost_starts[oldest] > len(self.costs))
+
+    def append(self, timestamp: datetime, source: int, target: int, algorithm: str, paths, costs):
+        """Store a route; returns its sequence id, or None when it is too large for the buffer."""
+        encoded = np.fromiter(
+            itertools.chain.from_iterable(itertools.chain((len(path),), path) for path in paths), dtype=np.int64
+        )
+        if len(encoded) > len(self.nodes) or len(costs) > len(self.costs):
+            logging.warning(f"Route {source} -> {target} is too large for the route history buffer")
+            return None
+        with self.lock:
+            while self._ring_full(len(encoded), len(costs)):
+                if self.persist and self.tail >= self.flushed_seq:
+                    self.dropped += 1
+                self.tail += 1
+            self.flushed_seq = max(self.flushed_seq, self.tail)
+            slot = self.head % self.capacity
+            self.timestamps[slot] = timestamp.timestamp()
+            self.sources[slot] = source
+            self.targets[slot] = target
+            self.algorithms[slot] = ROUTING_ALGORITHMS.index(algorithm)
+            self.path_counts[slot] = len(paths)
+            self.node_starts[slot] = self.node_end
+            self.cost_starts[slot] = self.cost_end
+            self.nodes[np.arange(self.node_end, self.node_end + len(encoded)) % len(self.nodes)] = encoded
+            self.costs[np.arange(self.cost_end, self.cost_end + len(costs)) % len(self.costs)] = costs
+            self.node_end += len(encoded)
+            self.cost_end += len(costs)
+            self.head += 1
+            return self.head - 1
+
+    def _entry(self, seq: int):
+        slot = seq % self.capacity
+        count = int(self.path_counts[slot])
+        position = int(self.node_starts[slot])
+        paths = []
+        for _ in range(count):
+            length = int(self.nodes[position % len(self.nodes)])
+            paths.append(self.nodes[np.arange(position + 1, position + 1 + length) % len(self.nodes)].tolist())
+            position += 1 + length
+        start = int(self.cost_starts[slot])
+        return {
+            'id': seq,
+            'timestamp': datetime.fromtimestamp(self.timestamps[slot]),
+            'source': int(self.sources[slot]),
+            'target': int(self.targets[slot]),
+            'algorithm': ROUTING_ALGORITHMS[self.algorithms[slot]],
+            'paths': paths,
+            'costs': self.costs[np.arange(start, start + count) % len(self.costs)].tolist()
+        }
+
+    def page(self, cursor: Optional[int] = None, limit: int = ROUTE_HISTORY_PAGE_SIZE,
+             since: Optional[datetime] = None, until: Optional[datetime] = None):
+        """
+        Up to limit routes, newest first, older than the cursor and recorded in
+        [since, until). Returns (entries, next_cursor); next_cursor is None on the last page.
+        """
+        with self.lock:
+            upper = self.head if cursor is None else max(self.tail, min(cursor, self.head))
+            seqs = np.arange(upper - 1, self.tail - 1, -1)
+            if since is not None or until is not None:
+                timestamps = self.timestamps[seqs % self.capacity]
+                keep = np.ones(len(seqs), dtype=bool)
+                if since is not None:
+                    keep &= timestamps >= since.timestamp()
+                if until is not None:
+                    keep &= timestamps < until.timestamp()
+                seqs = seqs[keep]
+            entries = [self._entry(seq) for seq in seqs[:limit].tolist()]
+            next_cursor = entries[-1]['id'] if len(seqs) > limit else None
+            return entries, next_cursor
+
+    def pending(self):
+        """Routes recorded but not yet written to the database."""
+        return self.head - max(self.flushed_seq, self.tail)
+
+    def unflushed(self, limit: int = ROUTE_HISTORY_FLUSH_BATCH):
+        """The oldest unflushed routes and the sequence id to pass to mark_flushed() once they are written."""
+        with self.lock:
+            start = max(self.flushed_seq, self.tail)
+            end = min(self.head, start + limit)
+            return [self._entry(seq) for seq in range(start, end)], end
+
+    def mark_flushed(self, seq: int):
+        with self.lock:
+            self.flushed_seq = max(self.flushed_seq, seq)
+            self.last_flush_error = None
+
+    def flush_failed(self, error: str):
+        """Record a database write that failed; its routes stay pending."""
+        with self.lock:
+            self.flush_failures += 1
+            self.last_flush_error = error
+
+    def nbytes(self):
+        return sum(array.nbytes for array in (
+            self.timestamps, self.sources, self.targets, self.algorithms, self.path_counts,
+            self.node_starts, self.cost_starts, self.nodes, self.costs
+        ))
+
+    def stats(self):
+        return {
+            "routes": len(self),
+            "capacity": self.capacity,
+            "recorded": self.head,
+            "pending_flush": self.pending() if self.persist else None,
+            "dropped_unflushed": self.dropped,
+            "flush_failures": self.flush_failures,
+            "last_flush_error": self.last_flush_error,
+            "memory_bytes": self.nbytes()
+        }
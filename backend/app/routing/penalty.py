@@ -0,0 +1,137 @@
+import numpy as np
+import os
+import hashlib
+from sklearn.neural_network import MLPRegressor
+from sklearn.exceptions import NotFittedError
+from typing import Optional
+from ..state.shared import SharedState
+
+PENALTY_TABLE_SIZE = int(os.getenv("RESILIENCE_PENALTY_TABLE_SIZE", "4097"))  # Grid points over [0, 1]; 0 = batched predict
+PENALTY_MAX_ERROR = 1.0  # Largest deviation from the training target a retrained penalty model may show
+
+# =============================================================================
+# Congestion Penalty Model
+# =============================================================================
+def penalty_training_data():
+    """Congestion samples over [0, 1] and the exponential penalty the model learns."""
+    X_train = np.linspace(0, 1, 50).reshape(-1, 1)
+    y_train = np.exp(X_train.ravel()) - 1
+    return X_train, y_train
+
+def train_penalty_model():
+    """Fit a fresh penalty model. Module-level so retraining can run in a worker process."""
+    X_train, y_train = penalty_training_data()
+    return MLPRegressor(hidden_layer_sizes=(10,), max_iter=500, random_state=42).fit(X_train, y_train)
+
+def validate_penalty_model(model):
+    """
+    Check a trained penalty model before it serves routing costs: penalties must be
+    finite, keep every cost factor (1 + penalty) positive, and stay within
+    PENALTY_MAX_ERROR of the training target. Returns the fit metrics; raises
+    ValueError for a model that must not be swapped in.
+    """
+    grid = np.linspace(0, 1, 1001)
+    predicted = model.predict(grid.reshape(-1, 1))
+    if not np.all(np.isfinite(predicted)):
+        raise ValueError("Penalty model predicts non-finite penalties")
+    if predicted.min() <= -1:
+        raise ValueError(f"Penalty model predicts {predicted.min():.3f}, which makes edge costs non-positive")
+    error = np.abs(predicted - (np.exp(grid) - 1))
+    if error.max() > PENALTY_MAX_ERROR:
+        raise ValueError(f"Penalty model deviates from the target by up to {error.max():.3f}")
+    return {
+        "max_error": float(error.max()),
+        "rmse": float(np.sqrt(np.mean(error ** 2))),
+        "min_penalty": float(predicted.min()),
+        "max_penalty": float(predicted.max())
+    }
+
+def penalty_model_arrays(model):
+    """The fitted weights of a penalty model as named arrays, for snapshots."""
+    arrays = {}
+    for i, (coef, intercept) in enumerate(zip(model.coefs_, model.intercepts_)):
+        arrays[f"penalty_coef_{i}"] = coef
+        arrays[f"penalty_intercept_{i}"] = intercept
+    return arrays
+
+def penalty_model_from_arrays(arrays: dict):
+    """Rebuild a penalty model from penalty_model_arrays() output without training; None if absent."""
+    layers = sum(1 for name in arrays if name.startswith("penalty_coef_"))
+    if not layers:
+        return None
+    coefs = [np.array(arrays[f"penalty_coef_{i}"]) for i in range(layers)]
+    intercepts = [np.array(arrays[f"penalty_intercept_{i}"]) for i in range(layers)]
+    model = MLPRegressor(hidden_layer_sizes=tuple(coef.shape[1] for coef in coefs[:-1]), max_iter=500,
+                         random_state=42)
+    model.coefs_ = coefs
+    model.intercepts_ = intercepts
+    model.n_layers_ = layers + 1
+    model.n_features_in_ = coefs[0].shape[0]
+    model.n_outputs_ = coefs[-1].shape[1]
+    model.out_activation_ = "identity"
+    return model
+
+def penalty_model_digest(model) -> Optional[str]:
+    """Fingerprint of a penalty model's weights; snapshots record the model their costs came from."""
+    if model is None:
+        return None
+    arrays = penalty_model_arrays(model)
+    return hashlib.sha1(b"".join(np.ascontiguousarray(arrays[name]).tobytes() for name in sorted(arrays))).hexdigest()
+
+class PenaltyEvaluator:
+    """
+    Evaluates the learned congestion penalty for many edges in one call.
+
+    With a table size > 1 the trained model is sampled once on a uniform grid over
+    [0, 1] and evaluated by linear interpolation. The default ReLU network is piecewise
+    linear in congestion, so a fine grid matches predict() to within rounding.
+    With a table size of 0 every call is a single batched predict().
+
+    With a shared_dir the table lives in a SharedState used by every worker process:
+    a model swapped in by one worker is served by all, and the table is double-buffered
+    so a refresh never exposes a half-written table. Workers that find a table already
+    published do not need a model of their own.
+    """
+    def __init__(self, table_size: int = PENALTY_TABLE_SIZE, shared_dir: Optional[str] = None):
+        self.table_size = table_size
+        self.model = None
+        self._version = 0   # Bumped on every refresh so routers sharing the model notice stale costs
+        self._table = None  # (grid, penalties), swapped as a pair on refresh
+        self.shared = None
+        if shared_dir and table_size > 1:
+            self._grid = np.linspace(0, 1, table_size)
+            self.shared = SharedState(os.path.join(shared_dir, f"penalty-{table_size}.state"),
+                                      ("version", "active"), {"penalties": (np.float64, (2, table_size))})
+
+    @property
+    def version(self) -> int:
+        return self.shared.counter("version") if self.shared is not None else self._version
+
+    def refresh(self, model):
+        """Adopt a (re)trained model and rebuild the lookup table."""
+        table = None
+        if self.table_size > 1:
+            grid = np.linspace(0, 1, self.table_size)
+            table = (grid, model.predict(grid.reshape(-1, 1)))
+        self.model = model
+        if self.shared is not None:
+            with self.shared.write_lock():
+                # Fill the slot readers are not using, then point them at it
+                active = 1 - self.shared.counter("active")
+                self.shared.arrays["penalties"][active] = table[1]
+                self.shared.set_counter("active", active)
+                self.shared.bump("version")
+            return
+        self._table = table
+        self._version += 1
+
+    def __call__(self, congestion):
+        congestion = np.asarray(congestion, dtype=np.float64)
+        if self.shared is not None and self.shared.counter("version"):
+            return np.interp(congestion, self._grid, self.shared.arrays["penalties"][self.shared.counter("active")])
+        if self.model is None:
+            raise NotFittedError("Penalty model has not been trained yet")
+        table = self._table
+        if table is None:
+            return self.model.predict(congestion.reshape(-1, 1))
+        return np.interp(congestion, *table)
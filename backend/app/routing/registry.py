@@ -0,0 +1,111 @@
+import logging
+import os
+import shutil
+import threading
+from typing import Optional
+from .router import DEFAULT_TOPOLOGY, NeuroSymbolicRouting
+from .topology import load_topology
+
+# =============================================================================
+# Topology Registry: one NeuroSymbolicRouting per loaded topology
+# =============================================================================
+class TopologyRegistry:
+    """
+    Named routing graphs, each served by its own NeuroSymbolicRouting. Every router
+    shares the default router's penalty model. The default topology is the built-in
+    11-node graph and cannot be replaced or removed.
+
+    With a snapshot directory, the topologies an earlier process snapshotted are
+    restored at startup, and replacing or removing a topology drops its snapshot.
+    """
+    def __init__(self, default: NeuroSymbolicRouting, snapshot_dir: Optional[str] = None):
+        self.lock = threading.Lock()
+        self._routers = {DEFAULT_TOPOLOGY: default}
+        self.snapshot_dir = snapshot_dir
+        if snapshot_dir:
+            self._restore_snapshots()
+
+    def snapshot_path(self, name: str) -> str:
+        return os.path.join(self.snapshot_dir, name)
+
+    def _restore_snapshots(self):
+        """Serve every topology snapshotted by an earlier process; arrays are mapped, not read."""
+        if not os.path.isdir(self.snapshot_dir):
+            return
+        default = self._routers[DEFAULT_TOPOLOGY]
+        for name in sorted(os.listdir(self.snapshot_dir)):
+            path = self.snapshot_path(name)
+            if name == DEFAULT_TOPOLOGY or not os.path.exists(os.path.join(path, "current.json")):
+                continue
+            router = default.derive(None, name, snapshot=path)
+            if router.snapshot_id is None:
+                logging.error(f"Topology '{name}' could not be restored from {path}.")
+                continue
+            self._routers[name] = router
+
+    def _drop_snapshot(self, name: str):
+        if self.snapshot_dir:
+            shutil.rmtree(self.snapshot_path(name), ignore_errors=True)
+
+    def save_snapshots(self, force: bool = False) -> dict:
+        """Snapshot every topology changed since its last snapshot; returns {name: path} of those written."""
+        written = {}
+        for name, router in self.items():
+            path = router.save_snapshot(self.snapshot_path(name), force)
+            if path is None:
+                continue
+            with self.lock:
+                current = self._routers.get(name)
+            if current is not router:
+                self._drop_snapshot(name)  # replaced or removed while it was being written
+                continue
+            written[name] = path
+        return written
+
+    def get(self, name: str) -> NeuroSymbolicRouting:
+        with self.lock:
+            if name not in self._routers:
+                raise KeyError(name)
+            return self._routers[name]
+
+    def register(self, name: str, graph) -> NeuroSymbolicRouting:
+        """Serve a graph under a name, replacing any topology loaded under it before."""
+        if name == DEFAULT_TOPOLOGY:
+            raise ValueError(f"Topology '{DEFAULT_TOPOLOGY}' is built in and cannot be replaced")
+        router = self.get(DEFAULT_TOPOLOGY).derive(graph, name)
+        with self.lock:
+            self._routers[name] = router
+        self._drop_snapshot(name)
+        return router
+
+    def load(self, name: str, path: str, fmt: Optional[str] = None, nodes_path: Optional[str] = None,
+             landmarks: int = 0) -> NeuroSymbolicRouting:
+        router = self.register(name, load_topology(path, fmt, nodes_path=nodes_path))
+        if landmarks:
+            router.prepare_landmarks(landmarks)
+        return router
+
+    def items(self):
+        with self.lock:
+            return list(self._routers.items())
+
+    def remove(self, name: str):
+        if name == DEFAULT_TOPOLOGY:
+            raise ValueError(f"Topology '{DEFAULT_TOPOLOGY}' is built in and cannot be removed")
+        with self.lock:
+            del self._routers[name]
+        self._drop_snapshot(name)
+
+    def stats(self):
+        with self.lock:
+            routers = list(self._routers.items())
+        return [
+            {"name": name, "nodes": len(router.csr.nodes), "edges": len(router.csr.final_cost),
+             "graph_version": router.graph_version, "topology_version": router.topology_version(),
+             "spt_cache": router.spt_cache.stats(),
+             "coordinates": router.csr.coordinates is not None, "landmarks": router.landmark_count,
+             "route_history": router.route_history.stats(),
+             "shared_state": router.shared.path if router.shared is not None else None,
+             "snapshot": router.snapshot_id}
+            for name, router in routers
+        ]
@@ -0,0 +1,835 @@
+import numpy as np
+import networkx as nx
+import logging
+import json
+import os
+import pickle
+import hashlib
+import threading
+import contextlib
+from datetime import datetime
+from typing import Optional
+from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+from .csr import CSRGraph
+from .history import ROUTE_HISTORY_PAGE_SIZE, RouteHistory
+from .penalty import PenaltyEvaluator, train_penalty_model, penalty_model_arrays, penalty_model_from_arrays, penalty_model_digest
+from .search import search_paths, route_pairs
+from .spt_cache import ShortestPathTreeCache
+from .topology import QOS_ATTRIBUTES
+from ..state.shared import SHARED_STATE_DIR, SharedState
+from ..state.snapshots import write_snapshot, read_snapshot
+
+ROUTING_BACKEND = os.getenv("RESILIENCE_ROUTING_BACKEND", "csr")  # "csr" (scipy csgraph) or "networkx"
+ROUTING_BACKENDS = ("csr", "networkx")
+ALT_LANDMARKS = 8  # Landmarks picked when ALT preprocessing is requested without a count
+ROUTING_HEURISTICS = ("none", "geo", "alt")  # A* heuristics; "geo" needs node coordinates
+SNAPSHOT_EDGE_STATE = ("attr_congestion", "final_cost", "weights", "edge_versions")  # Snapshot arrays updated at runtime
+DEFAULT_TOPOLOGY = "default"
+VISUALIZATION_METRICS = ("latency", "bandwidth", "packet_loss", "jitter", "congestion")  # Edge metrics sent to clients
+
+# =============================================================================
+# Neuro-Symbolic Routing Module with Dynamic Penalty Adjustment
+# =============================================================================
+class NeuroSymbolicRouting:
+    def __init__(self, graph=None, penalty_source=None, name: str = DEFAULT_TOPOLOGY,
+                 snapshot: Optional[str] = None):
+        self.name = name
+        # Set when G is to be built from the CSR arrays of a restored snapshot on first use
+        self._lazy_graph = False
+        self.G = None
+        # Array-backed copy of G for scipy searches and vectorized cost updates
+        self.csr = None
+        self._edge_data = []  # G's edge attribute dicts in CSRGraph edge order
+        # With RESILIENCE_SHARED_STATE_DIR set, congestion and costs live in a SharedState
+        # that every worker process maps; G and the caches follow it up to _synced_cost_version
+        self.shared = None
+        self._synced_cost_version = 0
+        # Clients cache the topology under "<topology_id>.<metrics_version>": the id changes
+        # when the structure is rebuilt, the counter on every edge metrics change
+        self.topology_id = None
+        self.metrics_version = 0
+        self._topology_payload = None  # (version, encoded static topology)
+        # Guards the graph and model when requests run on worker threads
+        self.lock = threading.RLock()
+        # Edges whose final_cost is stale; recomputed before the next route query
+        self.dirty_edges = set()
+        # Penalty model version the current edge costs were computed with
+        self._costs_version = None
+        # Bumped whenever edge costs or structure change; stamps cached shortest-path trees,
+        # which are repaired after partial cost updates and discarded after full ones
+        self.graph_version = 0
+        self.spt_cache = ShortestPathTreeCache()
+        # A* lower bounds stay admissible while costs only rise; bumped when one falls
+        self._bounds_version = 0
+        self.landmark_count = 0  # ALT landmarks; 0 until ALT preprocessing is requested
+        self._alt = None  # (bounds version, landmark rows, landmark x node distances)
+        self._geo = None  # (bounds version, minimum cost per km over all edges)
+        self.route_history = RouteHistory()
+        self.snapshot_id = None  # Snapshot this router was restored from or last written to
+        self._snapshot_key = None  # State the last snapshot captured, to skip unchanged rewrites
+        self.qos_weights = {
+            'latency': 0.4,
+            'bandwidth': 0.3,
+            'packet_loss': 0.2,
+            'jitter': 0.1
+        }
+        restored = self._read_snapshot(snapshot) if snapshot else None
+        if penalty_source is None:
+            self.penalty = PenaltyEvaluator(shared_dir=SHARED_STATE_DIR)
+            model = penalty_model_from_arrays(restored[1]) if restored else None
+            if self.penalty.version:
+                logging.info("Using the penalty table published by another worker.")
+            elif model is not None:
+                self.swap_penalty_model(model)
+                logging.info("Penalty model restored from snapshot.")
+            else:
+                self._train_penalty_model()
+        else:
+            # Share the evaluator, so a model swapped in through either router reaches both
+            self.penalty = penalty_source.penalty
+            self.qos_weights = dict(penalty_source.qos_weights)
+        if restored is not None:
+            self._restore_snapshot(*restored)
+        elif graph is None:
+            self.build_network_graph()
+        else:
+            self.G = graph
+            self._index_graph()
+            self.refresh_dirty_costs()
+
+    @property
+    def G(self):
+        if self._lazy_graph:
+            self._materialize_graph()
+        return self._G
+
+    @G.setter
+    def G(self, graph):
+        self._G = graph
+        self._lazy_graph = False
+
+    def _materialize_graph(self):
+        """Build G from the CSR arrays of a restored snapshot, for the searches that need networkx."""
+        with self.lock:
+            if not self._lazy_graph:
+                return
+            csr = self.csr
+            nodes = csr.nodes.tolist()
+            G = nx.Graph()
+            if csr.coordinates is not None:
+                lat, lon = np.degrees(csr.coordinates).T.tolist()
+                G.add_nodes_from((node, {"lat": a, "lon": b}) for node, a, b in zip(nodes, lat, lon))
+            else:
+                G.add_nodes_from(nodes)
+            us = csr.nodes[csr.edge_rows[0]].tolist()
+            vs = csr.nodes[csr.edge_rows[1]].tolist()
+            keys = QOS_ATTRIBUTES + ("final_cost",)
+            columns = [csr.attributes[key].tolist() for key in QOS_ATTRIBUTES] + [csr.final_cost.tolist()]
+            G.add_edges_from((u, v, dict(zip(keys, values))) for u, v, *values in zip(us, vs, *columns))
+            self._edge_data = [G[u][v] for u, v in zip(us, vs)]
+            self.G = G
+            logging.info(f"Graph of topology '{self.name}' built from its snapshot.")
+
+    def _read_snapshot(self, directory: str):
+        try:
+            return read_snapshot(directory, writable=SNAPSHOT_EDGE_STATE)
+        except Exception as e:
+            logging.error(f"Error reading snapshot in {directory}: {e}")
+            return None
+
+    def _restore_snapshot(self, meta: dict, arrays: dict):
+        """
+        Serve a snapshot: the CSR arrays are memory-mapped as they are and G is only built
+        from them when a networkx search needs it. Edge costs (and ALT landmarks) are kept
+        when the penalty model matches the one they were computed with.
+        """
+        with self.lock:
+            self.qos_weights = dict(meta["qos_weights"])
+            self.landmark_count = meta["landmark_count"]
+            self.G = None
+            self._lazy_graph = True
+            self._index_graph(CSRGraph.from_arrays(arrays))
+            if self.shared is None:
+                # Clients that cached the topology before the restart keep a valid version
+                self.topology_id = meta["topology_id"]
+                self.metrics_version = meta["metrics_version"]
+                if meta["penalty_digest"] is not None and meta["penalty_digest"] == penalty_model_digest(self.penalty.model):
+                    self._costs_version = self.penalty.version
+                    if "alt_rows" in arrays:
+                        self._alt = (self._bounds_version, np.array(arrays["alt_rows"]), arrays["alt_distances"])
+            self.refresh_dirty_costs()
+            self.snapshot_id = meta["id"]
+            self._snapshot_key = self._snapshot_state()
+        logging.info(f"Topology '{self.name}' restored from snapshot {meta['id']}.")
+
+    def _snapshot_state(self):
+        return (self.topology_version(), self.penalty.version, self.landmark_count)
+
+    def save_snapshot(self, directory: str, force: bool = False) -> Optional[str]:
+        """
+        Write this topology's CSR arrays, QoS attributes, edge costs, ALT landmarks and the
+        penalty model weights to a new snapshot under directory. Returns its path, or None
+        when nothing changed since the last snapshot and force is not set.
+        """
+        with self.lock:
+            self.refresh_dirty_costs()
+            key = self._snapshot_state()
+            if not force and key == self._snapshot_key:
+                return None
+            # Edge state is updated in place, so it is copied before the lock is released
+            arrays = {name: np.array(array) if name in SNAPSHOT_EDGE_STATE else array
+                      for name, array in self.csr.arrays().items()}
+            model = self.penalty.model
+            if model is not None:
+                arrays.update(penalty_model_arrays(model))
+            if self.landmark_count and self._alt is not None and self._alt[0] == self._bounds_version:
+                arrays["alt_rows"] = self._alt[1]
+                arrays["alt_distances"] = self._alt[2]
+            meta = {
+                "name": self.name,
+                "topology_id": self.topology_id,
+                "metrics_version": self.metrics_version,
+                "qos_weights": self.qos_weights,
+                "landmark_count": self.landmark_count,
+                "penalty_digest": penalty_model_digest(model)
+            }
+            # Claimed before writing, so a concurrent call does not write the same state again
+            previous, self._snapshot_key = self._snapshot_key, key
+        try:
+            path = write_snapshot(directory, arrays, meta)
+        except Exception:
+            with self.lock:
+                self._snapshot_key = previous
+            raise
+        with self.lock:
+            self.snapshot_id = os.path.basename(path)
+        logging.info(f"Topology '{self.name}' snapshot written to {path}.")
+        return path
+
+    def _index_graph(self, csr: Optional[CSRGraph] = None):
+        """Rebuild the CSR arrays after the structure of G changed, or adopt restored ones."""
+        self.csr = CSRGraph(self.G) if csr is None else csr
+        self._edge_data = [] if self._lazy_graph else [data for _, _, data in self.G.edges(data=True)]
+        self.dirty_edges.clear()
+        self.topology_id = os.urandom(6).hex()
+        self.metrics_version = 0
+        self._topology_payload = None
+        self._bounds_version += 1
+        self._bump_graph_version()
+        self.shared = None
+        # Edge costs are only shared when the penalty table they are computed from is
+        if SHARED_STATE_DIR and self.penalty.shared is not None:
+            self._attach_shared_state()
+
+    def _attach_shared_state(self):
+        """
+        Move the edge state that changes at runtime into a SharedState keyed by the
+        topology name and structure, so every worker process serving this topology
+        reads and updates the same arrays. The first worker seeds it from G.
+        """
+        csr = self.csr
+        u, v = csr.edge_rows
+        digest = hashlib.sha1(csr.nodes.tobytes() + u.tobytes() + v.tobytes()).hexdigest()[:16]
+        m = len(u)
+
+        def initialize(state):
+            state.arrays['congestion'][:] = csr.attributes['congestion']
+            state.set_counter("generation", int.from_bytes(os.urandom(6), "big"))
+
+        self.shared = SharedState(
+            os.path.join(SHARED_STATE_DIR, f"routing-{self.name}-{digest}.state"),
+            ("generation", "cost_version", "full_cost_version", "costs_penalty_version", "metrics_version"),
+            {"congestion": (np.float64, m), "final_cost": (np.float64, m), "weights": (np.float64, 2 * m),
+             "cost_stamps": (np.int64, m), "edge_versions": (np.int64, m)},
+            initialize)
+        csr.share(self.shared.arrays)
+        # Every worker reports the same topology version
+        self.topology_id = f"{self.shared.counter('generation'):012x}"
+        # Nothing is synced yet, so the first sync copies every edge into G
+        self.metrics_version = -1
+        self._synced_cost_version = -1
+        self._sync_shared()
+
+    def _sync_shared(self):
+        """
+        Catch up with edge updates other worker processes published to the shared state:
+        copy changed congestion and costs into G, and log the cost changes so cached
+        trees are repaired (or drop them after a full recompute).
+        """
+        shared = self.shared
+        if shared is None:
+            return
+        with self.lock:
+            if (shared.counter("metrics_version") == self.metrics_version
+                    and shared.counter("cost_version") == self._synced_cost_version):
+                return
+            with shared.write_lock():
+                self._materialize_graph()  # old costs for tree repair come from G
+                csr = self.csr
+                metrics_version = shared.counter("metrics_version")
+                changed = np.flatnonzero(csr.edge_versions > self.metrics_version)
+                for e, value in zip(changed.tolist(), csr.attributes['congestion'][changed].tolist()):
+                    self._edge_data[e]['congestion'] = value
+                self.metrics_version = metrics_version
+                self._costs_version = shared.counter("costs_penalty_version")
+                cost_version = shared.counter("cost_version")
+                if cost_version == self._synced_cost_version:
+                    return
+                if shared.counter("full_cost_version") > self._synced_cost_version:
+                    for data, cost in zip(self._edge_data, csr.final_cost.tolist()):
+                        data['final_cost'] = cost
+                    csr.costs_written(slice(None))
+                    self._bounds_version += 1
+                    self._bump_graph_version()
+                else:
+                    changed = np.flatnonzero(shared.arrays['cost_stamps'] > self._synced_cost_version)
+                    old_costs = np.array([self._edge_data[e]['final_cost'] for e in changed.tolist()])
+                    new_costs = csr.final_cost[changed]
+                    for e, cost in zip(changed.tolist(), new_costs.tolist()):
+                        self._edge_data[e]['final_cost'] = cost
+                    csr.costs_written(changed)
+                    if np.any(new_costs < old_costs):
+                        self._bounds_version += 1
+                    self._log_cost_changes(changed, old_costs)
+                self._synced_cost_version = cost_version
+
+    @contextlib.contextmanager
+    def _shared_section(self):
+        """
+        Hold the router lock and, for shared state, the cross-process write lock after
+        catching up with it: the section sees and leaves the arrays consistent.
+        """
+        with self.lock:
+            if self.shared is None:
+                yield
+                return
+            with self.shared.write_lock():
+                self._sync_shared()
+                yield
+
+    def _bump_graph_version(self):
+        """Invalidate every cached shortest-path tree."""
+        with self.lock:
+            self.graph_version += 1
+            self.spt_cache.clear()
+
+    def _log_cost_changes(self, edge_ids, old_costs):
+        """New graph version after a partial cost update; cached trees are repaired from the log."""
+        with self.lock:
+            self.graph_version += 1
+            self.spt_cache.log_changes(self.graph_version, edge_ids, old_costs)
+
+    def derive(self, graph, name: str = DEFAULT_TOPOLOGY, snapshot: Optional[str] = None):
+        """
+        Create a router over another graph (or a snapshot) that shares this router's penalty model
+        """
+        return NeuroSymbolicRouting(graph=graph, penalty_source=self, name=name, snapshot=snapshot)
+
+    @property
+    def penalty_model(self):
+        return self.penalty.model
+
+    def _train_penalty_model(self):
+        try:
+            self.swap_penalty_model(train_penalty_model())
+            logging.info("Penalty model trained successfully.")
+        except Exception as e:
+            logging.error(f"Error training penalty model: {e}")
+            raise
+
+    def swap_penalty_model(self, model):
+        """
+        Serve a newly trained penalty model. The model is never refitted in place, so
+        a search running elsewhere sees either the old or the new model, never one
+        halfway through training. Every router sharing the evaluator recomputes its
+        edge costs before its next query.
+        """
+        with self.lock:
+            self.penalty.refresh(model)
+            self._bump_graph_version()
+
+    def build_network_graph(self):
+        """
+        Build enhanced network graph with more nodes and QoS metrics
+        """
+        with self.lock:
+            self.G = nx.Graph()
+            # Add more nodes for better network representation
+            for i in range(1, 12):  # Increased to 11 nodes
+                self.G.add_node(i)
+        
+            # Enhanced edges with QoS metrics
+            edges = [
+                (1, 2, {'base_cost': 5, 'congestion': 0.2, 'latency': 20, 'bandwidth': 1000, 'packet_loss': 0.1, 'jitter': 2}),
+                (1, 3, {'base_cost': 3, 'congestion': 0.1, 'latency': 15, 'bandwidth': 800, 'packet_loss': 0.2, 'jitter': 3}),
+                (2, 4, {'base_cost': 2, 'congestion': 0.5, 'latency': 25, 'bandwidth': 600, 'packet_loss': 0.3, 'jitter': 4}),
+                (3, 4, {'base_cost': 4, 'congestion': 0.3, 'latency': 30, 'bandwidth': 750, 'packet_loss': 0.15, 'jitter': 3}),
+                (4, 5, {'base_cost': 6, 'congestion': 0.2, 'latency': 18, 'bandwidth': 900, 'packet_loss': 0.1, 'jitter': 2}),
+                (5, 6, {'base_cost': 1, 'congestion': 0.7, 'latency': 35, 'bandwidth': 500, 'packet_loss': 0.4, 'jitter': 5}),
+                (3, 6, {'base_cost': 8, 'congestion': 0.1, 'latency': 22, 'bandwidth': 850, 'packet_loss': 0.2, 'jitter': 3}),
+                (6, 7, {'base_cost': 3, 'congestion': 0.4, 'latency': 28, 'bandwidth': 700, 'packet_loss': 0.25, 'jitter': 4}),
+                (4, 7, {'base_cost': 7, 'congestion': 0.3, 'latency': 24, 'bandwidth': 800, 'packet_loss': 0.15, 'jitter': 3}),
+                # New edges for enhanced connectivity
+                (7, 8, {'base_cost': 4, 'congestion': 0.2, 'latency': 20, 'bandwidth': 900, 'packet_loss': 0.1, 'jitter': 2}),
+                (8, 9, {'base_cost': 5, 'congestion': 0.3, 'latency': 25, 'bandwidth': 750, 'packet_loss': 0.2, 'jitter': 3}),
+                (9, 10, {'base_cost': 3, 'congestion': 0.4, 'latency': 30, 'bandwidth': 600, 'packet_loss': 0.3, 'jitter': 4}),
+                (10, 11, {'base_cost': 6, 'congestion': 0.1, 'latency': 15, 'bandwidth': 1000, 'packet_loss': 0.1, 'jitter': 2}),
+                (8, 11, {'base_cost': 7, 'congestion': 0.2, 'latency': 22, 'bandwidth': 850, 'packet_loss': 0.15, 'jitter': 3}),
+            ]
+        
+            for u, v, data in edges:
+                self.G.add_edge(u, v, **data)
+            self._index_graph()
+            self.refresh_dirty_costs()
+        
+            logging.info("Enhanced network graph built successfully with QoS metrics.")
+
+    def adjust_edge_cost(self, u, v):
+        """
+        Adjust edge cost based on QoS metrics and congestion
+        """
+        self.recompute_edge_costs([(u, v)])
+
+    def recompute_edge_costs(self, edges=None, edge_ids=None):
+        """
+        Recompute final_cost for many edges (all of them by default) at once:
+        attributes are read from the CSR arrays and the congestion penalty is
+        evaluated in a single call. Edges are given as (u, v) pairs or as CSR
+        edge numbers.
+        """
+        if edge_ids is not None:
+            if not len(edge_ids):
+                return
+        elif edges is None:
+            edge_ids = slice(None)
+        else:
+            edges = list(edges)
+            if not edges:
+                return
+            edge_ids = self.csr.edge_ids([u for u, _ in edges], [v for _, v in edges])
+        column = lambda key: self.csr.attributes[key][edge_ids]
+        full = isinstance(edge_ids, slice)
+        
+        with self._shared_section():
+            # Calculate QoS score
+            qos_score = (
+                self.qos_weights['latency'] * (1 / column('latency')) +
+                self.qos_weights['bandwidth'] * (column('bandwidth') / 1000) +
+                self.qos_weights['packet_loss'] * (1 - column('packet_loss')) +
+                self.qos_weights['jitter'] * (1 / column('jitter'))
+            )
+            
+            # Get congestion penalty
+            congestion = column('congestion')
+            learned_penalty = self.penalty(congestion)
+            fixed_penalty = np.where(congestion > 0.5, 3, 0)
+            
+            # Calculate final cost
+            final_cost = (
+                column('base_cost') * 
+                (1 + learned_penalty + fixed_penalty) * 
+                (1 / qos_score)
+            )
+            old_costs = self.csr.final_cost[edge_ids].copy()
+            if self.shared is not None:
+                # Published before the weights change, so searches running on them can tell
+                version = self.shared.bump("cost_version")
+                if full:
+                    self.shared.set_counter("full_cost_version", version)
+                else:
+                    self.shared.arrays['cost_stamps'][edge_ids] = version
+                self._synced_cost_version = version
+            if self.csr.set_costs(edge_ids, final_cost):
+                self._bounds_version += 1
+            if full:
+                self._bump_graph_version()
+            else:
+                self._log_cost_changes(edge_ids, old_costs)
+            if not self._lazy_graph:
+                edge_data = self._edge_data if full else [self._edge_data[e] for e in edge_ids.tolist()]
+                for data, cost in zip(edge_data, final_cost.tolist()):
+                    data['final_cost'] = cost
+
+    def adjust_costs(self):
+        """
+        Adjust all edge costs in the network
+        """
+        if self.csr is None:
+            raise ValueError("Graph not built. Run build_network_graph() first.")
+        
+        with self._shared_section():
+            if self.shared is not None and self._costs_version == self.penalty.version:
+                return  # another worker recomputed the shared costs while this one waited
+            self.recompute_edge_costs()
+            self.dirty_edges.clear()
+            self._costs_version = self.penalty.version
+            if self.shared is not None:
+                self.shared.set_counter("costs_penalty_version", self._costs_version)
+        
+        logging.info("Edge costs adjusted using QoS metrics and neuro-symbolic integration.")
+
+    def refresh_dirty_costs(self, edge_ids=None):
+        """
+        Recompute final_cost only for edges changed since the last route query (and
+        the CSR edge numbers in edge_ids), as one batch: however many updates
+        arrived, cached trees see a single change.
+        After the penalty model is retrained every edge is stale.
+        """
+        with self.lock:
+            self._sync_shared()
+            if self._costs_version != self.penalty.version:
+                refreshed = len(self.csr.final_cost)
+                self.adjust_costs()
+                return refreshed
+            # Dirty edges were checked against the CSR arrays when they were marked
+            dirty = list(self.dirty_edges)
+            stale = self.csr.edge_ids([u for u, _ in dirty], [v for _, v in dirty]) if dirty else np.zeros(0, dtype=np.int64)
+            if edge_ids is not None:
+                stale = np.union1d(stale, edge_ids)
+            self.recompute_edge_costs(edge_ids=stale)
+            refreshed = len(stale)
+            self.dirty_edges.clear()
+        return refreshed
+
+    def compute_optimal_path(self, source: int, target: int, algorithm: str = 'dijkstra', k: int = 3,
+                             backend: Optional[str] = None, limits: Optional[dict] = None,
+                             heuristic: Optional[str] = None):
+        """
+        Compute optimal path using specified algorithm
+        """
+        backend = backend or ROUTING_BACKEND
+        status = None
+        search_info = None
+        with self.lock:
+            self.prepare_route_query()
+            try:
+                kind = self.resolve_heuristic(heuristic) if algorithm == 'astar' else "none"
+                if backend == 'csr' and kind != "none":
+                    path, cost, search_info = self.astar_path(source, target, kind)
+                    paths, costs = [path], [cost]
+                elif backend == 'csr' and algorithm in ('dijkstra', 'astar'):
+                    # A* without a heuristic explores exactly like Dijkstra
+                    paths, costs = self.cached_path(source, target, algorithm)
+                else:
+                    csr = self.csr if backend == 'csr' else None
+                    bounds = self.heuristic(kind, target)
+                    if bounds is not None:
+                        bounds = dict(zip(self.csr.nodes.tolist(), bounds.tolist()))
+                        search_info = {"heuristic": kind}
+                    paths, costs, status = search_paths(self.G, source, target, algorithm, k, csr=csr,
+                                                        limits=limits, heuristic=bounds)
+            except Exception as e:
+                logging.error(f"Error computing optimal path: {e}")
+                raise
+            return self.record_route(source, target, algorithm, paths, costs, status, search_info)
+
+    def cached_path(self, source: int, target: int, algorithm: str = 'dijkstra'):
+        """
+        Answer a single-path query by walking a cached shortest-path tree from source
+        """
+        with self.lock:
+            dist, predecessors = self.spt_cache.tree(self.csr, source, algorithm, self.graph_version)
+            path, cost = self.csr.walk(dist, predecessors, source, target)
+            if self.shared is not None and self.shared.counter("cost_version") != self._synced_cost_version:
+                # Another worker changed the shared weights during the search; the tree may
+                # mix old and new costs, so it is answered from but not kept
+                self.spt_cache.discard(self.csr, source, algorithm)
+            return [path], [cost]
+
+    def prepare_landmarks(self, count: int = ALT_LANDMARKS):
+        """
+        Enable ALT (A*, landmarks, triangle inequality) for this topology and compute the
+        landmark distance arrays now; returns the landmark node ids
+        """
+        with self.lock:
+            self.landmark_count = count
+            self._alt = None
+            self.prepare_route_query()
+            _, rows, _ = self._landmark_distances()
+            return self.csr.nodes[rows].tolist()
+
+    def _landmark_distances(self):
+        """
+        Landmarks by farthest-point selection (each one maximizes the distance to those
+        already chosen, starting from the best-connected node) and their distances to
+        every node. Recomputed only after a cost decrease or structural change.
+        """
+        if self._alt is not None and self._alt[0] == self._bounds_version:
+            return self._alt
+        csr = self.csr
+        rows = [int(np.argmax(np.diff(csr.matrix.indptr)))]
+        distances = []
+        closest = np.full(len(csr.nodes), np.inf)
+        while True:
+            dist = csgraph_dijkstra(csr.matrix, directed=True, indices=rows[-1])
+            distances.append(dist)
+            closest = np.minimum(closest, dist)
+            if len(rows) >= min(self.landmark_count, len(csr.nodes)):
+                break
+            reachable = np.where(np.isfinite(closest), closest, -1.0)
+            candidate = int(np.argmax(reachable))
+            if reachable[candidate] <= 0:
+                break
+            rows.append(candidate)
+        self._alt = (self._bounds_version, np.array(rows), np.vstack(distances))
+        return self._alt
+
+    def _cost_per_km(self):
+        """Smallest final_cost per great-circle km over all edges: cost >= ratio x distance."""
+        if self._geo is None or self._geo[0] != self._bounds_version:
+            lengths = self.csr.edge_lengths_km()
+            positive = lengths > 0
+            ratio = float(np.min(self.csr.final_cost[positive] / lengths[positive])) if positive.any() else 0.0
+            self._geo = (self._bounds_version, ratio)
+        return self._geo[1]
+
+    def resolve_heuristic(self, heuristic: Optional[str] = None) -> str:
+        """Pick the A* heuristic: ALT once landmarks exist, else geographic when nodes have coordinates."""
+        if heuristic is None:
+            if self.landmark_count:
+                return "alt"
+            return "geo" if self.csr.coordinates is not None else "none"
+        if heuristic == "geo" and self.csr.coordinates is None:
+            raise ValueError("Topology nodes have no coordinates for the geo heuristic")
+        if heuristic == "alt" and not self.landmark_count:
+            self.landmark_count = ALT_LANDMARKS
+        return heuristic
+
+    def heuristic(self, kind: str, target: int):
+        """
+        Per-node lower bound on the cost to target. Both bounds are consistent, and are
+        shrunk by a relative 1e-9 so float rounding cannot make them overestimate.
+        """
+        if kind == "none":
+            return None
+        with self.lock:
+            t = int(self.csr.index(target))
+            if kind == "alt":
+                _, _, distances = self._landmark_distances()
+                bounds = np.abs(distances - distances[:, t:t + 1])
+                bounds[~np.isfinite(bounds)] = 0.0
+                bounds = bounds.max(axis=0)
+            else:
+                bounds = self._cost_per_km() * self.csr.great_circle_km(t)
+            return bounds * (1 - 1e-9)
+
+    def astar_path(self, source: int, target: int, heuristic: Optional[str] = None):
+        """
+        Goal-directed single-path search on the CSR arrays; returns (path, cost, search_info)
+        """
+        with self.lock:
+            kind = self.resolve_heuristic(heuristic)
+            path, cost, settled = self.csr.astar(source, target, self.heuristic(kind, target))
+            return path, cost, {"heuristic": kind, "nodes_settled": settled}
+
+    def route_pairs(self, pairs, backend: Optional[str] = None, include_paths: bool = True):
+        """
+        Batch single-path routing; CSR searches go through the shortest-path tree cache.
+        Batch routes are not added to the route history.
+        """
+        backend = backend or ROUTING_BACKEND
+        with self.lock:
+            self.prepare_route_query()
+            if backend != 'csr':
+                return route_pairs(self.G, None, pairs, include_paths)
+            tree = lambda source: self.spt_cache.tree(self.csr, source, 'dijkstra', self.graph_version)
+            return route_pairs(None, self.csr, pairs, include_paths, tree=tree)
+
+    def prepare_route_query(self):
+        """
+        Bring edge costs up to date before a path search. The graph persists across
+        queries, so only edges marked dirty since the last query are recomputed.
+        """
+        with self.lock:
+            if self.csr is None:
+                self.build_network_graph()
+            self.refresh_dirty_costs()
+
+    def graph_snapshot(self, algorithm: str = 'dijkstra', backend: Optional[str] = None):
+        """
+        Prepare the graph for a route query and pickle it for a worker process as
+        (key, csr, backend). Only the CSR arrays are sent; workers that need networkx
+        rebuild it from them once per key (see workers.py).
+        """
+        backend = backend or ROUTING_BACKEND
+        with self.lock:
+            self.prepare_route_query()
+            key = f"{self.name}:{self.topology_id}:{self.graph_version}"
+            return pickle.dumps((key, self.csr, backend), protocol=pickle.HIGHEST_PROTOCOL)
+
+    def record_route(self, source: int, target: int, algorithm: str, paths, costs, status: Optional[str] = None,
+                     search_info: Optional[dict] = None):
+        """
+        Store a computed route in the history and build the routing result
+        """
+        with self.lock:
+            # Store in route history
+            self.route_history.append(datetime.now(), source, target, algorithm, paths, costs)
+            
+            # Return enhanced routing results
+            result = {
+                'paths': paths,
+                'costs': costs,
+                'algorithm': algorithm,
+                'qos_metrics': self._get_path_qos_metrics(paths[0]),  # QoS metrics for the best path
+                # The best path as node index pairs into the cached topology of this version
+                'topology_version': self.topology_version(),
+                'path_edges': self._path_edges(paths[0])
+            }
+            if status is not None:
+                result['search_status'] = status  # why a k-shortest search stopped
+            if search_info is not None:
+                result['search_info'] = search_info  # A* heuristic and nodes settled
+            return result
+
+    def _get_path_qos_metrics(self, path):
+        """
+        Calculate aggregate QoS metrics for a path
+        """
+        total_latency = 0
+        min_bandwidth = float('inf')
+        total_packet_loss = 0
+        total_jitter = 0
+        
+        edge_ids = self.csr.edge_ids(path[:-1], path[1:])
+        latency, bandwidth, packet_loss, jitter = (
+            self.csr.attributes[key][edge_ids].tolist() for key in ('latency', 'bandwidth', 'packet_loss', 'jitter')
+        )
+        for i in range(len(edge_ids)):
+            total_latency += latency[i]
+            min_bandwidth = min(min_bandwidth, bandwidth[i])
+            total_packet_loss = 1 - ((1 - total_packet_loss) * (1 - packet_loss[i]))
+            total_jitter += jitter[i]
+        
+        return {
+            'end_to_end_latency': total_latency,
+            'available_bandwidth': min_bandwidth,
+            'packet_loss_probability': total_packet_loss,
+            'total_jitter': total_jitter
+        }
+
+    def _path_edges(self, path):
+        """
+        The edges of a path as (u, v) pairs of indices into the topology's node list
+        """
+        rows = self.csr.index(path).tolist()
+        return [[u, v] for u, v in zip(rows, rows[1:])]
+
+    def topology_version(self) -> str:
+        # Other workers may have changed the shared metrics since this one last synced
+        self._sync_shared()
+        return f"{self.topology_id}.{self.metrics_version}"
+
+    def _mark_metrics_changed(self, edge_ids):
+        """Start a new topology version in which the given edges changed."""
+        with self._shared_section():
+            if self.shared is not None:
+                self.metrics_version = self.shared.bump("metrics_version")
+            else:
+                self.metrics_version += 1
+            self.csr.edge_versions[edge_ids] = self.metrics_version
+
+    def topology_payload(self):
+        """
+        The static topology for visualization clients, JSON-encoded once per version:
+        node ids plus columnar edge arrays holding node index pairs and QoS metrics.
+        Returns (version, payload bytes).
+        """
+        with self._shared_section():
+            version = self.topology_version()
+            if self._topology_payload is None or self._topology_payload[0] != version:
+                u, v = self.csr.edge_rows
+                edges = {"source": u.tolist(), "target": v.tolist()}
+                edges.update((key, self.csr.attributes[key].tolist()) for key in VISUALIZATION_METRICS)
+                payload = {"version": version, "nodes": self.csr.nodes.tolist(), "edges": edges}
+                self._topology_payload = (version, json.dumps(payload).encode())
+            return self._topology_payload
+
+    def topology_delta(self, since: str):
+        """
+        Metrics of the edges changed after version since, as columnar arrays indexed
+        into the topology's edge list. Returns None when since belongs to another build
+        of the topology, so the client has to fetch it again.
+        """
+        topology_id, _, counter = since.strip('"').partition(".")
+        if not counter.isdigit():
+            raise ValueError(f"Invalid topology version '{since}'")
+        with self._shared_section():
+            if topology_id != self.topology_id or int(counter) > self.metrics_version:
+                return None
+            changed = np.flatnonzero(self.csr.edge_versions > int(counter))
+            edges = {"index": changed.tolist()}
+            edges.update((key, self.csr.attributes[key][changed].tolist()) for key in VISUALIZATION_METRICS)
+            return {"version": self.topology_version(), "since": since.strip('"'), "edges": edges}
+
+    def get_route_history(self, cursor: Optional[int] = None, limit: int = ROUTE_HISTORY_PAGE_SIZE,
+                          since: Optional[datetime] = None, until: Optional[datetime] = None):
+        """
+        Get one page of the routing history, newest first; returns (entries, next_cursor)
+        """
+        return self.route_history.page(cursor, limit, since, until)
+
+    def update_edge_congestion(self, u: int, v: int, new_congestion: float):
+        """
+        Update congestion value for an edge
+        """
+        with self.lock:
+            if self.csr is None:
+                raise ValueError(f"Edge ({u}, {v}) not found in graph")
+            try:
+                edge_ids = self.csr.edge_ids([u], [v])
+            except KeyError:
+                raise ValueError(f"Edge ({u}, {v}) not found in graph")
+            
+            if not 0 <= new_congestion <= 1:
+                raise ValueError("Congestion value must be between 0 and 1")
+            
+            if self.shared is not None:
+                # Other workers never see this worker's dirty edges, so the cost is published now
+                self.update_edge_congestions([u], [v], [new_congestion])
+            else:
+                if not self._lazy_graph:
+                    self.G[u][v]['congestion'] = new_congestion
+                self.csr.attributes['congestion'][edge_ids] = new_congestion
+                self._mark_metrics_changed(edge_ids)
+                # The cost is recomputed, and cached trees repaired, at the next route query
+                self.dirty_edges.add((u, v))
+        logging.info(f"Updated congestion for edge ({u}, {v}) to {new_congestion}")
+
+    def update_edge_congestions(self, us, vs, values):
+        """
+        Apply a batch of congestion readings atomically. Every edge and value is checked
+        before any is written; the batch then gets one topology version, and the costs
+        of its edges (with any still dirty) are recomputed in one vectorized pass under
+        one graph version. When an edge appears more than once its last reading wins.
+        """
+        us = np.asarray(us, dtype=np.int64)
+        vs = np.asarray(vs, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        if not len(us) == len(vs) == len(values):
+            raise ValueError("u, v and congestion must have the same length")
+        if not np.all((values >= 0) & (values <= 1)):
+            raise ValueError("Congestion value must be between 0 and 1")
+        with self._shared_section():
+            if self.csr is None:
+                raise ValueError("Graph not built. Run build_network_graph() first.")
+            try:
+                edge_ids = self.csr.edge_ids(us, vs)
+            except KeyError as e:
+                missing = e.args[0]
+                kind = "Edge" if isinstance(missing, tuple) else "Node"
+                raise ValueError(f"{kind} {missing} not found in graph")
+            # Keep each edge's last reading
+            edge_ids, last = np.unique(edge_ids[::-1], return_index=True)
+            values = values[::-1][last]
+            self.csr.attributes['congestion'][edge_ids] = values
+            if not self._lazy_graph:
+                for e, value in zip(edge_ids.tolist(), values.tolist()):
+                    self._edge_data[e]['congestion'] = value
+            self._mark_metrics_changed(edge_ids)
+            self.refresh_dirty_costs(edge_ids)
+            return {
+                "updated": len(edge_ids),
+                "graph_version": self.graph_version,
+                "topology_version": self.topology_version()
+            }
@@ -0,0 +1,153 @@
+import numpy as np
+import networkx as nx
+import time
+from typing import Optional
+
+KSP_TIME_BUDGET = 5.0  # Default seconds a k-shortest-paths search may run before returning what it has
+KSP_MAX_CANDIDATES = 1000  # Yen candidates a k-shortest-paths search may draw, filtered ones included
+
+# =============================================================================
+# Path Search: Dijkstra, A* and k-shortest paths over a routing graph
+# =============================================================================
+def path_cost(G, path, weight: str = 'final_cost'):
+    return sum(G[path[i]][path[i+1]][weight] for i in range(len(path)-1))
+
+def k_shortest_paths(G, source: int, target: int, k: int = 3, weight: str = 'final_cost',
+                     max_cost_ratio: Optional[float] = None, max_hops: Optional[int] = None,
+                     max_overlap: Optional[float] = None, time_budget: Optional[float] = KSP_TIME_BUDGET,
+                     max_candidates: Optional[int] = KSP_MAX_CANDIDATES):
+    """
+    Up to k loopless paths in increasing cost, drawn lazily from Yen's algorithm
+    (nx.shortest_simple_paths) so the search stops as soon as it has enough.
+
+    Limits:
+        max_cost_ratio: stop once a path costs more than (1 + ratio) x the best path
+        max_hops: skip paths with more edges
+        max_overlap: skip paths sharing more than this fraction of their edges with
+            an accepted path
+        time_budget: stop after this many seconds, keeping the paths found so far
+            (checked before every candidate, so one Yen step can overrun it)
+        max_candidates: stop after drawing this many candidates, counting those the
+            hop and overlap filters reject
+
+    Returns (paths, costs, status); status is "complete" when k paths were found,
+    "exhausted" when no simple paths remain, or "cost_ceiling", "time_budget" or
+    "candidate_limit". Paths may be empty when every candidate was filtered out.
+    """
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    paths, costs, edge_sets = [], [], []
+    best_cost = None
+    drawn = 0
+    candidates = nx.shortest_simple_paths(G, source, target, weight=weight)
+    while len(paths) < k:
+        if deadline is not None and time.monotonic() > deadline:
+            return paths, costs, "time_budget"
+        if max_candidates is not None and drawn >= max_candidates:
+            return paths, costs, "candidate_limit"
+        path = next(candidates, None)
+        if path is None:
+            return paths, costs, "exhausted"
+        drawn += 1
+        cost = path_cost(G, path, weight)
+        if best_cost is None:
+            best_cost = cost
+        elif max_cost_ratio is not None and cost > best_cost * (1 + max_cost_ratio):
+            # Candidates arrive in cost order, so nothing later can qualify either
+            return paths, costs, "cost_ceiling"
+        if max_hops is not None and len(path) - 1 > max_hops:
+            continue
+        edges = {frozenset(edge) for edge in zip(path, path[1:])}
+        if max_overlap is not None and edges and any(
+            len(edges & accepted) / len(edges) > max_overlap for accepted in edge_sets
+        ):
+            continue
+        paths.append(path)
+        costs.append(cost)
+        edge_sets.append(edges)
+    return paths, costs, "complete"
+
+def search_paths(G, source: int, target: int, algorithm: str = 'dijkstra', k: int = 3, csr=None,
+                 limits: Optional[dict] = None, heuristic: Optional[dict] = None):
+    """
+    Run the path search for a routing query on a prepared graph.
+    Kept free of routing state so it can run in a worker process (see workers.py).
+    With a CSRGraph, single-path queries run one scipy search instead of networkx.
+    limits are passed to k_shortest_paths; heuristic maps nodes to A* lower bounds on
+    the cost to target. Returns (paths, costs, status), where
+    status is the k-shortest-paths stopping reason and None for single-path searches.
+    """
+    paths = []
+    costs = []
+    status = None
+    
+    if csr is not None and algorithm == 'astar' and heuristic is not None:
+        bounds = np.array([heuristic.get(node, 0.0) for node in csr.nodes.tolist()])
+        path, cost, _ = csr.astar(source, target, bounds)
+        paths.append(path)
+        costs.append(cost)
+    
+    elif csr is not None and algorithm in ('dijkstra', 'astar'):
+        # A* without a heuristic explores exactly like Dijkstra
+        path, cost = csr.shortest_path(source, target)
+        paths.append(path)
+        costs.append(cost)
+    
+    elif algorithm == 'dijkstra':
+        path = nx.dijkstra_path(G, source, target, weight='final_cost')
+        cost = nx.dijkstra_path_length(G, source, target, weight='final_cost')
+        paths.append(path)
+        costs.append(cost)
+    
+    elif algorithm == 'astar':
+        bound = (lambda u, _: heuristic.get(u, 0.0)) if heuristic is not None else None
+        path = nx.astar_path(G, source, target, heuristic=bound, weight='final_cost')
+        cost = path_cost(G, path)
+        paths.append(path)
+        costs.append(cost)
+    
+    elif algorithm == 'k_shortest':
+        # Get k shortest paths using Yen's algorithm
+        paths, costs, status = k_shortest_paths(G, source, target, k, **(limits or {}))
+        if not paths:
+            raise nx.NetworkXNoPath(
+                f"No path from {source} to {target} satisfies the k-shortest limits (search stopped: {status})"
+            )
+    
+    return paths, costs, status
+
+def route_pairs(G, csr, pairs, include_paths: bool = True, tree=None):
+    """
+    Best path and cost for many (source, target) pairs, with one single-source search
+    per distinct source. With a CSRGraph the search is csgraph.dijkstra (or tree(source)
+    when the caller has cached trees); otherwise networkx on G. Results are in pair
+    order, with None for unreachable targets and for paths when include_paths is False.
+    """
+    paths = [None] * len(pairs)
+    costs = [None] * len(pairs)
+    groups = {}
+    for i, (source, _) in enumerate(pairs):
+        groups.setdefault(source, []).append(i)
+    
+    for source, members in groups.items():
+        if csr is not None:
+            dist, predecessors = tree(source) if tree else csr.shortest_path_tree(csr.index(source))
+            for i in members:
+                try:
+                    path, cost = csr.walk(dist, predecessors, source, pairs[i][1])
+                except nx.NetworkXNoPath:
+                    continue
+                costs[i] = cost
+                paths[i] = path if include_paths else None
+        else:
+            predecessors, dist = nx.dijkstra_predecessor_and_distance(G, source, weight='final_cost')
+            for i in members:
+                target = pairs[i][1]
+                if target not in dist:
+                    continue
+                costs[i] = dist[target]
+                if include_paths:
+                    path = [target]
+                    while path[-1] != source:
+                        path.append(predecessors[path[-1]][0])
+                    paths[i] = path[::-1]
+    return paths, costs
@@ -0,0 +1,128 @@
+import numpy as np
+from collections import OrderedDict
+from .csr import CSRGraph
+
+SPT_CACHE_BUDGET = 64 * 1024 * 1024  # Bytes of cached shortest-path trees per topology
+SPT_PRECOMPUTE_NODES = 1024  # Graphs up to this size cache all-pairs trees from one search
+SPT_REPAIR_MAX_FRACTION = 0.05  # Share of nodes an incremental tree repair may touch before a full search is cheaper
+
+# =============================================================================
+# Shortest-Path Tree Cache
+# =============================================================================
+class ShortestPathTreeCache:
+    """
+    Shortest-path trees of one CSRGraph keyed by (source, algorithm) and stamped with
+    the graph version they were computed at, so a tree is only served while the edge
+    costs it was built from are current.
+
+    Graphs of up to precompute_nodes nodes get every tree from a single all-pairs
+    search. Larger graphs keep an LRU of single-source trees bounded by memory_budget.
+    Callers serialize access (NeuroSymbolicRouting holds its lock).
+
+    Partial cost updates are logged with log_changes() instead of clearing the cache.
+    A stale tree is repaired when it is next requested, from the net change of every
+    edge updated since it was built, so a burst of updates costs one repair pass per
+    tree. Trees too far behind the log, or whose repair would touch more than
+    repair_fraction of the nodes, are searched again.
+    """
+    def __init__(self, memory_budget: int = SPT_CACHE_BUDGET, precompute_nodes: int = SPT_PRECOMPUTE_NODES,
+                 repair_fraction: float = SPT_REPAIR_MAX_FRACTION):
+        self.memory_budget = memory_budget
+        self.precompute_nodes = precompute_nodes
+        self.repair_fraction = repair_fraction
+        self._trees = OrderedDict()
+        self._all_pairs = None  # (version, dist, predecessors) for small graphs
+        self._changes = []  # (version, edge numbers, costs before that version) in version order
+        self.hits = 0
+        self.misses = 0
+        self.repairs = 0
+        self.repair_fallbacks = 0
+
+    def tree(self, csr: CSRGraph, source: int, algorithm: str, version: int):
+        """Distances and predecessors rooted at source, searched only on a miss."""
+        row = int(csr.index(source))
+        if len(csr.nodes) <= self.precompute_nodes:
+            if self._all_pairs is None or self._all_pairs[0] != version:
+                self.misses += 1
+                self._all_pairs = (version, *csr.shortest_path_tree())
+            else:
+                self.hits += 1
+            _, dist, predecessors = self._all_pairs
+            return dist[row], predecessors[row]
+        
+        key = (row, algorithm)
+        entry = self._trees.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            self._trees.move_to_end(key)
+            return entry[1], entry[2]
+        if entry is not None and self._repair(csr, entry):
+            self.repairs += 1
+            self._trees[key] = (version, entry[1], entry[2])
+            self._trees.move_to_end(key)
+            self._trim()
+            return entry[1], entry[2]
+        self.misses += 1
+        dist, predecessors = csr.shortest_path_tree(row)
+        self._trees[key] = (version, dist, predecessors)
+        self._trees.move_to_end(key)
+        capacity = max(1, self.memory_budget // (dist.nbytes + predecessors.nbytes))
+        while len(self._trees) > capacity:
+            self._trees.popitem(last=False)
+        self._trim()
+        return dist, predecessors
+
+    def log_changes(self, version: int, edges, old_costs):
+        """Record that the costs of edges (numbers into the CSRGraph) changed from old_costs at version."""
+        if self._trees:
+            self._changes.append((version, np.asarray(edges), np.asarray(old_costs, dtype=np.float64)))
+            self._trim()
+
+    def _repair(self, csr: CSRGraph, entry):
+        """Bring a stale single-source tree up to date from the change log."""
+        version, dist, predecessors = entry
+        if not self._changes or self._changes[0][0] > version + 1:
+            return False  # the log no longer reaches back to this tree
+        pending = [change for change in self._changes if change[0] > version]
+        edges = np.concatenate([change[1] for change in pending])
+        old_costs = np.concatenate([change[2] for change in pending])
+        # The earliest logged cost of each edge is its cost when the tree was built
+        edges, first = np.unique(edges, return_index=True)
+        old_costs = old_costs[first]
+        changed = old_costs != csr.final_cost[edges]
+        max_settled = max(1, int(self.repair_fraction * len(csr.nodes)))
+        if csr.repair_tree(dist, predecessors, edges[changed], old_costs[changed], max_settled):
+            return True
+        self.repair_fallbacks += 1
+        return False
+
+    def _trim(self):
+        """Drop log entries every cached tree has already absorbed."""
+        if not self._trees:
+            self._changes.clear()
+            return
+        oldest = min(entry[0] for entry in self._trees.values())
+        self._changes = [change for change in self._changes if change[0] > oldest]
+
+    def discard(self, csr: CSRGraph, source: int, algorithm: str):
+        """Drop the tree rooted at source, e.g. one searched while the weights were changing."""
+        if len(csr.nodes) <= self.precompute_nodes:
+            self._all_pairs = None
+        else:
+            self._trees.pop((int(csr.index(source)), algorithm), None)
+
+    def clear(self):
+        self._trees.clear()
+        self._all_pairs = None
+        self._changes.clear()
+
+    def stats(self):
+        return {
+            "trees": len(self._trees) if self._all_pairs is None else len(self._all_pairs[1]),
+            "all_pairs": self._all_pairs is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "repairs": self.repairs,
+            "repair_fallbacks": self.repair_fallbacks,
+            "pending_changes": sum(len(change[1]) for change in self._changes)
+        }
@@ -0,0 +1,188 @@
+import numpy as np
+import networkx as nx
+import logging
+import json
+import os
+import csv
+import itertools
+from typing import Optional
+
+# Topology files are read in chunks of TOPOLOGY_CHUNK_ROWS edges
+TOPOLOGY_CHUNK_ROWS = 50000
+TOPOLOGY_FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".json": "json", ".graphml": "graphml"}
+QOS_ATTRIBUTES = ("base_cost", "congestion", "latency", "bandwidth", "packet_loss", "jitter")
+
+# =============================================================================
+# Topology Loading
+# =============================================================================
+def topology_format(path: str, fmt: Optional[str] = None) -> str:
+    """Resolve a topology file format from an explicit name or the file extension."""
+    fmt = fmt or TOPOLOGY_FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt not in set(TOPOLOGY_FORMATS.values()):
+        raise ValueError(f"Topology format must be one of {sorted(set(TOPOLOGY_FORMATS.values()))}")
+    return fmt
+
+def _edge_record(edge, row: int):
+    """Source, target and attribute values of one JSON edge object."""
+    try:
+        return [edge["source"], edge["target"]] + [edge[name] for name in QOS_ATTRIBUTES]
+    except KeyError as e:
+        raise ValueError(f"Malformed topology edge at row {row}: missing {e}")
+    except TypeError:
+        raise ValueError(f"Malformed topology edge at row {row}: expected an object")
+
+def _edge_rows(path: str, fmt: str, coordinates: Optional[dict] = None):
+    """
+    Yield (source, target, attribute values in QOS_ATTRIBUTES order) for every edge in a file.
+    JSON and GraphML documents may also give nodes "lat"/"lon"; those are added to coordinates.
+    Edges missing a field raise ValueError naming their row.
+    """
+    if fmt == "csv":
+        with open(path, newline="") as f:
+            reader = csv.reader(f)
+            header = [name.strip() for name in next(reader, [])]
+            missing = [name for name in ("source", "target") + QOS_ATTRIBUTES if name not in header]
+            if missing:
+                raise ValueError(f"Topology CSV is missing columns: {missing}")
+            columns = [header.index(name) for name in ("source", "target") + QOS_ATTRIBUTES]
+            width = max(columns) + 1
+            for n, row in enumerate(filter(None, reader)):
+                if len(row) < width:
+                    raise ValueError(f"Malformed topology edge at row {n}: expected {len(header)} columns, got {len(row)}")
+                yield [row[i] for i in columns]
+    elif fmt == "ndjson":
+        with open(path) as f:
+            for i, line in enumerate(line for line in f if line.strip()):
+                try:
+                    edge = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"Malformed topology edge at row {i}: {e}")
+                yield _edge_record(edge, i)
+    elif fmt == "json":
+        with open(path) as f:
+            data = json.load(f)
+        edges = data.get("links", data.get("edges", [])) if isinstance(data, dict) else data
+        if coordinates is not None and isinstance(data, dict):
+            try:
+                coordinates.update(
+                    (node["id"], (node["lat"], node["lon"]))
+                    for node in data.get("nodes", []) if "lat" in node and "lon" in node
+                )
+            except (KeyError, TypeError) as e:
+                raise ValueError(f"Malformed topology node: {e}")
+        for i, edge in enumerate(edges):
+            yield _edge_record(edge, i)
+    else:
+        G = nx.read_graphml(path, node_type=int)
+        if coordinates is not None:
+            coordinates.update(
+                (node, (attrs["lat"], attrs["lon"]))
+                for node, attrs in G.nodes(data=True) if "lat" in attrs and "lon" in attrs
+            )
+        for i, (u, v, attrs) in enumerate(G.edges(data=True)):
+            yield _edge_record(dict(attrs, source=u, target=v), i)
+
+def iter_topology_chunks(path: str, fmt: Optional[str] = None, chunk_rows: int = TOPOLOGY_CHUNK_ROWS,
+                         coordinates: Optional[dict] = None):
+    """
+    Read a topology file as chunks of (sources, targets, attributes) arrays.
+
+    CSV and NDJSON edge lists are streamed from disk; JSON (node-link) and GraphML
+    documents are parsed whole and then chunked. Every edge needs a source and target
+    node id plus the QOS_ATTRIBUTES columns.
+    """
+    rows = _edge_rows(path, topology_format(path, fmt), coordinates)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_rows))
+        if not chunk:
+            return
+        try:
+            table = np.array(chunk, dtype=object)
+            sources = table[:, 0].astype(np.int64)
+            targets = table[:, 1].astype(np.int64)
+            attributes = table[:, 2:].astype(np.float64)
+        except (TypeError, ValueError, IndexError) as e:
+            raise ValueError(f"Malformed topology edge: {e}")
+        yield sources, targets, attributes
+
+def _validate_edge_chunk(sources, targets, attributes, offset: int):
+    """Vectorized QoS attribute checks for one chunk of edges."""
+    columns = dict(zip(QOS_ATTRIBUTES, attributes.T))
+    checks = [
+        (np.all(np.isfinite(attributes), axis=1), "attributes must be finite"),
+        (columns["latency"] > 0, "latency must be positive"),
+        (columns["jitter"] > 0, "jitter must be positive"),
+        (columns["bandwidth"] >= 0, "bandwidth cannot be negative"),
+        (columns["base_cost"] >= 0, "base_cost cannot be negative"),
+        ((columns["packet_loss"] >= 0) & (columns["packet_loss"] <= 1), "packet_loss must be between 0 and 1"),
+        ((columns["congestion"] >= 0) & (columns["congestion"] <= 1), "congestion must be between 0 and 1"),
+        (sources != targets, "self-loops are not allowed"),
+    ]
+    for valid, message in checks:
+        if not valid.all():
+            i = int(np.argmin(valid))
+            raise ValueError(f"Edge {offset + i} ({sources[i]}, {targets[i]}): {message}")
+
+def read_node_coordinates(path: str):
+    """Stream (node id, (lat, lon)) pairs from an "id,lat,lon" CSV or an NDJSON file."""
+    if topology_format(path) == "ndjson":
+        with open(path) as f:
+            for n, line in enumerate(line for line in f if line.strip()):
+                try:
+                    node = json.loads(line)
+                    record = int(node["id"]), (node["lat"], node["lon"])
+                except (KeyError, TypeError, ValueError) as e:
+                    raise ValueError(f"Malformed node coordinates at row {n}: {e}")
+                yield record
+        return
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        if not {"id", "lat", "lon"} <= set(reader.fieldnames or []):
+            raise ValueError("Node coordinate CSV needs id, lat and lon columns")
+        for n, row in enumerate(reader):
+            try:
+                node = int(row["id"])
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Malformed node coordinates at row {n}: {e}")
+            yield node, (row["lat"], row["lon"])
+
+def _apply_node_coordinates(G, coordinates: dict):
+    """Validate coordinates in degrees and store them as node "lat"/"lon" attributes."""
+    nodes = [node for node in coordinates if node in G]
+    if not nodes:
+        return
+    try:
+        table = np.array([coordinates[node] for node in nodes], dtype=np.float64)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Malformed node coordinates: {e}")
+    valid = (np.abs(table[:, 0]) <= 90) & (np.abs(table[:, 1]) <= 180)
+    if not valid.all():
+        raise ValueError(f"Node {nodes[int(np.argmin(valid))]}: lat must be within ±90 and lon within ±180")
+    for node, (lat, lon) in zip(nodes, table.tolist()):
+        G.nodes[node]["lat"] = lat
+        G.nodes[node]["lon"] = lon
+
+def load_topology(path: str, fmt: Optional[str] = None, chunk_rows: int = TOPOLOGY_CHUNK_ROWS,
+                  nodes_path: Optional[str] = None):
+    """
+    Load a routing graph with QoS edge attributes from an edge-list CSV, NDJSON,
+    JSON node-link or GraphML file. Node coordinates come from the document's
+    nodes (JSON, GraphML) and/or a separate nodes file (nodes_path).
+    """
+    G = nx.Graph()
+    offset = 0
+    coordinates = {}
+    for sources, targets, attributes in iter_topology_chunks(path, fmt, chunk_rows, coordinates):
+        _validate_edge_chunk(sources, targets, attributes, offset)
+        G.add_edges_from(zip(
+            sources.tolist(), targets.tolist(),
+            (dict(zip(QOS_ATTRIBUTES, row)) for row in attributes.tolist())
+        ))
+        offset += len(sources)
+    if G.number_of_edges() == 0:
+        raise ValueError("Topology has no edges")
+    if nodes_path is not None:
+        coordinates.update(read_node_coordinates(nodes_path))
+    _apply_node_coordinates(G, coordinates)
+    logging.info(f"Loaded topology from {path}: {G.number_of_nodes()} nodes, {G.number_of_edges()} edges")
+    return G
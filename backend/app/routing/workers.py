@@ -0,0 +1,51 @@
+import networkx as nx
+import pickle
+from collections import OrderedDict
+from typing import Optional
+from .search import search_paths, route_pairs
+
+WORKER_GRAPH_CACHE_SIZE = 4  # networkx graphs a worker process keeps, rebuilt from CSR snapshots
+
+# =============================================================================
+# Worker Entry Points: tasks the compute executor runs in its process pool
+# =============================================================================
+# Spawned workers import only this module and what it needs to unpickle a task, never
+# the API module, so starting a worker does not build the app, train models or load
+# topologies. Snapshots come from NeuroSymbolicRouting.graph_snapshot().
+_graphs = OrderedDict()
+
+def networkx_graph(key: str, csr):
+    """
+    networkx graph with final_cost edge weights for a CSR snapshot. Graphs are rebuilt
+    once per key (topology and graph version) and process, and the least recently used
+    ones are dropped beyond WORKER_GRAPH_CACHE_SIZE.
+    """
+    G = _graphs.get(key)
+    if G is not None:
+        _graphs.move_to_end(key)
+        return G
+    G = nx.Graph()
+    G.add_nodes_from(csr.nodes.tolist())
+    u, v = csr.edge_rows
+    G.add_weighted_edges_from(
+        zip(csr.nodes[u].tolist(), csr.nodes[v].tolist(), csr.final_cost.tolist()), weight='final_cost'
+    )
+    _graphs[key] = G
+    while len(_graphs) > WORKER_GRAPH_CACHE_SIZE:
+        _graphs.popitem(last=False)
+    return G
+
+def search_paths_task(snapshot: bytes, source: int, target: int, algorithm: str, k: int,
+                      limits: Optional[dict] = None):
+    """Answer one routing query on a pickled (key, csr, backend) snapshot."""
+    key, csr, backend = pickle.loads(snapshot)
+    if backend == 'csr' and algorithm in ('dijkstra', 'astar'):
+        return search_paths(None, source, target, algorithm, k, csr=csr, limits=limits)
+    return search_paths(networkx_graph(key, csr), source, target, algorithm, k, limits=limits)
+
+def route_pairs_task(snapshot: bytes, pairs, include_paths: bool):
+    """Batch-route pairs on a pickled (key, csr, backend) snapshot."""
+    key, csr, backend = pickle.loads(snapshot)
+    if backend == 'csr':
+        return route_pairs(None, csr, pairs, include_paths)
+    return route_pairs(networkx_graph(key, csr), None, pairs, include_paths)
@@ -0,0 +1,91 @@
+import numpy as np
+import os
+import threading
+import contextlib
+import mmap
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; shared state is then disabled
+    fcntl = None
+
+# =============================================================================
+# Shared State: arrays memory-mapped by every worker process
+# =============================================================================
+# Directory (ideally on /dev/shm) for routing state memory-mapped by every worker process; unset = per-process state
+SHARED_STATE_DIR = os.getenv("RESILIENCE_SHARED_STATE_DIR")
+
+class SharedState:
+    """
+    Int64 counters and named arrays in one memory-mapped file. Every worker process
+    that opens the same path maps the same pages, so reads are zero-copy and a write
+    is visible to all workers at once.
+
+    The first process to open the file fills it through initialize(state) while holding
+    the write lock; the others wait for that lock and then map the result. Writers hold
+    write_lock(), an flock that serializes them across processes (and a lock for the
+    threads of one process), and publish a change by bumping a counter after its arrays
+    are written, so readers only need to poll the counters.
+    """
+    def __init__(self, path: str, counters, arrays: dict, initialize=None):
+        if fcntl is None:
+            raise RuntimeError("Shared state needs fcntl, which this platform does not provide")
+        self.path = path
+        self._index = {name: i for i, name in enumerate(("ready",) + tuple(counters))}
+        # Counters first, then each array, all 64-byte aligned
+        offset = -(-8 * len(self._index) // 64) * 64
+        layout = []
+        for name, (dtype, shape) in arrays.items():
+            dtype = np.dtype(dtype)
+            shape = (shape,) if isinstance(shape, int) else tuple(shape)
+            layout.append((name, dtype, shape, offset))
+            offset += -(-dtype.itemsize * int(np.prod(shape)) // 64) * 64
+        self._lock = threading.RLock()
+        self._depth = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self.write_lock():
+            if os.fstat(self._fd).st_size != offset:
+                # New file, or one left behind with another layout: start from zeros
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, offset)
+            self._mmap = mmap.mmap(self._fd, offset)
+            self._counters = np.ndarray(len(self._index), dtype=np.int64, buffer=self._mmap)
+            self.arrays = {
+                name: np.ndarray(shape, dtype=dtype, buffer=self._mmap, offset=start)
+                for name, dtype, shape, start in layout
+            }
+            if not self._counters[0]:
+                if initialize is not None:
+                    initialize(self)
+                self._counters[0] = 1
+
+    @contextlib.contextmanager
+    def write_lock(self):
+        """Exclusive across processes and threads; re-entrant within one thread."""
+        with self._lock:
+            if self._depth == 0:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def counter(self, name: str) -> int:
+        return int(self._counters[self._index[name]])
+
+    def set_counter(self, name: str, value: int):
+        self._counters[self._index[name]] = value
+
+    def bump(self, name: str) -> int:
+        """Increment a counter (under write_lock()) and return its new value."""
+        i = self._index[name]
+        self._counters[i] += 1
+        return int(self._counters[i])
+
+    @property
+    def nbytes(self):
+        return len(self._mmap)
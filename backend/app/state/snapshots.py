@@ -0,0 +1,65 @@
+import numpy as np
+import json
+import os
+import time
+import shutil
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; snapshot writers are then not serialized across processes
+    fcntl = None
+
+# Directory for warm-start snapshots of topologies, the penalty model and detectors; unset = no snapshots
+SNAPSHOT_DIR = os.getenv("RESILIENCE_SNAPSHOT_DIR")
+SNAPSHOT_INTERVAL = float(os.getenv("RESILIENCE_SNAPSHOT_INTERVAL", "300"))  # Seconds between background snapshots
+
+# =============================================================================
+# Snapshots: versioned directories of .npy files for warm startup
+# =============================================================================
+def write_snapshot(directory: str, arrays: dict, meta: dict) -> str:
+    """
+    Write arrays as .npy files into a new subdirectory of directory, then point
+    current.json at it with an atomic rename, so readers (and a restart after a crash
+    mid-write) only ever see a complete snapshot. Older subdirectories are removed;
+    processes still mapping their files keep them until they unmap. Returns the path.
+    """
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, ".lock"), "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # worker processes snapshotting the same topology
+        snapshot_id = f"{time.time_ns():x}-{os.getpid()}"
+        path = os.path.join(directory, snapshot_id)
+        os.makedirs(path)
+        for name, array in arrays.items():
+            np.save(os.path.join(path, name + ".npy"), np.ascontiguousarray(array))
+        meta = dict(meta, id=snapshot_id, arrays=sorted(arrays), created_at=datetime.now().isoformat())
+        tmp_path = os.path.join(directory, f"current.json.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(directory, "current.json"))
+        for entry in os.listdir(directory):
+            if entry != snapshot_id and os.path.isdir(os.path.join(directory, entry)):
+                shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+    return path
+
+def read_snapshot(directory: str, writable=()):
+    """
+    Metadata and memory-mapped arrays of the current snapshot in directory, or None when
+    there is none. Pages are read on first access; arrays named in writable are mapped
+    copy-on-write, so updates stay private to this process.
+    """
+    current = os.path.join(directory, "current.json")
+    if not os.path.exists(current):
+        return None
+    with open(current) as f:
+        meta = json.load(f)
+    path = os.path.join(directory, meta["id"])
+    arrays = {}
+    for name in meta["arrays"]:
+        file_path = os.path.join(path, name + ".npy")
+        try:
+            arrays[name] = np.load(file_path, mmap_mode="c" if name in writable else "r")
+        except ValueError:  # empty arrays cannot be mapped
+            arrays[name] = np.load(file_path)
+    return meta, arrays
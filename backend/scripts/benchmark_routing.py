@@ -0,0 +1,89 @@
+"""
+Benchmark single-path searches on a topology file: scipy's full Dijkstra, Dijkstra with
+early exit, and A* with the geographic and ALT heuristics.
+
+Run from the backend directory:
+    python -m scripts.benchmark_routing topology.csv --nodes nodes.csv --queries 100
+"""
+import argparse
+import json
+import numpy as np
+import networkx as nx
+import time
+from app.routing.router import ALT_LANDMARKS, NeuroSymbolicRouting
+from app.routing.topology import load_topology
+
+def benchmark_routing(router: NeuroSymbolicRouting, queries: int = 20, seed: int = 0):
+    """
+    Compare single-path searches on random reachable (source, target) pairs: scipy's
+    full single-source Dijkstra, Dijkstra with early exit, and A* with each heuristic
+    the topology supports. Reports mean nodes settled and latency per query, and the
+    largest cost difference from scipy's answer (which should be zero).
+    """
+    with router.lock:
+        router.prepare_route_query()
+        csr = router.csr
+        rng = np.random.default_rng(seed)
+        pairs = []
+        for _ in range(queries * 10):
+            if len(pairs) == queries:
+                break
+            source, target = csr.nodes[rng.integers(len(csr.nodes), size=2)].tolist()
+            try:
+                pairs.append((source, target, csr.shortest_path(source, target)[1]))
+            except nx.NetworkXNoPath:
+                continue
+        
+        modes = {"dijkstra_scipy": None, "dijkstra_early_exit": "none"}
+        if csr.coordinates is not None:
+            modes["astar_geo"] = "geo"
+        landmark_count = router.landmark_count
+        router.landmark_count = landmark_count or ALT_LANDMARKS
+        started = time.perf_counter()
+        router._landmark_distances()
+        alt_preprocessing_ms = (time.perf_counter() - started) * 1000
+        modes["astar_alt"] = "alt"
+        
+        results = {}
+        for mode, kind in modes.items():
+            settled, elapsed, error = [], 0.0, 0.0
+            for source, target, expected in pairs:
+                started = time.perf_counter()
+                if kind is None:
+                    dist, _ = csr.shortest_path_tree(csr.index(source))
+                    cost, count = float(dist[csr.index(target)]), int(np.isfinite(dist).sum())
+                else:
+                    _, cost, count = csr.astar(source, target, router.heuristic(kind, target))
+                elapsed += time.perf_counter() - started
+                settled.append(count)
+                error = max(error, abs(cost - expected))
+            results[mode] = {
+                "mean_nodes_settled": float(np.mean(settled)) if settled else 0.0,
+                "mean_latency_ms": elapsed * 1000 / max(len(pairs), 1),
+                "max_cost_error": error
+            }
+        benchmark_landmarks = router.landmark_count
+        router.landmark_count = landmark_count
+        return {
+            "queries": len(pairs),
+            "nodes": len(csr.nodes),
+            "landmarks": benchmark_landmarks,
+            "alt_preprocessing_ms": alt_preprocessing_ms,
+            "results": results
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Dijkstra against A* on a topology file")
+    parser.add_argument("topology", help="edge-list CSV, NDJSON, JSON node-link or GraphML file")
+    parser.add_argument("--nodes", help="node coordinate file (id,lat,lon CSV or NDJSON) for the geo heuristic")
+    parser.add_argument("--format", help="topology format, if the file extension does not tell")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--landmarks", type=int, default=ALT_LANDMARKS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    router = NeuroSymbolicRouting(load_topology(args.topology, args.format, nodes_path=args.nodes), name="benchmark")
+    router.landmark_count = args.landmarks
+    print(json.dumps(benchmark_routing(router, args.queries, args.seed), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from app.routing.router import NeuroSymbolicRouting
+
+
+@pytest.fixture(scope="session")
+def penalty_router():
+    """Router over the built-in topology; routers derived from it share its trained penalty model."""
+    return NeuroSymbolicRouting()
+
+
+def build_grid(rows: int, cols: int, seed: int = 0, coordinates: bool = True):
+    """A rows x cols grid with seeded QoS attributes and, optionally, node coordinates."""
+    rng = np.random.default_rng(seed)
+    G = nx.grid_2d_graph(rows, cols)
+    for u, v in G.edges:
+        G[u][v].update(
+            base_cost=float(rng.uniform(0.5, 2)), congestion=float(rng.uniform(0, 1)),
+            latency=float(rng.uniform(1, 50)), bandwidth=float(rng.uniform(10, 1000)),
+            packet_loss=float(rng.uniform(0, 0.05)), jitter=float(rng.uniform(0.1, 5))
+        )
+    if coordinates:
+        for r, c in G.nodes:
+            G.nodes[r, c].update(lat=40 + 0.01 * r, lon=-3 + 0.01 * c)
+    return nx.convert_node_labels_to_integers(G, ordering="sorted")
+
+
+@pytest.fixture
+def grid_topology():
+    """Factory for seeded QoS grids (see build_grid)."""
+    return build_grid
+
+
+@pytest.fixture(scope="session")
+def api():
+    """The resilience API module and a client for its router, authenticated as user 1."""
+    from types import SimpleNamespace
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.routes import network_resilience_api, oauth2
+
+    app = FastAPI()
+    app.include_router(network_resilience_api.router)
+    app.dependency_overrides[oauth2.get_current_user] = lambda: SimpleNamespace(id=1, role="user")
+    with TestClient(app) as client:
+        yield network_resilience_api, client
+
+
+@pytest.fixture(scope="session")
+def anonymous(api):
+    """A client for the resilience router that sends no credentials."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    module, _ = api
+    app = FastAPI()
+    app.include_router(module.router)
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def grid_router(grid_topology, penalty_router):
+    router = penalty_router.derive(grid_topology(15, 15, seed=3), "astar-grid")
+    router.prepare_landmarks(6)
+    return router
+
+
+def assert_admissible(router, target):
+    """Every heuristic bound is at most the true cost to target."""
+    router.prepare_route_query()
+    csr = router.csr
+    dist, _ = csr.shortest_path_tree(csr.index(target))
+    for kind in ("geo", "alt"):
+        assert np.all(router.heuristic(kind, target) <= dist), kind
+
+
+def test_astar_costs_match_dijkstra(grid_router):
+    rng = np.random.default_rng(7)
+    nodes = grid_router.csr.nodes
+    for source, target in nodes[rng.integers(len(nodes), size=(40, 2))].tolist():
+        grid_router.prepare_route_query()
+        expected = grid_router.csr.shortest_path(source, target)[1]
+        for kind in ("geo", "alt"):
+            _, cost, info = grid_router.astar_path(source, target, kind)
+            assert info["heuristic"] == kind
+            assert cost == pytest.approx(expected, rel=1e-12, abs=1e-12)
+
+
+def test_heuristics_stay_admissible_after_congestion_drops(grid_router):
+    rng = np.random.default_rng(11)
+    for target in rng.integers(225, size=5).tolist():
+        assert_admissible(grid_router, target)
+    edges = [tuple(edge) for edge in rng.permutation(list(grid_router.G.edges))[:60].tolist()]
+    us, vs = zip(*edges)
+    grid_router.update_edge_congestions(list(us), list(vs), [0.0] * len(edges))
+    for target in rng.integers(225, size=5).tolist():
+        assert_admissible(grid_router, target)
+        source = int(rng.integers(225))
+        assert grid_router.astar_path(source, target, "alt")[1] == pytest.approx(
+            grid_router.csr.shortest_path(source, target)[1], rel=1e-12, abs=1e-12
+        )
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.hdc import codebook as codebook_module
+from app.hdc.codebook import HypervectorCodebook
+from app.hdc.vectors import pack_hypervectors
+
+
+@pytest.mark.parametrize("backend", ["bipolar", "packed"])
+def test_same_seed_and_bin_give_the_same_vector(backend):
+    a = HypervectorCodebook(dim=1000, backend=backend, seed=7)
+    b = HypervectorCodebook(dim=1000, backend=backend, seed=7)
+    for val in (-3, 0, 1, 12345):
+        np.testing.assert_array_equal(a.vector(val), b.vector(val))
+    assert not np.array_equal(a.vector(1), a.vector(2))
+    assert not np.array_equal(a.vector(-1), a.vector(1))
+    other = HypervectorCodebook(dim=1000, backend=backend, seed=8)
+    assert not np.array_equal(a.vector(1), other.vector(1))
+
+
+def test_packed_vectors_pack_the_bipolar_ones():
+    bipolar = HypervectorCodebook(dim=1000, backend="bipolar", seed=3)
+    packed = HypervectorCodebook(dim=1000, backend="packed", seed=3)
+    for val in range(-5, 5):
+        vector = bipolar.vector(val)
+        assert set(np.unique(vector).tolist()) == {-1, 1}
+        np.testing.assert_array_equal(packed.vector(val), pack_hypervectors(vector, 1000))
+
+
+def test_vectors_do_not_touch_the_global_rng():
+    np.random.seed(0)
+    expected = np.random.rand()
+    np.random.seed(0)
+    HypervectorCodebook(dim=256).warm(0, 20)
+    assert np.random.rand() == expected
+
+
+def test_evicted_bins_are_derived_again_unchanged():
+    small = HypervectorCodebook(dim=256, cache_size=4)
+    reference = HypervectorCodebook(dim=256, cache_size=64)
+    first = small.vector(0)
+    small.warm(1, 10)
+    assert len(small._slots) == 4 and 0 not in small._slots
+    np.testing.assert_array_equal(small.vector(0), first)
+    bins = [9, 0, 3, 9, -2, 40, 3]
+    np.testing.assert_array_equal(small.rows(bins), np.stack([reference.vector(val) for val in bins]))
+    assert small.nbytes == 4 * 256
+
+
+@pytest.mark.parametrize("backend", ["bipolar", "packed"])
+def test_saved_codebook_is_memory_mapped_back(backend, tmp_path):
+    original = HypervectorCodebook(dim=1000, backend=backend, seed=11)
+    path = str(tmp_path / "codebook.npy")
+    original.save(path, -2, 30)
+    assert sorted(os.listdir(tmp_path)) == ["codebook.npy", "codebook.npy.json"]
+
+    loaded = HypervectorCodebook.load(path, cache_size=8)
+    assert (loaded.dim, loaded.backend, loaded.seed) == (1000, backend, 11)
+    assert isinstance(loaded._mapped, np.memmap)
+    assert loaded._mapped.shape == (33, original.width)
+    bins = np.arange(-5, 36)
+    np.testing.assert_array_equal(loaded.rows(bins), original.rows(bins))
+    # Only bins outside the saved range were derived into the cache
+    assert sorted(loaded._slots) == [-5, -4, -3, 31, 32, 33, 34, 35]
+
+
+def test_shared_codebook_writes_its_cache_file_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(codebook_module, "CODEBOOK_DIR", str(tmp_path / "codebooks"))
+    monkeypatch.setattr(codebook_module, "CODEBOOK_BINS", (0, 5))
+    first = codebook_module.shared_codebook()
+    files = sorted(os.listdir(tmp_path / "codebooks"))
+    assert len(files) == 2
+    mtime = os.path.getmtime(tmp_path / "codebooks" / files[0])
+    second = codebook_module.shared_codebook()
+    assert os.path.getmtime(tmp_path / "codebooks" / files[0]) == mtime
+    assert isinstance(second._mapped, np.memmap)
+    np.testing.assert_array_equal(first.rows(range(-2, 8)), HypervectorCodebook().rows(range(-2, 8)))
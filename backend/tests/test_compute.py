@@ -0,0 +1,80 @@
+import asyncio
+import pickle
+import sys
+import time
+
+import networkx as nx
+import pytest
+
+from app.compute import ComputeExecutor
+from app.routing.csr import CSRGraph
+from app.routing.workers import search_paths_task, route_pairs_task
+
+
+def _loaded_modules():
+    return sorted(sys.modules)
+
+
+def _grid_snapshot(backend):
+    G = nx.convert_node_labels_to_integers(nx.grid_2d_graph(6, 6))
+    for i, (u, v) in enumerate(G.edges):
+        G[u][v].update(base_cost=1, congestion=0.1, latency=10, bandwidth=500, packet_loss=0.1, jitter=2,
+                       final_cost=1.0 + (i * 7) % 5)
+    csr = CSRGraph(G)
+    csr.set_costs(slice(None), [G[u][v]["final_cost"] for u, v in G.edges])
+    return G, pickle.dumps((f"grid:{backend}:0", csr, backend))
+
+
+def test_workers_search_csr_snapshots_without_the_api_module():
+    executor = ComputeExecutor(thread_workers=1, process_workers=1)
+
+    async def scenario():
+        results = {}
+        for backend in ("csr", "networkx"):
+            G, snapshot = _grid_snapshot(backend)
+            results[backend] = (
+                await executor.run("process", search_paths_task, snapshot, 0, 35, "dijkstra", 1),
+                await executor.run("process", search_paths_task, snapshot, 0, 35, "k_shortest", 3),
+                await executor.run("process", route_pairs_task, snapshot, [(0, 35), (3, 20)], False),
+            )
+        return G, results, await executor.run("process", _loaded_modules)
+
+    G, results, modules = asyncio.run(scenario())
+    expected = nx.dijkstra_path_length(G, 0, 35, weight="final_cost")
+    for backend, (single, k_shortest, batch) in results.items():
+        assert single[1] == [pytest.approx(expected)], backend
+        assert k_shortest[1][0] == pytest.approx(expected), backend
+        assert batch[1] == pytest.approx([expected, nx.dijkstra_path_length(G, 3, 20, weight="final_cost")])
+    assert "app.routes.network_resilience_api" not in modules
+    assert "fastapi" not in modules
+
+
+def test_timed_out_process_tasks_terminate_a_clogged_pool():
+    executor = ComputeExecutor(thread_workers=1, process_workers=1, timeout=0.5)
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run("process", time.sleep, 60)
+        stats = executor.stats()["process"]
+        started = time.monotonic()
+        result = await executor.run("process", sum, [1, 2, 3], timeout=30)
+        return stats, result, time.monotonic() - started
+
+    stats, result, elapsed = asyncio.run(scenario())
+    assert stats["abandoned"] == 1 and stats["restarts"] == 1
+    assert result == 6 and elapsed < 30
+
+
+def test_timed_out_thread_tasks_keep_their_slot_until_they_return():
+    executor = ComputeExecutor(thread_workers=1, process_workers=1, timeout=0.1)
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run("thread", time.sleep, 0.5)
+        during = executor.stats()["thread"]
+        await asyncio.sleep(0.8)
+        return during, executor.stats()["thread"]
+
+    during, after = asyncio.run(scenario())
+    assert during["abandoned"] == 1 and during["in_flight"] == 1 and during["restarts"] == 0
+    assert after["in_flight"] == 0 and after["abandoned_running"] == 0
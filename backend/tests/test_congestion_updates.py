@@ -0,0 +1,118 @@
+import json
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def router(penalty_router, grid_topology):
+    return penalty_router.derive(grid_topology(6, 6, seed=8), "congestion-grid")
+
+@pytest.fixture
+def topology(api, grid_topology):
+    module, _ = api
+    router = module.topologies.register("congestion-grid", grid_topology(6, 6, seed=8))
+    yield router
+    module.topologies.remove("congestion-grid")
+
+def congestion(router):
+    return router.csr.attributes['congestion'].copy(), router.csr.final_cost.copy()
+
+def test_unknown_edge_rejects_the_whole_batch(router):
+    before = congestion(router)
+    version = router.topology_version()
+    for us, vs, message in (([0, 0], [1, 7], r"Edge \(0, 7\) not found"), ([0, 99], [1, 98], "Node 99 not found")):
+        with pytest.raises(ValueError, match=message):
+            router.update_edge_congestions(us, vs, [0.5, 0.5])
+    with pytest.raises(ValueError, match="between 0 and 1"):
+        router.update_edge_congestions([0, 1], [1, 2], [0.5, 1.5])
+    with pytest.raises(ValueError, match="same length"):
+        router.update_edge_congestions([0, 1], [1, 2], [0.5])
+    for array, expected in zip(congestion(router), before):
+        np.testing.assert_array_equal(array, expected)
+    assert router.G[0][1]['congestion'] == before[0][router.csr.edge_ids([0], [1])[0]]
+    assert router.topology_version() == version
+
+def test_last_reading_for_a_repeated_edge_wins(router):
+    result = router.update_edge_congestions([0, 1, 0, 1], [1, 0, 6, 2], [0.1, 0.7, 0.3, 0.9])
+    assert result["updated"] == 3
+    assert router.G[0][1]['congestion'] == 0.7  # (1, 0) is the same edge as (0, 1)
+    assert router.G[0][6]['congestion'] == 0.3
+    assert router.G[1][2]['congestion'] == 0.9
+    edge = router.csr.edge_ids([0], [1])[0]
+    assert router.csr.attributes['congestion'][edge] == 0.7
+
+def test_a_batch_is_one_version(router):
+    router.prepare_route_query()
+    graph_version, metrics_version = router.graph_version, router.metrics_version
+    edges = list(router.G.edges)[:20]
+    result = router.update_edge_congestions([u for u, _ in edges], [v for _, v in edges], np.linspace(0, 1, 20))
+    assert router.metrics_version == metrics_version + 1
+    assert router.graph_version == graph_version + 1
+    assert result["graph_version"] == router.graph_version
+    delta = router.topology_delta(f"{router.topology_id}.{metrics_version}")
+    assert sorted(delta["edges"]["index"]) == sorted(router.csr.edge_ids(*zip(*edges)).tolist())
+
+    # Costs are those of a full recompute from the new congestion
+    costs = router.csr.final_cost.copy()
+    router.recompute_edge_costs()
+    np.testing.assert_array_equal(router.csr.final_cost, costs)
+
+def test_bulk_endpoint(api, topology):
+    _, client = api
+    response = client.post("/api/resilience/routing/update-congestion/bulk", json={
+        "u": [0, 0], "v": [1, 1], "congestion": [0.2, 0.4], "topology": "congestion-grid"
+    })
+    assert response.status_code == 200, response.text
+    assert response.json()["updated"] == 1
+    assert topology.G[0][1]['congestion'] == 0.4
+
+    before = congestion(topology)
+    for body in ({"u": [0, 0], "v": [1, 35], "congestion": [0.5, 0.5]},
+                 {"u": [0], "v": [1], "congestion": [2.0]},
+                 {"u": [0], "v": [1, 2], "congestion": [0.5]},
+                 {"u": [], "v": [], "congestion": []}):
+        response = client.post("/api/resilience/routing/update-congestion/bulk",
+                               json=dict(body, topology="congestion-grid"))
+        assert response.status_code in (400, 422), body
+    np.testing.assert_array_equal(congestion(topology)[0], before[0])
+
+def test_stream_applies_each_line_and_rejects_bad_frames(api, topology):
+    _, client = api
+    frames = [
+        {"u": 0, "v": 1, "congestion": 0.25},
+        [[0, 6, 0.5], [6, 7, 0.75]],
+        "not json",
+        {"u": [0], "v": [35], "congestion": [0.5]},  # unknown edge
+        {"u": 0.5, "v": 1, "congestion": 0.1},  # fractional node id
+        [[0, 1]],  # not a triple
+        {"u": 0, "v": 1},  # missing congestion
+        [],
+        {"u": [1], "v": [2], "congestion": [0.125]},
+    ]
+    body = "".join((frame if isinstance(frame, str) else json.dumps(frame)) + "\n" for frame in frames)
+    # Chunks split lines mid-way; lines are applied once they are complete
+    chunks = [body[i:i + 7].encode() for i in range(0, len(body), 7)]
+    response = client.post("/api/resilience/routing/update-congestion/stream",
+                           params={"topology": "congestion-grid"}, content=iter(chunks))
+    assert response.status_code == 200
+    acks = [json.loads(line) for line in response.text.splitlines()]
+    assert len(acks) == len(frames)
+    assert [ack.get("updated") for ack in acks] == [1, 2, None, None, None, None, None, None, 1]
+    assert all(ack["error"].startswith("Invalid congestion frame") for ack in acks[2:8])
+    assert (topology.G[0][1]['congestion'], topology.G[0][6]['congestion'], topology.G[6][7]['congestion'],
+            topology.G[1][2]['congestion']) == (0.25, 0.5, 0.75, 0.125)
+
+def test_parse_congestion_frame(api):
+    module, _ = api
+    parse = module._parse_congestion_frame
+    u, v, c = parse('{"u": [1, 2], "v": [2, 3], "congestion": [0.1, 0.2]}')
+    assert (u.tolist(), v.tolist(), c.tolist()) == ([1, 2], [2, 3], [0.1, 0.2])
+    u, v, c = parse('[[1, 2, 0.5]]')
+    assert (u.tolist(), v.tolist(), c.tolist()) == ([1], [2], [0.5])
+    too_many = json.dumps([[1, 2, 0.5]] * (module.MAX_CONGESTION_BATCH + 1))
+    for frame, error in (("[[1, 2]]", ValueError), ('{"u": 1, "v": 2}', KeyError), ("[]", ValueError),
+                         (too_many, ValueError), ('{"u": 1.5, "v": 2, "congestion": 0.1}', ValueError),
+                         ("{", ValueError)):
+        with pytest.raises(error):
+            parse(frame)
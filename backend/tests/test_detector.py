@@ -0,0 +1,131 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.hdc.detector import PredictiveMaintenance
+from app.hdc.vectors import moving_average_filter, pack_hypervectors, unpack_hypervectors, popcount_rows
+
+DIM = 2048
+
+
+def reference_encode(detector, value):
+    """Per-point encoding: binarized interpolation of the two nearest bin vectors."""
+    lower, upper = math.floor(value), math.ceil(value)
+    vec_lower = detector.to_bipolar(detector.codebook.vector(lower)).astype(np.float64)
+    if lower == upper:
+        return vec_lower.astype(np.int8)
+    vec_upper = detector.to_bipolar(detector.codebook.vector(upper)).astype(np.float64)
+    weight_upper = value - lower
+    interpolated = (1 - weight_upper) * vec_lower + weight_upper * vec_upper
+    return np.where(interpolated >= 0, 1, -1).astype(np.int8)
+
+
+def reference_similarities(detector, values):
+    prototype = detector.to_bipolar(detector.prototype).astype(np.int64)
+    return np.array([reference_encode(detector, v).astype(np.int64) @ prototype / DIM for v in values])
+
+
+@pytest.fixture
+def telemetry():
+    rng = np.random.default_rng(42)
+    values = 20 + 3 * np.sin(np.linspace(0, 12, 400)) + rng.normal(0, 0.5, 400)
+    values[[50, 220, 300]] += [9, -12, 15]  # spikes
+    return values
+
+
+def test_encode_batch_matches_per_point_encoding():
+    detector = PredictiveMaintenance(dim=DIM)
+    values = np.array([0.0, 3.0, -2.0, 2.5, -1.5, 7.25, 7.75, 19.999, 40.0001])
+    values = np.concatenate([values, np.random.default_rng(1).uniform(-5, 45, 200)])
+    encoded = detector.to_bipolar(detector.encode_batch(values))
+    for row, value in zip(encoded, values):
+        np.testing.assert_array_equal(row, reference_encode(detector, value))
+
+
+def test_prototype_bundles_per_point_encodings(telemetry):
+    detector = PredictiveMaintenance(dim=DIM)
+    detector.build_prototype(telemetry)
+    smoothed = moving_average_filter(telemetry)
+    bundle = sum(reference_encode(detector, v).astype(np.int64) for v in smoothed)
+    np.testing.assert_array_equal(detector.to_bipolar(detector.prototype), np.where(bundle >= 0, 1, -1))
+
+
+@pytest.mark.parametrize("points", [7, 300])  # scored from hypervectors / through the similarity table
+def test_detect_batch_matches_per_point_detect(telemetry, points):
+    detector = PredictiveMaintenance(dim=DIM)
+    detector.build_prototype(telemetry)
+    detector._similarity_table = None
+    values = np.random.default_rng(points).uniform(0, 60, points)
+    similarities, anomalies = detector.detect_batch(values)
+    np.testing.assert_allclose(similarities, reference_similarities(detector, values), rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(anomalies, similarities < detector.similarity_thresh)
+    for value, similarity, anomaly in zip(values, similarities, anomalies):
+        assert detector.detect(value) == (pytest.approx(similarity, abs=1e-12), anomaly)
+
+
+def test_detect_many_matches_one_series_at_a_time(telemetry):
+    detector = PredictiveMaintenance(dim=DIM)
+    series = [telemetry, telemetry[:3], telemetry[100:180] * 1.5, np.full(12, 4.5)]
+    lengths = np.array([len(s) for s in series])
+    matrix = np.zeros((len(series), lengths.max()))
+    for row, values in zip(matrix, series):
+        row[:len(values)] = values
+    for values, (smoothed, similarities, anomalies) in zip(series, detector.detect_many(matrix, lengths)):
+        # The single-series endpoint smooths, then builds the prototype from the smoothed values
+        expected_smoothed = moving_average_filter(values)
+        single = PredictiveMaintenance(dim=DIM, codebook=detector.codebook)
+        single.build_prototype(expected_smoothed)
+        np.testing.assert_allclose(smoothed, expected_smoothed)
+        expected, flags = single.detect_batch(expected_smoothed)
+        np.testing.assert_allclose(similarities, expected, rtol=0, atol=1e-12)
+        np.testing.assert_array_equal(anomalies, flags)
+    assert detector.prototype is None
+
+
+@pytest.mark.parametrize("dim", [64, 1000, DIM])
+def test_packing_round_trips_and_counts_bits(dim):
+    vectors = np.random.default_rng(dim).integers(0, 2, size=(5, dim), dtype=np.int8) * 2 - 1
+    packed = pack_hypervectors(vectors, dim)
+    assert packed.dtype == np.uint64 and packed.shape == (5, -(-dim // 64))
+    np.testing.assert_array_equal(unpack_hypervectors(packed, dim), vectors)
+    np.testing.assert_array_equal(popcount_rows(packed), (vectors > 0).sum(axis=1))
+    # Hamming distance from XOR + popcount gives the bipolar dot product
+    dots = dim - 2 * popcount_rows(packed ^ packed[0])
+    np.testing.assert_array_equal(dots, vectors.astype(np.int64) @ vectors[0])
+
+
+@pytest.mark.parametrize("dim", [1000, DIM])
+def test_packed_backend_matches_bipolar(telemetry, dim):
+    bipolar = PredictiveMaintenance(dim=dim, backend="bipolar")
+    packed = PredictiveMaintenance(dim=dim, backend="packed")
+    values = np.concatenate([[2.5, -1.5, 7.0], np.random.default_rng(3).uniform(0, 60, 300)])
+    np.testing.assert_array_equal(packed.to_bipolar(packed.encode_batch(values)), bipolar.encode_batch(values))
+
+    for detector in (bipolar, packed):
+        detector.build_prototype(telemetry)
+    np.testing.assert_array_equal(packed.to_bipolar(packed.prototype), bipolar.prototype)
+    np.testing.assert_array_equal(packed.bundle, bipolar.bundle)
+    for points in (values[:7], values):
+        for detector in (bipolar, packed):
+            detector._similarity_table = None
+        expected = bipolar.detect_batch(points)
+        actual = packed.detect_batch(points)
+        np.testing.assert_array_equal(actual[0], expected[0])
+        np.testing.assert_array_equal(actual[1], expected[1])
+
+    lengths = np.array([len(telemetry), 40])
+    matrix = np.zeros((2, len(telemetry)))
+    matrix[0], matrix[1, :40] = telemetry, telemetry[:40] + 5
+    for (_, sims_p, flags_p), (_, sims_b, flags_b) in zip(packed.detect_many(matrix, lengths),
+                                                          bipolar.detect_many(matrix, lengths)):
+        np.testing.assert_array_equal(sims_p, sims_b)
+        np.testing.assert_array_equal(flags_p, flags_b)
+
+
+def test_packed_streaming_matches_bipolar(telemetry):
+    bipolar = PredictiveMaintenance(dim=DIM, backend="bipolar")
+    packed = PredictiveMaintenance(dim=DIM, backend="packed")
+    for chunk in np.array_split(telemetry, 7):
+        assert packed.ingest(chunk) == bipolar.ingest(chunk)
+    np.testing.assert_array_equal(packed.to_bipolar(packed.prototype), bipolar.prototype)
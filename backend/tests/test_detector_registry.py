@@ -0,0 +1,152 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from app.hdc.detector import PredictiveMaintenance
+from app.hdc.registry import DetectorRegistry
+
+
+@pytest.fixture
+def template():
+    return PredictiveMaintenance(dim=1024, window_size=3)
+
+
+def make_registry(template, spill_dir, capacity):
+    return DetectorRegistry(template, memory_budget=capacity * template.state_nbytes(), spill_dir=str(spill_dir))
+
+
+def assert_same_state(detector, reference):
+    assert detector.samples_seen == reference.samples_seen
+    assert list(detector._stream_window) == list(reference._stream_window)
+    assert detector.similarity_thresh == reference.similarity_thresh
+    if reference.bundle is None:
+        assert detector.bundle is None and detector.prototype is None
+    else:
+        np.testing.assert_array_equal(detector.bundle, reference.bundle)
+        np.testing.assert_array_equal(detector.prototype, reference.prototype)
+
+
+def test_spilled_detectors_resume_where_they_stopped(template, tmp_path):
+    registry = make_registry(template, tmp_path, capacity=2)
+    rng = np.random.default_rng(0)
+    references = {key: template.derive() for key in ("streamed", "trained", "partial", "empty")}
+    feeds = {"streamed": rng.normal(20, 1, 40), "partial": rng.normal(5, 1, 2), "empty": []}
+    for key, values in feeds.items():
+        with registry.checkout(key) as detector:
+            detector.ingest(values)
+        references[key].ingest(values)
+    training = rng.normal(30, 2, 100)
+    with registry.checkout("trained") as detector:
+        detector.similarity_thresh = 0.55
+        detector.build_prototype(training)
+    references["trained"].similarity_thresh = 0.55
+    references["trained"].build_prototype(training)
+    assert registry.stats()["resident"] == 2
+
+    follow_up = rng.normal(20, 1, 10)
+    for key in ("streamed", "partial", "empty", "trained"):
+        with registry.checkout(key) as detector:
+            assert_same_state(detector, references[key])
+            assert detector.ingest(follow_up) == references[key].ingest(follow_up)
+    assert registry.stats()["spilled"] >= 1
+
+
+def test_trained_prototype_survives_eviction(template, tmp_path):
+    registry = make_registry(template, tmp_path, capacity=1)
+    values = np.random.default_rng(1).normal(30, 2, 100)
+    with registry.checkout("a") as detector:
+        detector.build_prototype(values)
+        expected = detector.detect_batch(values)
+        prototype = detector.prototype.copy()
+    registry.get("b")
+    assert "a" not in registry.stats()["resident_ids"]
+    with registry.checkout("a") as detector:
+        np.testing.assert_array_equal(detector.prototype, prototype)
+        np.testing.assert_array_equal(detector.detect_batch(values)[0], expected[0])
+
+
+def test_snapshot_restores_detectors_in_a_new_registry(template, tmp_path):
+    registry = make_registry(template, tmp_path, capacity=2)
+    rng = np.random.default_rng(2)
+    references = {}
+    for i in range(5):
+        values = rng.normal(10 * i, 1, 20 + i)
+        with registry.checkout(f"device-{i}") as detector:
+            detector.ingest(values)
+        references[f"device-{i}"] = template.derive()
+        references[f"device-{i}"].ingest(values)
+    assert registry.save_snapshot() == 5
+
+    restored = make_registry(template, tmp_path, capacity=2)
+    assert restored.load_snapshot() == 5
+    for key, reference in references.items():
+        with restored.checkout(key) as detector:
+            assert_same_state(detector, reference)
+
+    other = make_registry(PredictiveMaintenance(dim=2048), tmp_path, capacity=2)
+    assert other.load_snapshot() == 0
+
+
+def test_checkout_keeps_updates_under_concurrent_eviction(template, tmp_path):
+    registry = make_registry(template, tmp_path, capacity=1)
+    keys = ["a", "b", "c", "d"]
+    samples = 150
+
+    def worker(key):
+        for value in np.random.default_rng(ord(key)).normal(10, 1, samples):
+            with registry.checkout(key) as detector:
+                detector.ingest([value])
+
+    threads = [threading.Thread(target=worker, args=(key,)) for key in keys]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for key in keys:
+        with registry.checkout(key) as detector:
+            assert detector.samples_seen == samples - template.window_size + 1
+
+
+def test_remove_deletes_spill_files(template, tmp_path):
+    registry = make_registry(template, tmp_path, capacity=1)
+    with registry.checkout("a") as detector:
+        detector.ingest(np.arange(10.0))
+    registry.get("b")
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".npy")]) == 2
+    registry.remove("a")
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".npy")]
+    with pytest.raises(KeyError):
+        registry.remove("a")
+
+def test_config_changes_need_auth(api, anonymous):
+    module, _ = api
+    response = anonymous.post("/api/resilience/config", json={"SIMILARITY_THRESH": 0.1, "HDC_BACKEND": "packed"})
+    assert response.status_code == 401
+    assert module.CONFIG["SIMILARITY_THRESH"] != 0.1
+
+def test_anonymous_windows_leave_device_state_alone(api, anonymous):
+    module, client = api
+    frames = "".join(f"{value}\n" for value in np.sin(np.arange(40) / 3).round(3).tolist())
+    response = client.post("/api/resilience/predictive-maintenance/stream", params={"device_id": "link-7"},
+                           content=frames)
+    assert response.status_code == 200
+    with module.detectors.checkout("link-7") as detector:
+        prototype = np.array(detector.prototype)
+    shared = None if module.pm.prototype is None else np.array(module.pm.prototype)
+    stats = module.detectors.stats()
+
+    window = {"data": (np.arange(30) % 7).tolist()}
+    results = [anonymous.post("/api/resilience/predictive-maintenance", json=dict(window, device_id=device_id))
+               for device_id in ("link-7", "unseen-link")]
+    assert [r.status_code for r in results] == [200, 200]
+    assert results[0].json() == results[1].json()
+    with module.detectors.checkout("link-7") as detector:
+        np.testing.assert_array_equal(detector.prototype, prototype)
+    assert module.detectors.stats() == stats
+    if shared is None:
+        assert module.pm.prototype is None
+    else:
+        np.testing.assert_array_equal(module.pm.prototype, shared)
+    module.detectors.remove("link-7")
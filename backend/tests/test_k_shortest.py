@@ -0,0 +1,86 @@
+import time
+from itertools import islice
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from app.routing.search import k_shortest_paths, path_cost, search_paths
+
+
+@pytest.fixture(scope="module")
+def grid():
+    rng = np.random.default_rng(11)
+    G = nx.convert_node_labels_to_integers(nx.grid_2d_graph(6, 6))
+    for u, v in G.edges:
+        G[u][v]["final_cost"] = float(rng.uniform(0.5, 2))
+    return G
+
+def counting(monkeypatch, delay: float = 0.0):
+    """Count (and optionally slow down) the candidates drawn from Yen's algorithm."""
+    drawn = []
+    original = nx.shortest_simple_paths
+
+    def candidates(*args, **kwargs):
+        for path in original(*args, **kwargs):
+            time.sleep(delay)
+            drawn.append(path)
+            yield path
+
+    monkeypatch.setattr(nx, "shortest_simple_paths", candidates)
+    return drawn
+
+def test_unlimited_search_matches_yen(grid):
+    paths, costs, status = k_shortest_paths(grid, 0, 35, k=5)
+    expected = list(islice(nx.shortest_simple_paths(grid, 0, 35, weight="final_cost"), 5))
+    assert status == "complete"
+    assert costs == pytest.approx([path_cost(grid, path) for path in expected])
+    assert costs == sorted(costs)
+
+def test_limits_filter_candidates(grid):
+    paths, costs, _ = k_shortest_paths(grid, 0, 35, k=5, max_hops=10, max_overlap=0.5, max_cost_ratio=0.5)
+    assert paths
+    assert all(len(path) - 1 <= 10 for path in paths)
+    assert all(cost <= costs[0] * 1.5 for cost in costs)
+    edge_sets = [{frozenset(edge) for edge in zip(path, path[1:])} for path in paths]
+    for i, edges in enumerate(edge_sets):
+        assert all(len(edges & accepted) / len(edges) <= 0.5 for accepted in edge_sets[:i])
+
+def test_candidate_cap_counts_filtered_candidates(grid, monkeypatch):
+    drawn = counting(monkeypatch)
+    # No path from corner to corner has a single hop, so every candidate is filtered out
+    paths, costs, status = k_shortest_paths(grid, 0, 35, k=3, max_hops=1, max_candidates=25)
+    assert (paths, costs, status) == ([], [], "candidate_limit")
+    assert len(drawn) == 25
+
+def test_time_budget_stops_the_search(grid, monkeypatch):
+    drawn = counting(monkeypatch, delay=0.05)
+    started = time.monotonic()
+    paths, _, status = k_shortest_paths(grid, 0, 35, k=10, time_budget=0.2)
+    assert status == "time_budget"
+    assert time.monotonic() - started < 0.5
+    assert 0 < len(paths) == len(drawn) < 10
+
+def test_all_filtered_search_raises_no_path(grid):
+    with pytest.raises(nx.NetworkXNoPath, match=r"search stopped: candidate_limit"):
+        search_paths(grid, 0, 35, "k_shortest", 3, limits={"max_hops": 1, "max_candidates": 10})
+
+def test_all_filtered_route_is_404(api):
+    _, client = api
+    started = time.monotonic()
+    response = client.post("/api/resilience/routing", json={
+        "source": 1, "target": 11, "algorithm": "k_shortest", "max_hops": 1, "time_budget": 0.5
+    })
+    assert response.status_code == 404
+    assert "search stopped: " in response.json()["detail"]
+    assert time.monotonic() - started < 5
+
+def test_route_reports_why_the_search_stopped(api):
+    _, client = api
+    response = client.post("/api/resilience/routing", json={
+        "source": 1, "target": 11, "algorithm": "k_shortest", "k_paths": 10, "max_cost_ratio": 0.0
+    })
+    assert response.status_code == 200, response.text
+    result = response.json()["routing_result"]
+    assert result["search_status"] in ("cost_ceiling", "complete", "exhausted")
+    assert all(cost == pytest.approx(result["costs"][0]) for cost in result["costs"])
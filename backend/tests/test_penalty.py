@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from app.routing.penalty import PenaltyEvaluator
+
+
+def reference_cost(router, data):
+    """Per-edge cost with one predict() call per edge, as costs were computed before batching."""
+    weights = router.qos_weights
+    qos_score = (
+        weights['latency'] * (1 / data['latency']) +
+        weights['bandwidth'] * (data['bandwidth'] / 1000) +
+        weights['packet_loss'] * (1 - data['packet_loss']) +
+        weights['jitter'] * (1 / data['jitter'])
+    )
+    learned_penalty = router.penalty_model.predict([[data['congestion']]])[0]
+    fixed_penalty = 3 if data['congestion'] > 0.5 else 0
+    return data['base_cost'] * (1 + learned_penalty + fixed_penalty) * (1 / qos_score)
+
+@pytest.mark.parametrize("table_size", [0, 4097])
+def test_evaluator_matches_per_point_predict(penalty_router, table_size):
+    evaluator = PenaltyEvaluator(table_size)
+    evaluator.refresh(penalty_router.penalty_model)
+    congestion = np.concatenate([np.random.default_rng(0).uniform(0, 1, 500), [0.0, 0.5, 1.0]])
+    expected = [penalty_router.penalty_model.predict([[c]])[0] for c in congestion]
+    assert evaluator(congestion) == pytest.approx(expected, rel=1e-9, abs=1e-12)
+
+@pytest.mark.parametrize("table_size", [0, 4097])
+def test_edge_costs_match_per_edge_reference(penalty_router, grid_topology, table_size):
+    router = penalty_router.derive(grid_topology(10, 10, seed=2), "penalty-grid")
+    router.penalty = PenaltyEvaluator(table_size)
+    router.penalty.refresh(penalty_router.penalty_model)
+    router.recompute_edge_costs()
+    for u, v, data in router.G.edges(data=True):
+        assert data['final_cost'] == pytest.approx(reference_cost(router, data), rel=1e-9)
+    np.testing.assert_array_equal(router.csr.final_cost, [data['final_cost'] for _, _, data in router.G.edges(data=True)])
+
+def test_partial_updates_match_a_full_recompute(penalty_router, grid_topology):
+    router = penalty_router.derive(grid_topology(10, 10, seed=3), "penalty-grid")
+    rng = np.random.default_rng(3)
+    edges = list(router.G.edges)
+    for _ in range(5):
+        chosen = [edges[i] for i in rng.choice(len(edges), size=20, replace=False)]
+        router.update_edge_congestions([u for u, _ in chosen], [v for _, v in chosen], rng.uniform(0, 1, 20).tolist())
+    router.refresh_dirty_costs()
+    incremental = router.csr.final_cost.copy()
+    router.recompute_edge_costs()
+    np.testing.assert_array_equal(router.csr.final_cost, incremental)
+    for u, v, data in router.G.edges(data=True):
+        assert data['final_cost'] == pytest.approx(reference_cost(router, data), rel=1e-9)
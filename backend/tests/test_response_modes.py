@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+URL = "/api/resilience/predictive-maintenance"
+AGGREGATES = {"total_anomalies", "average_similarity", "data_points_analyzed"}
+
+
+@pytest.fixture
+def values():
+    series = np.random.default_rng(4).normal(20, 1, 80)
+    series[[20, 50]] = [90, -60]
+    return series.tolist()
+
+
+def modes(client, values):
+    responses = {}
+    for mode in ("full", "summary", "anomalies_only", "columnar"):
+        response = client.post(URL, json={"data": values, "response_mode": mode})
+        assert response.status_code == 200
+        responses[mode] = response.json()
+    return responses
+
+
+def test_compact_modes_agree_with_full(api, values):
+    _, client = api
+    responses = modes(client, values)
+    full = responses["full"]
+    results = full.pop("results")
+    assert full["data_points_analyzed"] == len(results)
+    assert full["total_anomalies"] > 0
+
+    assert responses["summary"] == full
+
+    anomalies_only = responses["anomalies_only"]
+    assert set(anomalies_only) == AGGREGATES | {"anomaly_indices", "anomaly_similarities", "threshold"}
+    indices = [i for i, point in enumerate(results) if point["anomaly"]]
+    assert anomalies_only["anomaly_indices"] == indices
+    assert anomalies_only["anomaly_similarities"] == [results[i]["similarity"] for i in indices]
+    assert anomalies_only["threshold"] == results[0]["threshold"]
+    assert {key: anomalies_only[key] for key in AGGREGATES} == full
+
+    columnar = responses["columnar"]
+    assert set(columnar) == AGGREGATES | {"values", "similarities", "anomalies", "threshold"}
+    assert columnar["values"] == [point["value"] for point in results]
+    assert columnar["similarities"] == [point["similarity"] for point in results]
+    assert columnar["anomalies"] == [point["anomaly"] for point in results]
+    assert columnar["threshold"] == results[0]["threshold"]
+    assert {key: columnar[key] for key in AGGREGATES} == full
+
+
+def test_binary_endpoint_takes_the_response_mode(api, values):
+    _, client = api
+    body = np.asarray(values, dtype="<f8").tobytes()
+    response = client.post(f"{URL}/binary", params={"dtype": "float64", "response_mode": "columnar"},
+                           content=body, headers={"content-type": "application/octet-stream"})
+    assert response.status_code == 200
+    assert response.json() == modes(client, values)["columnar"]
+
+
+def test_batch_modes_match_single_series(api, values):
+    _, client = api
+    other = np.random.default_rng(5).normal(5, 0.5, 30).tolist()
+    for mode in ("full", "summary", "anomalies_only", "columnar"):
+        batch = {"series": {"a": values, "b": other}, "response_mode": mode}
+        response = client.post(f"{URL}/batch", json=batch)
+        assert response.status_code == 200
+        series = response.json()["series"]
+        assert series["a"] == modes(client, values)[mode]
+        assert series["b"] == modes(client, other)[mode]
+
+
+def test_batch_mode_defaults_follow_include_points(api, values):
+    _, client = api
+    summary = client.post(f"{URL}/batch", json={"series": {"a": values}}).json()["series"]["a"]
+    full = client.post(f"{URL}/batch", json={"series": {"a": values}, "include_points": True}).json()["series"]["a"]
+    assert set(summary) == AGGREGATES
+    assert set(full) == AGGREGATES | {"results"}
+
+
+def test_unknown_mode_is_rejected(api, values):
+    _, client = api
+    assert client.post(URL, json={"data": values, "response_mode": "compact"}).status_code == 422
+    assert client.post(f"{URL}/batch", json={"series": {"a": values}, "response_mode": "compact"}).status_code == 422
+    body = np.asarray(values, dtype="<f4").tobytes()
+    response = client.post(f"{URL}/binary", params={"response_mode": "compact"},
+                           content=body, headers={"content-type": "application/octet-stream"})
+    assert response.status_code == 400
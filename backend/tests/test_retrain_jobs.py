@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.routing.penalty import PENALTY_MAX_ERROR, penalty_model_digest, train_penalty_model
+
+FINISHED = ("succeeded", "rejected", "failed", "cancelled")
+
+
+@pytest.fixture
+def trainer(api, monkeypatch):
+    """Stub the trainer with one that waits for release, and run "process" tasks on threads."""
+    module, _ = api
+    release = threading.Event()
+    models = []
+
+    def train():
+        release.wait(10)
+        model = models.pop(0)
+        if isinstance(model, Exception):
+            raise model
+        return model
+
+    run = module.executor.run
+    monkeypatch.setattr(module, "train_penalty_model", train)
+    monkeypatch.setattr(module.executor, "run", lambda kind, fn, *args, **kwargs: run("thread", fn, *args, **kwargs))
+    yield models, release
+    release.set()
+
+def start(client):
+    response = client.post("/api/resilience/retrain-penalty")
+    assert response.status_code == 202
+    return response.json()
+
+def wait_for(client, job_id, statuses=FINISHED):
+    deadline = time.monotonic() + 10
+    while True:
+        job = client.get(f"/api/resilience/retrain-penalty/jobs/{job_id}").json()
+        if job["status"] in statuses or time.monotonic() > deadline:
+            return job
+        time.sleep(0.01)
+
+def test_job_runs_from_queued_to_succeeded(api, trainer):
+    module, client = api
+    models, release = trainer
+    models.append(train_penalty_model())
+    version = module.nsr.penalty.version
+
+    job = start(client)
+    assert job["status"] == "queued"
+    assert wait_for(client, job["job_id"], ("running",))["status"] == "running"
+    # While a job is pending, starting another returns it
+    assert start(client)["job_id"] == job["job_id"]
+    assert module.nsr.penalty.version == version
+
+    release.set()
+    job = wait_for(client, job["job_id"])
+    assert job["status"] == "succeeded"
+    assert job["validation"]["max_error"] <= PENALTY_MAX_ERROR
+    assert job["penalty_version"] == module.nsr.penalty.version > version
+    assert module.nsr.penalty_model is not None and "error" not in job
+    assert job["job_id"] in [listed["job_id"] for listed in client.get("/api/resilience/retrain-penalty/jobs").json()["jobs"]]
+
+def test_model_failing_validation_is_rejected(api, trainer):
+    module, client = api
+    models, release = trainer
+    model = train_penalty_model()
+    model.intercepts_[-1] = model.intercepts_[-1] + 5  # far from the training target
+    models.append(model)
+    digest, version = penalty_model_digest(module.nsr.penalty_model), module.nsr.penalty.version
+
+    release.set()
+    job = wait_for(client, start(client)["job_id"])
+    assert job["status"] == "rejected"
+    assert "deviates from the target" in job["error"]
+    assert penalty_model_digest(module.nsr.penalty_model) == digest
+    assert module.nsr.penalty.version == version
+
+def test_training_error_fails_the_job(api, trainer):
+    _, client = api
+    models, release = trainer
+    models.append(RuntimeError("worker crashed"))
+    release.set()
+    job = wait_for(client, start(client)["job_id"])
+    assert (job["status"], job["error"]) == ("failed", "worker crashed")
+
+def test_cancelled_job_ends_cancelled(api, trainer):
+    module, client = api
+    models, release = trainer
+    models.extend([train_penalty_model(), train_penalty_model()])
+    version = module.nsr.penalty.version
+
+    job = start(client)
+    wait_for(client, job["job_id"], ("running",))
+    task = module.retrain_jobs._tasks[job["job_id"]]
+    client.portal.call(task.cancel)
+    job = wait_for(client, job["job_id"])
+    assert job["status"] == "cancelled"
+    assert "finished_at" in job
+    release.set()
+    assert module.nsr.penalty.version == version
+
+    # A cancelled job is not pending, so the next request starts a new one
+    assert start(client)["job_id"] != job["job_id"]
+
+def test_job_cancelled_before_it_starts(api):
+    module, _ = api
+
+    async def cancel_queued():
+        jobs = module.RetrainJobs()
+        job = jobs.start()
+        task = jobs._tasks[job["job_id"]]
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0)  # lets the done callback run
+        return job, jobs.pending()
+
+    job, pending = asyncio.run(cancel_queued())
+    assert job["status"] == "cancelled"
+    assert pending is None
+
+def test_unknown_job_is_404(api):
+    _, client = api
+    assert client.get("/api/resilience/retrain-penalty/jobs/missing").status_code == 404
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+
+from app.routing.history import RouteHistory
+
+START = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def record(history, count: int, path_length: int = 3, start: int = 0):
+    """Append routes whose endpoints and costs encode their index, one second apart."""
+    for i in range(start, start + count):
+        path = list(range(i, i + path_length))
+        history.append(START + timedelta(seconds=i), i, path[-1], "dijkstra", [path], [float(i)])
+
+def ids(entries):
+    return [entry['id'] for entry in entries]
+
+def test_entries_round_trip():
+    history = RouteHistory(capacity=4)
+    paths = [[1, 5, 9], [1, 2, 3, 9]]
+    seq = history.append(START, 1, 9, "k_shortest", paths, [2.5, 3.0])
+    entry = history.page()[0][0]
+    assert entry == {'id': seq, 'timestamp': START, 'source': 1, 'target': 9, 'algorithm': "k_shortest",
+                     'paths': paths, 'costs': [2.5, 3.0]}
+
+def test_ring_wraps_and_drops_the_oldest_routes():
+    history = RouteHistory(capacity=5)
+    record(history, 12)
+    assert len(history) == 5
+    entries, cursor = history.page(limit=10)
+    assert ids(entries) == [11, 10, 9, 8, 7]
+    assert cursor is None
+    for entry in entries:
+        i = entry['id']
+        assert (entry['source'], entry['paths'], entry['costs']) == (i, [[i, i + 1, i + 2]], [float(i)])
+    assert history.stats()["recorded"] == 12
+
+def test_long_paths_evict_by_node_ring_space():
+    # 4 routes x 8 node entries per route = 32 node slots; each 15-node path takes 16
+    history = RouteHistory(capacity=4, nodes_per_route=8)
+    record(history, 5, path_length=15)
+    entries, _ = history.page()
+    assert ids(entries) == [4, 3]
+    assert [entry['paths'][0] for entry in entries] == [list(range(4, 19)), list(range(3, 18))]
+    assert history.append(START, 0, 1, "dijkstra", [list(range(40))], [1.0]) is None
+    assert ids(history.page()[0]) == [4, 3]
+
+def test_cursor_paging_visits_every_route_once():
+    history = RouteHistory(capacity=50)
+    record(history, 80)
+    seen, cursor = [], None
+    while True:
+        entries, cursor = history.page(cursor, limit=7)
+        seen.extend(ids(entries))
+        if cursor is None:
+            break
+    assert seen == list(range(79, 29, -1))
+    # A cursor older than everything kept returns nothing
+    assert history.page(cursor=10) == ([], None)
+
+def test_time_range_paging():
+    history = RouteHistory(capacity=100)
+    record(history, 60)
+    since, until = START + timedelta(seconds=20), START + timedelta(seconds=40)
+    first, cursor = history.page(limit=15, since=since, until=until)
+    assert ids(first) == list(range(39, 24, -1))
+    rest, cursor = history.page(cursor, limit=15, since=since, until=until)
+    assert ids(rest) == list(range(24, 19, -1))
+    assert cursor is None
+    assert history.page(until=START) == ([], None)
+
+def test_flush_bookkeeping():
+    history = RouteHistory(capacity=10, persist=True)
+    record(history, 6)
+    assert history.pending() == 6
+
+    entries, upto = history.unflushed(limit=4)
+    assert (ids(entries), upto) == ([0, 1, 2, 3], 4)
+    history.flush_failed("database unavailable")
+    stats = history.stats()
+    assert (stats["flush_failures"], stats["last_flush_error"], stats["pending_flush"]) == (1, "database unavailable", 6)
+    # A failed flush leaves its routes pending, so the retry writes the same ones
+    assert history.unflushed(limit=4) == (entries, 4)
+
+    history.mark_flushed(upto)
+    assert history.pending() == 2
+    assert history.stats()["last_flush_error"] is None
+    assert ids(history.unflushed()[0]) == [4, 5]
+    history.mark_flushed(2)  # a late acknowledgement never moves the mark back
+    assert history.pending() == 2
+
+def test_unflushed_routes_dropped_by_the_ring_are_counted():
+    history = RouteHistory(capacity=5, persist=True)
+    record(history, 5)
+    history.mark_flushed(history.unflushed(limit=3)[1])
+    record(history, 5, start=5)  # evicts 0-4, of which 3 and 4 were never written
+    assert history.stats()["dropped_unflushed"] == 2
+    assert history.pending() == 5
+    assert ids(history.unflushed()[0]) == [5, 6, 7, 8, 9]
+
+def test_without_persistence_nothing_is_counted_as_dropped():
+    history = RouteHistory(capacity=3)
+    record(history, 10)
+    stats = history.stats()
+    assert (stats["dropped_unflushed"], stats["pending_flush"]) == (0, None)
+
+def test_memory_is_fixed():
+    history = RouteHistory(capacity=8)
+    size = history.nbytes()
+    record(history, 100, path_length=6)
+    assert history.nbytes() == size
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def grid(api, grid_topology):
+    """A 9x9 grid plus a separate two-node component, served as topology 'batch-grid'."""
+    module, _ = api
+    G = grid_topology(9, 9, seed=5)
+    G.add_edge(1000, 1001, **G[0][1])
+    module.topologies.register("batch-grid", G)
+    yield G
+    module.topologies.remove("batch-grid")
+
+
+def batch_pairs():
+    rng = np.random.default_rng(9)
+    pairs = rng.integers(81, size=(60, 2)).tolist()
+    return pairs + [[4, 4], [0, 1000], [1001, 1000], [1000, 80]]
+
+
+@pytest.mark.parametrize("backend", ["csr", "networkx"])
+@pytest.mark.parametrize("process_pool", [False, True])
+def test_batch_routes_match_single_routes(api, grid, monkeypatch, backend, process_pool):
+    module, client = api
+    if process_pool:
+        monkeypatch.setattr(module, "ROUTING_POOL", "process")
+        monkeypatch.setattr(module, "ROUTING_BATCH_PROCESS_MIN_SOURCES", 1)
+    pairs = batch_pairs()
+    response = client.post("/api/resilience/routing/batch",
+                           json={"pairs": pairs, "topology": "batch-grid", "backend": backend})
+    assert response.status_code == 200, response.text
+    batch = response.json()
+    assert batch["routes_found"] == sum(cost is not None for cost in batch["costs"])
+
+    for (source, target), cost, path in zip(pairs, batch["costs"], batch["paths"]):
+        if source == target:
+            assert (cost, path) == (0.0, [source])
+            continue
+        single = client.post("/api/resilience/routing",
+                             json={"source": source, "target": target, "topology": "batch-grid", "backend": backend})
+        if cost is None:
+            assert path is None
+            assert single.status_code == 404, (source, target)
+            continue
+        assert single.status_code == 200, single.text
+        result = single.json()["routing_result"]
+        assert cost == pytest.approx(result["costs"][0], rel=1e-12)
+        assert path[0] == source and path[-1] == target
+        assert path == result["paths"][0]
+
+
+def test_batch_without_paths_returns_the_same_costs(api, grid):
+    _, client = api
+    pairs = batch_pairs()
+    with_paths = client.post("/api/resilience/routing/batch", json={"pairs": pairs, "topology": "batch-grid"}).json()
+    costs_only = client.post("/api/resilience/routing/batch",
+                             json={"pairs": pairs, "topology": "batch-grid", "include_paths": False}).json()
+    assert "paths" not in costs_only
+    assert costs_only["costs"] == pytest.approx(with_paths["costs"])
+
+
+def test_batch_rejects_unknown_nodes(api, grid):
+    _, client = api
+    response = client.post("/api/resilience/routing/batch", json={"pairs": [[0, 5], [0, 999]], "topology": "batch-grid"})
+    assert response.status_code == 400
+    assert "999" in response.json()["detail"]
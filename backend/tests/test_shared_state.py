@@ -0,0 +1,137 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from app.routing import router as router_module
+from app.routing.penalty import train_penalty_model
+from app.routing.router import NeuroSymbolicRouting
+from app.routing.spt_cache import ShortestPathTreeCache
+from app.state.shared import SharedState, fcntl
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason="shared state needs fcntl")
+
+
+@pytest.fixture
+def workers(tmp_path, monkeypatch, grid_topology):
+    """Two routers over the same topology that share state through files in tmp_path, as two workers would."""
+    monkeypatch.setattr(router_module, "SHARED_STATE_DIR", str(tmp_path))
+    first = NeuroSymbolicRouting(grid_topology(8, 8, seed=6), name="shared-grid")
+    second = NeuroSymbolicRouting(grid_topology(8, 8, seed=6), name="shared-grid")
+    assert first.shared is not None and second.shared.path == first.shared.path
+    return first, second
+
+def assert_in_sync(router, reference):
+    router.prepare_route_query()
+    reference.prepare_route_query()
+    np.testing.assert_array_equal(router.csr.final_cost, reference.csr.final_cost)
+    for e, data in enumerate(router._edge_data):
+        assert data['final_cost'] == router.csr.final_cost[e]
+        assert data['congestion'] == router.csr.attributes['congestion'][e]
+    assert router.topology_version() == reference.topology_version()
+
+def fresh_route(router, source, target):
+    return router.csr.shortest_path(source, target)
+
+def test_second_worker_uses_the_published_penalty_table(workers, monkeypatch):
+    first, second = workers
+    assert second.penalty.version == first.penalty.version > 0
+    congestion = np.linspace(0, 1, 101)
+    np.testing.assert_array_equal(second.penalty(congestion), first.penalty(congestion))
+    assert_in_sync(second, first)
+
+def test_congestion_updates_reach_the_other_worker(workers):
+    first, second = workers
+    before = second.compute_optimal_path(0, 63, backend="csr")
+    first.update_edge_congestions([0, 1, 2, 3], [1, 2, 3, 4], [1.0, 1.0, 1.0, 1.0])
+    first.update_edge_congestion(8, 16, 0.0)
+
+    assert_in_sync(second, first)
+    assert second.G[0][1]['congestion'] == 1.0
+    after = second.compute_optimal_path(0, 63, backend="csr")
+    assert after == first.compute_optimal_path(0, 63, backend="csr")
+    assert after["costs"][0] == pytest.approx(fresh_route(second, 0, 63)[1])
+    assert after["topology_version"] != before["topology_version"]
+    delta = second.topology_delta(before["topology_version"])
+    assert len(delta["edges"]["index"]) == 5
+
+def test_cached_trees_are_repaired_from_cost_stamps(workers):
+    first, second = workers
+    second.spt_cache = ShortestPathTreeCache(precompute_nodes=0, repair_fraction=1.0)
+    rng = np.random.default_rng(6)
+    edges = list(first.G.edges)
+    sources = [0, 27, 63]
+    for source in sources:
+        second.cached_path(source, 36)
+    for _ in range(5):
+        chosen = [edges[i] for i in rng.choice(len(edges), size=6, replace=False)]
+        first.update_edge_congestions([u for u, _ in chosen], [v for _, v in chosen], rng.uniform(0, 1, 6))
+        second.prepare_route_query()
+        for source in sources:
+            for target in (7, 36, 56):
+                (path,), (cost,) = second.cached_path(source, target)
+                assert cost == pytest.approx(fresh_route(second, source, target)[1], rel=1e-12)
+                assert path[0] == source and path[-1] == target
+    stats = second.spt_cache.stats()
+    assert stats["repairs"] > 0
+    assert stats["misses"] == len(sources) + stats["repair_fallbacks"]
+
+def test_penalty_swap_recomputes_every_cost_once(workers):
+    first, second = workers
+    second.spt_cache = ShortestPathTreeCache(precompute_nodes=0)
+    second.cached_path(0, 63)
+    slot = first.penalty.shared.counter("active")
+    old_table = np.array(first.penalty.shared.arrays["penalties"][slot])
+
+    model = train_penalty_model()
+    model.intercepts_[-1] = model.intercepts_[-1] + 0.5  # a visibly different penalty
+    first.swap_penalty_model(model)
+    # Double-buffered: the new table went into the other slot, the old one is left intact
+    assert first.penalty.shared.counter("active") == 1 - slot
+    np.testing.assert_array_equal(first.penalty.shared.arrays["penalties"][slot], old_table)
+    grid = np.linspace(0, 1, first.penalty.table_size)
+    np.testing.assert_allclose(second.penalty(grid), model.predict(grid.reshape(-1, 1)), rtol=1e-12)
+
+    first.prepare_route_query()
+    full_version = first.shared.counter("full_cost_version")
+    second.prepare_route_query()
+    assert first.shared.counter("full_cost_version") == full_version  # not recomputed a second time
+    assert_in_sync(second, first)
+    assert second.spt_cache.stats()["trees"] == 0  # trees from the old costs were dropped
+    assert second.cached_path(0, 63)[1][0] == pytest.approx(fresh_route(second, 0, 63)[1])
+
+def _update_in_other_process(directory: str, rows: int, cols: int, us, vs, values):
+    from app.routing import router as router_module
+    from app.routing.router import NeuroSymbolicRouting
+    from conftest import build_grid
+
+    router_module.SHARED_STATE_DIR = directory
+    router = NeuroSymbolicRouting(build_grid(rows, cols, seed=6), name="shared-grid")
+    return router.update_edge_congestions(us, vs, values)["topology_version"]
+
+def test_updates_from_another_process(workers, tmp_path):
+    first, _ = workers
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        version = pool.apply(_update_in_other_process, (str(tmp_path), 8, 8, [0, 9], [8, 10], [0.9, 0.2]))
+    assert first.topology_version() == version
+    first.prepare_route_query()
+    assert first.G[0][8]['congestion'] == 0.9
+    assert first.G[9][10]['congestion'] == 0.2
+    assert first.compute_optimal_path(0, 63, backend="csr")["costs"][0] == pytest.approx(fresh_route(first, 0, 63)[1])
+
+def test_shared_state_layout(tmp_path):
+    path = str(tmp_path / "state")
+    first = SharedState(path, ("version",), {"values": (np.float64, 5)},
+                        initialize=lambda state: state.arrays["values"].fill(2.0))
+    second = SharedState(path, ("version",), {"values": (np.float64, 5)},
+                         initialize=lambda state: pytest.fail("initialized twice"))
+    with first.write_lock():
+        first.arrays["values"][1] = 7.0
+        assert first.bump("version") == 1
+    assert second.counter("version") == 1
+    np.testing.assert_array_equal(second.arrays["values"], [2.0, 7.0, 2.0, 2.0, 2.0])
+    # A file left behind with another layout starts over from zeros
+    resized = SharedState(path, ("version",), {"values": (np.float64, 10)})
+    assert resized.counter("version") == 0
+    np.testing.assert_array_equal(resized.arrays["values"], np.zeros(10))
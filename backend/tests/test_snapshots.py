@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from app.routing.registry import TopologyRegistry
+from app.routing.router import NeuroSymbolicRouting
+from app.routing.penalty import penalty_model_digest
+from app.state.snapshots import read_snapshot
+
+
+@pytest.fixture
+def router(penalty_router, grid_topology):
+    router = penalty_router.derive(grid_topology(8, 8, seed=4), "snapshot-grid")
+    router.update_edge_congestions([0, 9, 20], [1, 10, 28], [0.95, 0.05, 0.5])
+    router.prepare_landmarks(4)
+    return router
+
+def queries(router):
+    return [
+        router.compute_optimal_path(0, 63, "dijkstra", backend="csr"),
+        router.compute_optimal_path(7, 56, "astar", backend="csr", heuristic="alt"),
+        router.compute_optimal_path(7, 56, "astar", backend="csr", heuristic="geo"),
+        router.compute_optimal_path(0, 63, "k_shortest", k=4, backend="networkx"),
+        router.route_pairs([[0, 63], [5, 40], [12, 12]])
+    ]
+
+def assert_same_topology(restored, router):
+    expected = router.csr.arrays()
+    actual = restored.csr.arrays()
+    assert sorted(actual) == sorted(expected)
+    for name, array in expected.items():
+        np.testing.assert_array_equal(actual[name], array, err_msg=name)
+    assert restored.topology_version() == router.topology_version()
+    assert restored.topology_payload() == router.topology_payload()
+
+def test_restored_router_matches_the_original(router, penalty_router, tmp_path):
+    router.save_snapshot(str(tmp_path))
+    restored = penalty_router.derive(None, "snapshot-grid", snapshot=str(tmp_path))
+    assert restored.snapshot_id == router.snapshot_id
+    assert_same_topology(restored, router)
+    assert restored.landmark_count == router.landmark_count
+    np.testing.assert_array_equal(restored._alt[1], router._alt[1])
+    np.testing.assert_array_equal(restored._alt[2], router._alt[2])
+    assert queries(restored) == queries(router)
+
+def test_updates_after_restore_stay_out_of_the_snapshot(router, penalty_router, tmp_path):
+    router.save_snapshot(str(tmp_path))
+    assert router.save_snapshot(str(tmp_path)) is None  # nothing changed
+    restored = penalty_router.derive(None, "snapshot-grid", snapshot=str(tmp_path))
+    saved = np.array(read_snapshot(str(tmp_path))[1]["final_cost"])
+
+    for r in (router, restored):
+        r.update_edge_congestions([0, 1], [8, 2], [1.0, 0.0])
+    np.testing.assert_array_equal(read_snapshot(str(tmp_path))[1]["final_cost"], saved)
+    assert_same_topology(restored, router)
+    assert queries(restored) == queries(router)
+
+    # The restored router snapshots its own changes, and a second restore picks them up
+    assert restored.save_snapshot(str(tmp_path)) is not None
+    assert_same_topology(penalty_router.derive(None, "snapshot-grid", snapshot=str(tmp_path)), router)
+
+def test_penalty_model_restored_without_retraining(router, tmp_path, monkeypatch):
+    router.save_snapshot(str(tmp_path))
+    monkeypatch.setattr(NeuroSymbolicRouting, "_train_penalty_model",
+                        lambda self: pytest.fail("penalty model retrained"))
+    restored = NeuroSymbolicRouting(name="snapshot-grid", snapshot=str(tmp_path))
+    assert penalty_model_digest(restored.penalty_model) == penalty_model_digest(router.penalty_model)
+    assert_same_topology(restored, router)
+    assert queries(restored) == queries(router)
+
+def test_registry_restores_snapshotted_topologies(penalty_router, grid_topology, tmp_path):
+    registry = TopologyRegistry(penalty_router, str(tmp_path))
+    router = registry.register("snapshot-grid", grid_topology(8, 8, seed=4))
+    router.prepare_landmarks(2)
+    registry.register("replaced", grid_topology(3, 3))
+    assert set(registry.save_snapshots()) >= {"snapshot-grid", "replaced"}
+    registry.remove("replaced")
+    assert registry.save_snapshots() == {}
+
+    restarted = TopologyRegistry(penalty_router, str(tmp_path))
+    assert [name for name, _ in restarted.items()] == [name for name, _ in registry.items()]
+    restored = restarted.get("snapshot-grid")
+    assert_same_topology(restored, router)
+    assert queries(restored) == queries(router)
@@ -0,0 +1,92 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from app.routing.csr import CSRGraph
+from app.routing.spt_cache import ShortestPathTreeCache
+
+
+def graph(seed: int):
+    """A 10x10 grid plus a separate 3-node path and an isolated node, with small integer costs so paths tie."""
+    rng = np.random.default_rng(seed)
+    G = nx.convert_node_labels_to_integers(nx.grid_2d_graph(10, 10))
+    nx.add_path(G, [200, 201, 202])
+    G.add_node(300)
+    for u, v in G.edges:
+        G[u][v].update(base_cost=1.0, congestion=0.0, latency=1.0, bandwidth=100.0, packet_loss=0.0, jitter=0.0)
+    csr = CSRGraph(G)
+    edges = np.arange(len(csr.final_cost))
+    csr.set_costs(edges, rng.integers(1, 4, size=len(edges)).astype(np.float64))
+    return csr, rng
+
+def assert_valid_tree(csr, source, dist, predecessors):
+    """dist equals a fresh search and every predecessor lies on a shortest path (any of the tied ones)."""
+    fresh, _ = csr.shortest_path_tree(source)
+    np.testing.assert_array_equal(dist, fresh)
+    weights = csr.matrix.toarray()
+    for y in range(len(csr.nodes)):
+        if y == source or not np.isfinite(dist[y]):
+            assert predecessors[y] == -9999
+            continue
+        x = predecessors[y]
+        assert weights[x, y] > 0
+        assert dist[x] + weights[x, y] == dist[y]
+
+def random_update(csr, rng, count: int):
+    edges = rng.choice(len(csr.final_cost), size=count, replace=False)
+    old_costs = csr.final_cost[edges].copy()
+    # Raises, drops and unchanged costs, within the same small range so ties stay common
+    csr.set_costs(edges, np.clip(old_costs + rng.integers(-2, 3, size=count), 1, 4))
+    return edges, old_costs
+
+@pytest.mark.parametrize("seed", range(10))
+def test_repair_matches_fresh_search(seed):
+    csr, rng = graph(seed)
+    n = len(csr.nodes)
+    for source in rng.choice(100, size=5, replace=False).tolist():
+        dist, predecessors = csr.shortest_path_tree(source)
+        for _ in range(5):
+            edges, old_costs = random_update(csr, rng, int(rng.integers(1, 12)))
+            changed = old_costs != csr.final_cost[edges]
+            assert csr.repair_tree(dist, predecessors, edges[changed], old_costs[changed], n)
+            assert_valid_tree(csr, source, dist, predecessors)
+
+def test_repair_rooted_in_small_component():
+    csr, rng = graph(0)
+    source = int(csr.index(201))
+    dist, predecessors = csr.shortest_path_tree(source)
+    for _ in range(5):
+        edges, old_costs = random_update(csr, rng, 40)
+        assert csr.repair_tree(dist, predecessors, edges, old_costs, len(csr.nodes))
+        assert_valid_tree(csr, source, dist, predecessors)
+    assert np.isfinite(dist).sum() == 3
+
+def test_repair_gives_up_past_max_settled():
+    csr, _ = graph(1)
+    dist, predecessors = csr.shortest_path_tree(0)
+    # Every edge out of the source gets dearer, so the whole grid component is touched
+    edges = csr.edge_ids([0, 0], [1, 10])
+    old_costs = csr.final_cost[edges].copy()
+    csr.set_costs(edges, old_costs + 10)
+    assert not csr.repair_tree(dist, predecessors, edges, old_costs, 5)
+
+def test_cache_serves_repaired_and_refreshed_trees():
+    csr, rng = graph(3)
+    cache = ShortestPathTreeCache(precompute_nodes=0, repair_fraction=0.5)
+    sources = [0, 45, 99]
+    version = 0
+    for source in sources:
+        cache.tree(csr, source, "dijkstra", version)
+    for _ in range(20):
+        # Several updates land between reads, so repairs merge the net change of each edge
+        for _ in range(int(rng.integers(1, 4))):
+            version += 1
+            edges, old_costs = random_update(csr, rng, int(rng.integers(1, 6)))
+            cache.log_changes(version, edges, old_costs)
+        for source in rng.permutation(sources).tolist():
+            dist, predecessors = cache.tree(csr, source, "dijkstra", version)
+            assert_valid_tree(csr, source, dist, predecessors)
+    stats = cache.stats()
+    assert stats["repairs"] > 0
+    assert stats["misses"] == len(sources) + stats["repair_fallbacks"]
+    assert stats["pending_changes"] == 0
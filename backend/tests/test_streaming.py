@@ -0,0 +1,154 @@
+import contextlib
+import json
+
+import numpy as np
+import pytest
+
+from app.hdc.detector import PredictiveMaintenance
+from app.hdc.vectors import moving_average_filter
+
+DIM = 1024
+URL = "/api/resilience/predictive-maintenance/stream"
+
+
+@pytest.fixture
+def telemetry():
+    values = 20 + 2 * np.sin(np.linspace(0, 8, 120)) + np.random.default_rng(6).normal(0, 0.3, 120)
+    values[90] += 25
+    return values
+
+
+def encodings(detector, values):
+    return detector.to_bipolar(detector.encode_batch(values)).astype(np.float64)
+
+
+def test_stream_without_decay_matches_a_batch_prototype(telemetry):
+    streaming = PredictiveMaintenance(dim=DIM)
+    verdicts = streaming.ingest(telemetry)
+    smoothed = moving_average_filter(telemetry)
+    assert [sample for sample, *_ in verdicts] == list(range(len(smoothed)))
+    np.testing.assert_allclose([value for _, value, *_ in verdicts], smoothed)
+    assert verdicts[0][2:] == (None, False)
+
+    batch = PredictiveMaintenance(dim=DIM)
+    batch.build_prototype(telemetry)
+    np.testing.assert_array_equal(streaming.bundle, batch.bundle)
+    np.testing.assert_array_equal(streaming.prototype, batch.prototype)
+    assert streaming.samples_seen == batch.samples_seen == len(smoothed)
+
+
+@pytest.mark.parametrize("decay", [0.5, 0.9, 1.0])
+def test_decayed_bundle_weights_samples_exponentially(telemetry, decay):
+    detector = PredictiveMaintenance(dim=DIM, decay=decay)
+    verdicts = detector.ingest(telemetry)
+    encoded = encodings(detector, [value for _, value, *_ in verdicts])
+    weights = decay ** np.arange(len(encoded) - 1, -1, -1)
+    expected = weights @ encoded
+    np.testing.assert_allclose(detector.bundle, expected)
+    np.testing.assert_array_equal(detector.to_bipolar(detector.prototype), np.where(expected >= 0, 1, -1))
+
+
+def test_each_sample_is_scored_before_it_is_absorbed(telemetry):
+    detector = PredictiveMaintenance(dim=DIM, decay=0.8)
+    shadow = PredictiveMaintenance(dim=DIM, decay=0.8)
+    for _, value, similarity, anomaly in detector.ingest(telemetry):
+        if shadow.prototype is None:
+            assert (similarity, anomaly) == (None, False)
+        else:
+            expected = shadow.detect(value)
+            assert (similarity, anomaly) == (float(expected[0]), bool(expected[1]))
+        shadow.absorb(value)
+    assert any(anomaly for *_, anomaly in detector.ingest([60.0] * 5))
+
+
+def test_chunked_ingest_matches_one_pass(telemetry):
+    whole = PredictiveMaintenance(dim=DIM, decay=0.9)
+    chunked = PredictiveMaintenance(dim=DIM, decay=0.9)
+    expected = whole.ingest(telemetry)
+    verdicts = [v for chunk in np.array_split(telemetry, [1, 3, 4, 50, 51]) for v in chunked.ingest(chunk)]
+    assert verdicts == expected
+    np.testing.assert_array_equal(chunked.bundle, whole.bundle)
+
+
+def test_reset_forgets_the_stream(telemetry):
+    detector = PredictiveMaintenance(dim=DIM)
+    first = detector.ingest(telemetry)
+    detector.ingest([1.0, 2.0])
+    detector.reset_stream()
+    assert (detector.bundle, detector.prototype, detector.samples_seen) == (None, None, 0)
+    assert detector.ingest(telemetry) == first
+
+
+@pytest.mark.parametrize("decay", [0, -0.5, 1.5])
+def test_decay_must_be_a_fraction(decay):
+    with pytest.raises(ValueError):
+        PredictiveMaintenance(dim=DIM, decay=decay)
+
+
+@pytest.mark.parametrize("frame, samples", [
+    ("3", [3]),
+    ("-2.5", [-2.5]),
+    ("[1, 2.5, 3]", [1, 2.5, 3]),
+    ('{"value": 4}', [4]),
+    ('{"data": [5, 6]}', [5, 6]),
+    ("[]", []),
+])
+def test_stream_frames_are_parsed(api, frame, samples):
+    module, _ = api
+    assert module._parse_stream_frame(frame) == samples
+
+
+@pytest.mark.parametrize("frame", ["{", "true", '"7"', "[1, null]", '{"other": 1}', "[1001]", '{"data": [-2000]}'])
+def test_bad_stream_frames_are_rejected(api, frame):
+    module, _ = api
+    with pytest.raises(ValueError):
+        module._parse_stream_frame(frame)
+
+
+def stream(client, device_id, body):
+    response = client.post(URL, params={"device_id": device_id}, content=body)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.fixture
+def devices(api):
+    module, _ = api
+    names = ["stream-whole", "stream-chunked"]
+    yield names
+    for name in names:
+        with contextlib.suppress(KeyError):  # not every test streams to both
+            module.detectors.remove(name)
+
+
+def test_lines_split_across_chunks_are_reassembled(api, devices, telemetry):
+    _, client = api
+    frames = [json.dumps(round(v, 3)) for v in telemetry[:60].tolist()]
+    frames[10:13] = [json.dumps({"data": [round(v, 3) for v in telemetry[60:100].tolist()]}), "", "oops"]
+    body = "\n".join(frames) + "\n" + json.dumps({"value": round(float(telemetry[100]), 3)})
+    whole = stream(client, devices[0], body.encode())
+
+    data = body.encode()
+    chunks = [data[i:i + 7] for i in range(0, len(data), 7)]
+    assert any(not chunk.endswith(b"\n") for chunk in chunks)
+    chunked = stream(client, devices[1], iter(chunks))
+    assert chunked == whole
+
+    errors = [line for line in whole if "error" in line]
+    assert len(errors) == 1 and "Invalid telemetry frame" in errors[0]["error"]
+    verdicts = [line for line in whole if "error" not in line]
+    assert [line["sample"] for line in verdicts] == list(range(len(verdicts)))
+    assert len(verdicts) == 60 - 3 + 40 + 1 - 4
+
+
+def test_stream_reset_restarts_a_device(api, devices, telemetry):
+    module, client = api
+    body = "\n".join(json.dumps(round(v, 3)) for v in telemetry[:30].tolist())
+    first = stream(client, devices[0], body)
+    assert stream(client, devices[0], body)[0]["sample"] == len(first)
+    response = client.post(f"{URL}/reset", params={"device_id": devices[0]})
+    assert response.status_code == 200
+    with module.detectors.checkout(devices[0]) as detector:
+        assert detector.samples_seen == 0 and detector.bundle is None
+    assert stream(client, devices[0], body) == first
@@ -0,0 +1,121 @@
+import base64
+
+import numpy as np
+import pytest
+
+URL = "/api/resilience/predictive-maintenance"
+OCTET_STREAM = {"content-type": "application/octet-stream"}
+
+
+@pytest.fixture
+def values():
+    return np.random.default_rng(3).normal(20, 2, 64)
+
+
+def expected(client, values):
+    """The response for the same values sent as a JSON list."""
+    response = client.post(URL, json={"data": values.tolist()})
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float64"])
+def test_binary_body_matches_json(api, values, dtype):
+    module, client = api
+    encoded = values.astype(module.TELEMETRY_DTYPES[dtype])
+    response = client.post(f"{URL}/binary", params={"dtype": dtype}, content=encoded.tobytes(), headers=OCTET_STREAM)
+    assert response.status_code == 200
+    assert response.json() == expected(client, encoded.astype(np.float64))
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float64"])
+def test_base64_payload_matches_json(api, values, dtype):
+    module, client = api
+    encoded = values.astype(module.TELEMETRY_DTYPES[dtype])
+    payload = {"data_b64": base64.b64encode(encoded.tobytes()).decode(), "dtype": dtype}
+    response = client.post(URL, json=payload)
+    assert response.status_code == 200
+    assert response.json() == expected(client, encoded.astype(np.float64))
+
+
+def test_binary_defaults_to_float32(api, values):
+    _, client = api
+    body = values.astype("<f4").tobytes()
+    default = client.post(f"{URL}/binary", content=body, headers=OCTET_STREAM)
+    explicit = client.post(f"{URL}/binary", params={"dtype": "float32"}, content=body, headers=OCTET_STREAM)
+    assert default.status_code == 200
+    assert default.json() == explicit.json()
+
+
+@pytest.mark.parametrize("dtype, size", [("float32", 4 * 8 + 3), ("float64", 8 * 8 + 4)])
+def test_wrong_byte_length_is_rejected(api, dtype, size):
+    _, client = api
+    body = bytes(size)
+    response = client.post(f"{URL}/binary", params={"dtype": dtype}, content=body, headers=OCTET_STREAM)
+    assert response.status_code == 400
+    assert "multiple of" in response.json()["detail"]
+    payload = {"data_b64": base64.b64encode(body).decode(), "dtype": dtype}
+    assert client.post(URL, json=payload).status_code == 400
+
+
+@pytest.mark.parametrize("bad", [np.nan, np.inf, -np.inf, 1001.0])
+def test_non_finite_and_out_of_range_values_are_rejected(api, values, bad):
+    _, client = api
+    encoded = values.astype("<f8")
+    encoded[10] = bad
+    body = encoded.tobytes()
+    response = client.post(f"{URL}/binary", params={"dtype": "float64"}, content=body, headers=OCTET_STREAM)
+    assert response.status_code == 400
+    assert "between -1000 and 1000" in response.json()["detail"]
+    payload = {"data_b64": base64.b64encode(body).decode(), "dtype": "float64"}
+    assert client.post(URL, json=payload).status_code == 400
+    batch = {"series": {"link-1": values.tolist(), "link-2": payload["data_b64"]}, "dtype": "float64"}
+    assert client.post(f"{URL}/batch", json=batch).status_code == 400
+
+
+def test_too_few_points_are_rejected(api):
+    _, client = api
+    body = np.array([1.0], dtype="<f4").tobytes()
+    assert client.post(f"{URL}/binary", content=body, headers=OCTET_STREAM).status_code == 400
+    assert client.post(URL, json={"data_b64": base64.b64encode(body).decode()}).status_code == 400
+
+
+def test_unknown_dtype_and_content_type_are_rejected(api, values):
+    _, client = api
+    body = values.astype("<f4").tobytes()
+    response = client.post(f"{URL}/binary", params={"dtype": "int16"}, content=body, headers=OCTET_STREAM)
+    assert response.status_code == 400
+    response = client.post(f"{URL}/binary", content=body, headers={"content-type": "application/json"})
+    assert response.status_code == 415
+    payload = {"data_b64": base64.b64encode(body).decode(), "dtype": "int16"}
+    assert client.post(URL, json=payload).status_code == 422
+
+
+def test_payload_needs_exactly_one_encoding(api, values):
+    _, client = api
+    data_b64 = base64.b64encode(values.astype("<f4").tobytes()).decode()
+    assert client.post(URL, json={"data": values.tolist(), "data_b64": data_b64}).status_code == 422
+    assert client.post(URL, json={"dtype": "float32"}).status_code == 422
+    assert client.post(URL, json={"data_b64": "not base64!"}).status_code == 400
+
+
+def test_batch_mixes_lists_and_base64_series(api, values):
+    _, client = api
+    encoded = values.astype("<f8")
+    batch = {
+        "series": {"list": values.tolist(), "base64": base64.b64encode(encoded.tobytes()).decode()},
+        "dtype": "float64"
+    }
+    response = client.post(f"{URL}/batch", json=batch)
+    assert response.status_code == 200
+    series = response.json()["series"]
+    assert series["list"] == series["base64"]
+
+
+def test_decode_telemetry_views_the_payload(api, values):
+    module, _ = api
+    payload = bytearray(values.astype("<f8").tobytes())
+    decoded = module.decode_telemetry(payload, "float64")
+    assert decoded.dtype == np.dtype("<f8")
+    assert np.shares_memory(decoded, np.frombuffer(payload, dtype=np.uint8))
+    np.testing.assert_array_equal(decoded, values)
@@ -0,0 +1,66 @@
+import pytest
+
+
+@pytest.fixture
+def topology(api, grid_topology):
+    module, _ = api
+    module.topologies.register("delta-grid", grid_topology(5, 5))
+    yield "/api/resilience/topologies/delta-grid/graph"
+    module.topologies.remove("delta-grid")
+
+def apply_delta(payload, delta):
+    edges = {key: list(values) for key, values in payload["edges"].items()}
+    for i, index in enumerate(delta["edges"]["index"]):
+        for key, values in delta["edges"].items():
+            if key != "index":
+                edges[key][index] = values[i]
+    return {"version": delta["version"], "nodes": payload["nodes"], "edges": edges}
+
+def test_etag_answers_304_until_the_topology_changes(api, topology):
+    _, client = api
+    response = client.get(topology)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert etag == f'"{response.json()["version"]}"'
+
+    for header in (etag, f"W/{etag}", f'"stale", {etag}'):
+        cached = client.get(topology, headers={"If-None-Match": header})
+        assert cached.status_code == 304
+        assert cached.headers["ETag"] == etag
+    assert client.get(topology, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+    client.post("/api/resilience/routing/update-congestion",
+                params={"u": 0, "v": 1, "congestion": 0.9, "topology": "delta-grid"})
+    changed = client.get(topology, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+def test_delta_brings_a_cached_payload_up_to_date(api, topology):
+    _, client = api
+    cached = client.get(topology).json()
+    version = cached["version"]
+    assert client.get(f"{topology}/delta", params={"since": version}).json()["edges"]["index"] == []
+
+    response = client.post("/api/resilience/routing/update-congestion/bulk", json={
+        "u": [0, 6, 12], "v": [5, 7, 17], "congestion": [0.1, 0.5, 0.95], "topology": "delta-grid"
+    })
+    assert response.status_code == 200, response.text
+    client.post("/api/resilience/routing/update-congestion",
+                params={"u": 24, "v": 23, "congestion": 0.3, "topology": "delta-grid"})
+
+    delta = client.get(f"{topology}/delta", params={"since": f'"{version}"'}).json()
+    assert delta["since"] == version
+    assert len(delta["edges"]["index"]) == 4
+    fresh = client.get(topology)
+    assert apply_delta(cached, delta) == fresh.json()
+    assert fresh.headers["ETag"] == f'"{delta["version"]}"'
+
+    route = client.post("/api/resilience/routing", json={"source": 0, "target": 24, "topology": "delta-grid"})
+    assert route.json()["routing_result"]["topology_version"] == delta["version"]
+
+def test_delta_from_another_build_is_gone(api, topology, grid_topology):
+    module, client = api
+    version = client.get(topology).json()["version"]
+    module.topologies.register("delta-grid", grid_topology(5, 5, seed=1))
+    assert client.get(f"{topology}/delta", params={"since": version}).status_code == 410
+    assert client.get(f"{topology}/delta", params={"since": "not-a-version"}).status_code == 400
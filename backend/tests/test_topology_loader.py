@@ -0,0 +1,151 @@
+import json
+
+import networkx as nx
+import pytest
+
+from app.routing.topology import QOS_ATTRIBUTES, load_topology
+
+HEADER = "source,target," + ",".join(QOS_ATTRIBUTES)
+EDGES = [
+    (1, 2, 1.0, 0.1, 10.0, 100.0, 0.01, 1.0),
+    (2, 3, 2.0, 0.5, 20.0, 200.0, 0.02, 2.0),
+    (3, 1, 1.5, 0.9, 30.0, 300.0, 0.0, 3.0),
+]
+COORDINATES = {1: (40.0, -3.0), 2: (41.0, -3.5), 3: (-33.9, 151.2)}
+
+
+def edge_objects(edges=EDGES):
+    return [dict(zip(("source", "target") + QOS_ATTRIBUTES, edge)) for edge in edges]
+
+def write(tmp_path, name: str, content: str):
+    path = tmp_path / name
+    path.write_text(content)
+    return str(path)
+
+def write_csv(tmp_path, edges=EDGES, header=HEADER):
+    return write(tmp_path, "edges.csv", "\n".join([header] + [",".join(map(str, edge)) for edge in edges]) + "\n")
+
+def write_ndjson(tmp_path, edges=None):
+    edges = edge_objects() if edges is None else edges
+    return write(tmp_path, "edges.ndjson", "".join(json.dumps(edge) + "\n" for edge in edges))
+
+def assert_edges(G, edges=EDGES):
+    assert G.number_of_edges() == len(edges)
+    for u, v, *values in edges:
+        assert G[u][v] == dict(zip(QOS_ATTRIBUTES, values))
+
+@pytest.mark.parametrize("chunk_rows", [1, 2, 1000])
+def test_csv_and_ndjson_edge_lists(tmp_path, chunk_rows):
+    assert_edges(load_topology(write_csv(tmp_path), chunk_rows=chunk_rows))
+    assert_edges(load_topology(write_ndjson(tmp_path), chunk_rows=chunk_rows))
+
+def test_csv_columns_in_any_order_with_extra_columns(tmp_path):
+    columns = ("label",) + tuple(reversed(("source", "target") + QOS_ATTRIBUTES))
+    rows = [("x",) + tuple(reversed(edge)) for edge in EDGES]
+    assert_edges(load_topology(write_csv(tmp_path, rows, ",".join(columns))))
+
+def test_json_node_link_document_with_coordinates(tmp_path):
+    document = {
+        "nodes": [{"id": node, "lat": lat, "lon": lon} for node, (lat, lon) in COORDINATES.items()],
+        "links": edge_objects()
+    }
+    G = load_topology(write(tmp_path, "graph.json", json.dumps(document)))
+    assert_edges(G)
+    assert {node: (G.nodes[node]["lat"], G.nodes[node]["lon"]) for node in G} == COORDINATES
+    # A bare list of edges is accepted too
+    assert_edges(load_topology(write(tmp_path, "edges.json", json.dumps(edge_objects()))))
+
+def test_graphml_with_coordinates(tmp_path):
+    G = nx.Graph()
+    for node, (lat, lon) in COORDINATES.items():
+        G.add_node(node, lat=lat, lon=lon)
+    for u, v, *values in EDGES:
+        G.add_edge(u, v, **dict(zip(QOS_ATTRIBUTES, values)))
+    path = str(tmp_path / "graph.graphml")
+    nx.write_graphml(G, path)
+    loaded = load_topology(path)
+    assert_edges(loaded)
+    assert loaded.nodes[3] == {"lat": -33.9, "lon": 151.2}
+
+@pytest.mark.parametrize("nodes_file", ["nodes.csv", "nodes.ndjson"])
+def test_separate_nodes_file(tmp_path, nodes_file):
+    if nodes_file.endswith(".csv"):
+        content = "id,lat,lon\n" + "".join(f"{node},{lat},{lon}\n" for node, (lat, lon) in COORDINATES.items())
+    else:
+        content = "".join(json.dumps({"id": node, "lat": lat, "lon": lon}) + "\n" for node, (lat, lon) in COORDINATES.items())
+    # Nodes that are not in the topology are ignored
+    content += "99,0,0\n" if nodes_file.endswith(".csv") else json.dumps({"id": 99, "lat": 0, "lon": 0}) + "\n"
+    G = load_topology(write_csv(tmp_path), nodes_path=write(tmp_path, nodes_file, content))
+    assert {node: (G.nodes[node]["lat"], G.nodes[node]["lon"]) for node in G} == COORDINATES
+
+@pytest.mark.parametrize("edges, message", [
+    ([(1, 2, -1.0, 0.1, 10.0, 100.0, 0.01, 1.0)], "Edge 0 (1, 2): base_cost cannot be negative"),
+    ([EDGES[0], (2, 3, 1.0, 1.5, 10.0, 100.0, 0.01, 1.0)], "Edge 1 (2, 3): congestion must be between 0 and 1"),
+    ([(1, 2, 1.0, 0.1, 0.0, 100.0, 0.01, 1.0)], "latency must be positive"),
+    ([(1, 2, 1.0, 0.1, 10.0, 100.0, 2.0, 1.0)], "packet_loss must be between 0 and 1"),
+    ([(1, 1, 1.0, 0.1, 10.0, 100.0, 0.01, 1.0)], "self-loops are not allowed"),
+    ([(1, 2, "nan", 0.1, 10.0, 100.0, 0.01, 1.0)], "attributes must be finite"),
+    ([(1, 2, "cheap", 0.1, 10.0, 100.0, 0.01, 1.0)], "Malformed topology edge"),
+    ([], "Topology has no edges"),
+])
+def test_invalid_edges_are_rejected(tmp_path, edges, message):
+    with pytest.raises(ValueError, match=message.replace("(", r"\(").replace(")", r"\)")):
+        load_topology(write_csv(tmp_path, edges), chunk_rows=1)
+
+def test_missing_and_unknown_columns_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match=r"missing columns: \['jitter'\]"):
+        load_topology(write_csv(tmp_path, [edge[:-1] for edge in EDGES], HEADER.rsplit(",", 1)[0]))
+    with pytest.raises(ValueError, match=r"missing columns: \['base_cost'\]"):
+        load_topology(write_csv(tmp_path, header=HEADER.replace("base_cost", "cost")))
+    with pytest.raises(ValueError, match="Topology format must be one of"):
+        load_topology(write(tmp_path, "edges.txt", ""))
+
+def test_malformed_rows_name_their_row(tmp_path):
+    with pytest.raises(ValueError, match="Malformed topology edge at row 1: expected 8 columns, got 7"):
+        load_topology(write_csv(tmp_path, [EDGES[0], EDGES[1][:-1]]))
+    edges = edge_objects()
+    del edges[2]["congestion"]
+    with pytest.raises(ValueError, match="Malformed topology edge at row 2: missing 'congestion'"):
+        load_topology(write_ndjson(tmp_path, edges))
+    with pytest.raises(ValueError, match="Malformed topology edge at row 2: missing 'congestion'"):
+        load_topology(write(tmp_path, "graph.json", json.dumps({"links": edges})))
+    with pytest.raises(ValueError, match="Malformed topology edge at row 1"):
+        load_topology(write(tmp_path, "edges.ndjson", json.dumps(edge_objects()[0]) + "\n{not json\n"))
+
+@pytest.mark.parametrize("content, message", [
+    ("id,lat,lon\n1,95,0\n", "Node 1: lat must be within ±90 and lon within ±180"),
+    ("id,lat,lon\n2,0,-181\n", "Node 2: lat must be within ±90 and lon within ±180"),
+    ("id,lat,lon\n1,north,0\n", "Malformed node coordinates"),
+    ("id,lat,lon\none,0,0\n", "Malformed node coordinates at row 0"),
+    ("id,latitude,longitude\n1,0,0\n", "needs id, lat and lon columns"),
+])
+def test_bad_coordinates_are_rejected(tmp_path, content, message):
+    with pytest.raises(ValueError, match=message):
+        load_topology(write_csv(tmp_path), nodes_path=write(tmp_path, "nodes.csv", content))
+
+@pytest.fixture
+def upload(api, tmp_path, monkeypatch):
+    module, client = api
+    monkeypatch.setattr(module, "TOPOLOGY_DIR", str(tmp_path))
+    yield lambda fmt, content: client.put("/api/resilience/topologies/uploaded", params={"format": fmt},
+                                          content=content)
+    if "uploaded" in dict(module.topologies.items()):
+        module.topologies.remove("uploaded")
+
+def test_upload_loads_a_topology(upload, tmp_path):
+    edges = "\n".join([HEADER] + [",".join(map(str, edge)) for edge in EDGES])
+    response = upload("csv", edges)
+    assert response.status_code == 200, response.text
+    assert (response.json()["nodes"], response.json()["edges"]) == (3, 3)
+    assert [path.name for path in tmp_path.iterdir()] == []  # the upload is removed after loading
+
+@pytest.mark.parametrize("fmt, content", [
+    ("csv", HEADER + "\n1,2,1.0\n"),
+    ("ndjson", json.dumps({"source": 1, "target": 2, "base_cost": 1.0}) + "\n"),
+    ("json", json.dumps({"links": [{"source": 1, "target": 2}]})),
+    ("csv", HEADER + "\n1,2,-1,0.1,10,100,0.01,1\n"),
+])
+def test_malformed_upload_is_400(upload, fmt, content):
+    response = upload(fmt, content)
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"].startswith(("Malformed topology edge at row 0", "Edge 0"))
@@ -19,8 +19,11 @@ import {
   getPredictiveMaintenance,
   getOptimalRoute,
   getRoutingHistory,
+  getTopologyGraph,
+  getTopologyDelta,
   updateConfig,
   retrainPenaltyModel,
+  getRetrainJob,
   addManualMetrics,
   getSystemHealth,
   getConfig
@@ -76,6 +79,29 @@ const metricPresets = {
   }
 };
 
+const topologyMetrics = ['latency', 'bandwidth', 'packet_loss', 'jitter', 'congestion'];
+
+// Node and edge lists for rendering, marking the route's path edges (node index pairs)
+const buildTopologyView = (topology, pathEdges) => {
+  const pathNodes = new Set(pathEdges.flat());
+  const pathKeys = new Set(pathEdges.map(([u, v]) => (u < v ? `${u}-${v}` : `${v}-${u}`)));
+  const { edges } = topology;
+  return {
+    nodes: topology.nodes.map((id, index) => ({ id, in_path: pathNodes.has(index) })),
+    edges: edges.source.map((u, index) => {
+      const v = edges.target[index];
+      const metrics = {};
+      topologyMetrics.forEach(key => { metrics[key] = edges[key][index]; });
+      return {
+        source: topology.nodes[u],
+        target: topology.nodes[v],
+        metrics,
+        in_path: pathKeys.has(u < v ? `${u}-${v}` : `${v}-${u}`)
+      };
+    })
+  };
+};
+
 export default function NetworkDashboard() {
   const [telemetryData, setTelemetryData] = useState({
     latency: [],
@@ -121,6 +147,7 @@ export default function NetworkDashboard() {
   const [selectedPreset, setSelectedPreset] = useState('custom');
   const fileInputRef = useRef(null);
   const monitoringIntervalRef = useRef(null);
+  const topologyCacheRef = useRef(null);
   const router = useRouter();
 
   // Fetch configuration on mount
@@ -205,8 +232,17 @@ export default function NetworkDashboard() {
 
   const handleRetrainModel = async () => {
     try {
-      await retrainPenaltyModel();
-      toast.success('Penalty model retrained successfully');
+      // Retraining runs as a background job; poll it until the new model is swapped in
+      let job = await retrainPenaltyModel();
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        job = await getRetrainJob(job.job_id);
+      }
+      if (job.status === 'succeeded') {
+        toast.success('Penalty model retrained successfully');
+      } else {
+        toast.error(`Penalty model retraining ${job.status}: ${job.error}`);
+      }
     } catch (error) {
       toast.error('Failed to retrain penalty model');
     }
@@ -268,6 +304,28 @@ export default function NetworkDashboard() {
     }));
   };
 
+  // Bring the cached topology to the given version: a delta when only edge metrics
+  // changed since the cached copy, otherwise the full topology
+  const syncTopology = async (version) => {
+    let cached = topologyCacheRef.current;
+    if (cached && cached.version !== version && cached.version.split('.')[0] === version.split('.')[0]) {
+      const delta = await getTopologyDelta(cached.version);
+      if (delta) {
+        delta.edges.index.forEach((edgeIndex, i) => {
+          topologyMetrics.forEach(key => { cached.edges[key][edgeIndex] = delta.edges[key][i]; });
+        });
+        cached.version = delta.version;
+      } else {
+        cached = null;
+      }
+    }
+    if (!cached || cached.version !== version) {
+      cached = (await getTopologyGraph(cached?.version)) || cached;
+    }
+    topologyCacheRef.current = cached;
+    return cached;
+  };
+
   const handleOptimalRoute = async () => {
     try {
       setLoading(prev => ({ ...prev, routing: true }));
@@ -292,8 +350,10 @@ export default function NetworkDashboard() {
       }
       
       console.log('Route calculated successfully:', results);
-      setRoutingResults(results);
-      setNetworkTopology(results.visualization_data);
+      const topology = await syncTopology(results.topology_version);
+      const visualization = buildTopologyView(topology, results.path_edges);
+      setRoutingResults({ ...results, visualization_data: visualization });
+      setNetworkTopology(visualization);
       toast.success('Optimal route calculated successfully');
 
       // Fetch updated routing history
@@ -1167,7 +1227,7 @@ export default function NetworkDashboard() {
                 <div className="mt-6">
                   <h3 className="font-medium mb-2">Recent Routes:</h3>
                   <div className="space-y-2">
-                    {routingHistory.slice(-5).map((entry, index) => (
+                    {routingHistory.slice(0, 5).map((entry, index) => (
                       <div key={index} className="p-3 rounded-lg bg-gray-50 text-sm">
                         <div className="flex justify-between items-center">
                           <span className="font-medium">
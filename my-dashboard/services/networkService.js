@@ -87,6 +87,50 @@ export const getRoutingHistory = async () => {
   }
 };
 
+// Static topology cached by the client; resolves to null when cachedVersion is still current
+export const getTopologyGraph = async (cachedVersion = null, topology = 'default') => {
+  const token = localStorage.getItem('token');
+  if (!token) {
+    throw new Error('No authentication token found');
+  }
+
+  try {
+    const headers = { 'Authorization': `Bearer ${token}` };
+    if (cachedVersion) {
+      headers['If-None-Match'] = `"${cachedVersion}"`;
+    }
+    const response = await axios.get(`${RESILIENCE_API_URL}/topologies/${topology}/graph`, {
+      headers,
+      validateStatus: (status) => status === 200 || status === 304
+    });
+    return response.status === 304 ? null : response.data;
+  } catch (error) {
+    handleApiError(error);
+  }
+};
+
+// Metrics of the edges changed since a cached topology version; resolves to null when
+// the version belongs to an earlier build and the full topology must be fetched again
+export const getTopologyDelta = async (since, topology = 'default') => {
+  const token = localStorage.getItem('token');
+  if (!token) {
+    throw new Error('No authentication token found');
+  }
+
+  try {
+    const response = await axios.get(`${RESILIENCE_API_URL}/topologies/${topology}/graph/delta`, {
+      params: { since },
+      headers: {
+        'Authorization': `Bearer ${token}`
+      },
+      validateStatus: (status) => status === 200 || status === 410
+    });
+    return response.status === 410 ? null : response.data;
+  } catch (error) {
+    handleApiError(error);
+  }
+};
+
 export const updateCongestion = async (u, v, congestion) => {
   const token = localStorage.getItem('token');
   if (!token) {
@@ -163,6 +207,20 @@ export const retrainPenaltyModel = async () => {
   }
 };
 
+export const getRetrainJob = async (jobId) => {
+  const token = localStorage.getItem('token');
+  try {
+    const response = await axios.get(`${RESILIENCE_API_URL}/retrain-penalty/jobs/${jobId}`, {
+      headers: {
+        'Authorization': `Bearer ${token}`
+      }
+    });
+    return response.data;
+  } catch (error) {
+    handleApiError(error);
+  }
+};
+
 // New function to collect real network metrics
 export const collectNetworkMetrics = async () => {
   try {